@@ -4,10 +4,38 @@ Script to add season column to Carbon_Emission_Cleaned.csv
 Based on Indian seasonal patterns
 """
 
+import os
+import sys
+import argparse
+import numpy as np
 import pandas as pd
-import random
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from services.dataset_cache import read_dataset, write_dataset, stream_dataset
+
+INPUT_FILE = 'src/data/Carbon_Emission_Cleaned.csv'
+OUTPUT_FILE = 'src/data/Carbon_Emission_With_Seasons.csv'
+
+SEASONS = ['Winter', 'Summer', 'Monsoon', 'Post-Monsoon']
+
+# Weighted distribution based on typical data collection patterns
+# More data collected during Monsoon and Summer (peak activity periods)
+SEASON_WEIGHTS = [0.15, 0.35, 0.35, 0.15]  # Winter, Summer, Monsoon, Post-Monsoon
+
+# Mumbai/Navi Mumbai - coastal cities, more monsoon data
+COASTAL_CITIES = ['Mumbai', 'Navi Mumbai']
+COASTAL_MONSOON_PROB = 0.4  # Higher monsoon probability for coastal cities
+COASTAL_SUMMER_PROB = 0.3   # Higher summer probability
+
+# High air travel -> more likely Summer/Monsoon (vacation periods)
+HIGH_AIR_TRAVEL = ['frequently', 'very frequently']
+AIR_TRAVEL_PROB = 0.6
+
+# High heating usage -> more likely Winter
+HIGH_HEATING = ['coal', 'wood', 'natural gas']
+HEATING_WINTER_PROB = 0.4
+
 def get_indian_season(month):
     """
     Get Indian season based on month
@@ -23,102 +51,116 @@ def get_indian_season(month):
     else:
         return "Unknown"
 
-def add_season_column():
+def assign_seasons(df, rng):
+    """
+    Draw a season for every row, adjusted by city and activities
+
+    Each adjustment draws random numbers only for the rows it applies to,
+    with the same probabilities as adjusting the rows one at a time.
+    """
+    season = rng.choice(len(SEASONS), size=len(df), p=SEASON_WEIGHTS)
+
+    # Adjust for coastal cities: monsoon first, otherwise maybe summer
+    coastal = np.flatnonzero(df['city'].isin(COASTAL_CITIES).to_numpy())
+    monsoon = rng.random(len(coastal)) < COASTAL_MONSOON_PROB
+    summer = ~monsoon & (rng.random(len(coastal)) < COASTAL_SUMMER_PROB)
+    season[coastal[monsoon]] = SEASONS.index('Monsoon')
+    season[coastal[summer]] = SEASONS.index('Summer')
+
+    high_air_travel = np.flatnonzero(df['Frequency of Traveling by Air'].isin(HIGH_AIR_TRAVEL).to_numpy())
+    chosen = high_air_travel[rng.random(len(high_air_travel)) < AIR_TRAVEL_PROB]
+    season[chosen] = np.array([SEASONS.index('Summer'), SEASONS.index('Monsoon')])[rng.integers(0, 2, len(chosen))]
+
+    high_heating = np.flatnonzero(df['Heating Energy Source'].isin(HIGH_HEATING).to_numpy())
+    season[high_heating[rng.random(len(high_heating)) < HEATING_WINTER_PROB]] = SEASONS.index('Winter')
+
+    return pd.Categorical.from_codes(season, categories=SEASONS)
+
+def add_season_column(input_file=INPUT_FILE, output_file=OUTPUT_FILE, seed=None, chunksize=0):
     """
     Add season column to the CSV file
+
+    With chunksize > 0 the CSV is streamed in chunks of that many rows,
+    for files larger than memory, and only the season counts are kept.
     """
-    print("🔄 Reading CSV file...")
-    
-    # Read the CSV file
-    df = pd.read_csv('src/data/Carbon_Emission_Cleaned.csv')
-    
-    print(f"📊 Found {len(df)} records")
-    print(f"🏙️ Cities: {df['city'].unique()}")
-    print(f"🌍 Countries: {df['country'].unique()}")
-    
-    # Since this is cross-sectional data, we'll distribute seasons realistically
-    # Based on Indian data collection patterns and seasonal behavior
-    
-    # Create realistic seasonal distribution
-    seasons = ['Winter', 'Summer', 'Monsoon', 'Post-Monsoon']
-    
-    # Weighted distribution based on typical data collection patterns
-    # More data collected during Monsoon and Summer (peak activity periods)
-    season_weights = [0.15, 0.35, 0.35, 0.15]  # Winter, Summer, Monsoon, Post-Monsoon
-    
+    rng = np.random.default_rng(seed)
+
     print("🎲 Assigning seasons with realistic distribution...")
     print("   - Summer: 35% (Mar-May)")
-    print("   - Monsoon: 35% (Jun-Sep)")  
+    print("   - Monsoon: 35% (Jun-Sep)")
     print("   - Winter: 15% (Dec-Feb)")
     print("   - Post-Monsoon: 15% (Oct-Nov)")
-    
-    # Assign seasons based on weighted random distribution
-    df['season'] = random.choices(seasons, weights=season_weights, k=len(df))
-    
-    # Add some realistic patterns based on city and activities
     print("🏙️ Adjusting seasons based on city patterns...")
-    
-    # Mumbai/Navi Mumbai - coastal cities, more monsoon data
-    coastal_mask = df['city'].isin(['Mumbai', 'Navi Mumbai'])
-    coastal_monsoon_prob = 0.4  # Higher monsoon probability for coastal cities
-    coastal_summer_prob = 0.3   # Higher summer probability
-    
-    # Adjust for coastal cities
-    coastal_indices = df[coastal_mask].index
-    for idx in coastal_indices:
-        if random.random() < coastal_monsoon_prob:
-            df.loc[idx, 'season'] = 'Monsoon'
-        elif random.random() < coastal_summer_prob:
-            df.loc[idx, 'season'] = 'Summer'
-    
-    # Add seasonal patterns based on activities
     print("🎯 Adding seasonal patterns based on activities...")
-    
-    # High air travel -> more likely Summer/Monsoon (vacation periods)
-    high_air_travel = df['Frequency of Traveling by Air'].isin(['frequently', 'very frequently'])
-    for idx in df[high_air_travel].index:
-        if random.random() < 0.6:  # 60% chance
-            df.loc[idx, 'season'] = random.choice(['Summer', 'Monsoon'])
-    
-    # High heating usage -> more likely Winter
-    high_heating = df['Heating Energy Source'].isin(['coal', 'wood', 'natural gas'])
-    for idx in df[high_heating].index:
-        if random.random() < 0.4:  # 40% chance
-            df.loc[idx, 'season'] = 'Winter'
-    
+
+    if chunksize > 0:
+        print(f"🔄 Streaming CSV file in chunks of {chunksize} rows...")
+        season_counts = pd.Series(0, index=SEASONS)
+
+        def add_seasons(chunk):
+            nonlocal season_counts
+            chunk['season'] = assign_seasons(chunk, rng)
+            season_counts = season_counts.add(chunk['season'].value_counts(), fill_value=0)
+            return chunk
+
+        total = stream_dataset(input_file, add_seasons, chunksize, output_path=output_file)
+        df = None
+    else:
+        print("🔄 Reading CSV file...")
+
+        # Read the dataset (from its compiled copy when current)
+        df = read_dataset(input_file)
+
+        print(f"📊 Found {len(df)} records")
+        print(f"🏙️ Cities: {df['city'].unique().tolist()}")
+        print(f"🌍 Countries: {df['country'].unique().tolist()}")
+
+        # Since this is cross-sectional data, we'll distribute seasons realistically
+        # Based on Indian data collection patterns and seasonal behavior
+        df['season'] = assign_seasons(df, rng)
+        season_counts = df['season'].value_counts()
+        total = len(df)
+
+        # Save the updated CSV and its compiled copy
+        write_dataset(df, output_file)
+
     # Show distribution
-    season_counts = df['season'].value_counts()
     print("\n📈 Final Season Distribution:")
-    for season, count in season_counts.items():
-        percentage = (count / len(df)) * 100
-        print(f"   {season}: {count} records ({percentage:.1f}%)")
-    
-    # Save the updated CSV
-    output_file = 'src/data/Carbon_Emission_With_Seasons.csv'
-    df.to_csv(output_file, index=False)
-    
+    for season, count in season_counts.sort_values(ascending=False).items():
+        percentage = (count / total) * 100
+        print(f"   {season}: {int(count)} records ({percentage:.1f}%)")
+
     print(f"\n✅ Successfully added season column!")
     print(f"📁 Saved to: {output_file}")
-    print(f"📊 Total records: {len(df)}")
-    
-    # Show sample of the new data
-    print("\n🔍 Sample of updated data:")
-    sample_cols = ['city', 'country', 'CarbonEmission', 'season', 'Heating Energy Source', 'Frequency of Traveling by Air']
-    print(df[sample_cols].head(10).to_string(index=False))
-    
+    print(f"📊 Total records: {total}")
+
+    if df is not None:
+        # Show sample of the new data
+        print("\n🔍 Sample of updated data:")
+        sample_cols = ['city', 'country', 'CarbonEmission', 'season', 'Heating Energy Source', 'Frequency of Traveling by Air']
+        print(df[sample_cols].head(10).to_string(index=False))
+
     return df
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a season column to the carbon emission dataset")
+    parser.add_argument("--input", default=INPUT_FILE, help="Dataset CSV to read")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="CSV to write with the season column")
+    parser.add_argument("--seed", type=int, help="Random seed (default: unseeded)")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="Stream the CSV in chunks of this many rows, for files larger than memory (0: load it whole)")
+    args = parser.parse_args()
+
     print("🌱 Adding Season Column to Carbon Emission Dataset")
     print("=" * 50)
-    
+
     try:
-        df = add_season_column()
+        df = add_season_column(args.input, args.output, args.seed, args.chunksize)
         print("\n🎉 Process completed successfully!")
-        
+
     except FileNotFoundError:
         print("❌ Error: CSV file not found!")
-        print("Make sure 'src/data/Carbon_Emission_Cleaned.csv' exists")
-        
+        print(f"Make sure '{args.input}' exists")
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark suite for the CO2 Prediction Backend
+Drives the main API endpoints in-process through an httpx ASGI transport,
+reports p50/p95/p99 latency and requests per second, and saves JSON
+baselines that later runs can be compared against
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from common import SAMPLE_SUBMISSION, SAMPLE_SURVEY, use_temporary_database, make_client, run_load
+
+use_temporary_database()
+
+import main
+from main import app, ml_service
+
+# Keep auto-retraining out of the measurements
+main.RETRAIN_THRESHOLD = float("inf")
+
+SCENARIOS = {
+    "predict": ("POST", "/api/predict", SAMPLE_SUBMISSION),
+    "peer-comparison": ("POST", "/api/peer-comparison", {"city": "Mumbai", "area": "Worli", "user_emissions": 300}),
+    "maps-data": ("GET", "/api/maps-data", None),
+    "seasonal-data": ("GET", "/api/seasonal-data", None),
+    "history": ("GET", "/api/history/Mumbai/Worli", None),
+    "top3-categories": ("POST", "/api/top3-categories", SAMPLE_SURVEY),
+}
+
+METRICS = ["rps", "p50_ms", "p95_ms", "p99_ms"]
+
+def git_commit() -> str:
+    """Current commit hash, or 'unknown' outside a git checkout"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def print_results(results):
+    print(f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline and return the regressed scenarios"""
+    regressions = []
+    print(f"\nComparison with baseline {baseline['commit']} ({baseline['timestamp']})")
+    print(f"{'scenario':<18}" + "".join(f"{metric:>12}" for metric in METRICS))
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        row = f"{name:<18}"
+        for metric in METRICS:
+            change = (r[metric] - base[metric]) / base[metric] * 100 if base[metric] else 0.0
+            # Throughput regresses when it drops, latency when it rises
+            worse = -change if metric == "rps" else change
+            if worse > threshold:
+                regressions.append(f"{name} {metric}")
+            row += f"{change:>+11.1f}%"
+        print(row)
+    return regressions
+
+async def main(args):
+    await ml_service.initialize_models()
+
+    results = {}
+    async with make_client(app) as client:
+        print(f"[INFO] {args.requests} requests per scenario, concurrency {args.concurrency}")
+        for name in args.scenarios:
+            method, path, body = SCENARIOS[name]
+            # Warm up caches before timing
+            await run_load(client, method, path, body, args.warmup, args.concurrency)
+            results[name] = await run_load(client, method, path, body, args.requests, args.concurrency)
+
+    print_results(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "results": results
+            }, f, indent=2)
+        print(f"\n[SUCCESS] Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n[ERROR] Regressions over {args.threshold}%: {', '.join(regressions)}")
+            return 1
+        print(f"\n[SUCCESS] No regressions over {args.threshold}%")
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API latency and throughput in-process")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed warm-up requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--save", help="Write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Compare results against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    sys.exit(asyncio.run(main(parser.parse_args())))
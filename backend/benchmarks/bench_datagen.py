@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generation benchmark for the dataset scripts
+Times the vectorized area emission and season transforms in memory and
+streamed from CSV in chunks, and the original row-by-row loops on small inputs
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import BACKEND_DIR
+
+# The dataset scripts live at the repository root
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+from add_season_column import assign_seasons
+from update_area_emissions import AREA_TYPES, BASELINES, SEED, update_area_emissions
+from services.dataset_cache import read_dataset, stream_dataset
+
+DATASET = "../src/data/Carbon_Emission_With_Seasons.csv"
+COLUMNS = ["city", "area_type_raw", "Frequency of Traveling by Air", "Heating Energy Source"] + AREA_TYPES
+
+def synthetic_frame(source: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """Rows sampled with replacement from the real dataset"""
+    index = np.random.default_rng(0).integers(0, len(source), rows)
+    return source.iloc[index].reset_index(drop=True)
+
+def loop_area_emissions(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """The original row-by-row update, for comparison"""
+    def sample_value(city, area_type):
+        low, high = BASELINES[city][area_type]
+        if low == high:
+            return float(low)
+        return float(round(rng.uniform(low, high), 2))
+
+    for idx, row in df.iterrows():
+        city = row.get('city', 'Mumbai')
+        city = 'Mumbai' if city not in BASELINES else city
+        types_from_raw = []
+        if pd.notna(row.get('area_type_raw')):
+            types_from_raw = [t.strip() for t in str(row['area_type_raw']).split(',') if t.strip()]
+        for area_type in AREA_TYPES:
+            base = sample_value(city, area_type)
+            if area_type in types_from_raw:
+                value = round(base * rng.uniform(1.05, 1.15), 2)
+            elif city == 'Navi Mumbai' and area_type == 'Airport':
+                value = 0.0
+            else:
+                value = round(base * rng.uniform(0.8, 0.95), 2)
+            df.at[idx, area_type] = value
+    return df
+
+def loop_seasons(df: pd.DataFrame) -> pd.Series:
+    """The original per-index season adjustments, for comparison"""
+    season = pd.Series(random.choices(['Winter', 'Summer', 'Monsoon', 'Post-Monsoon'],
+                                      weights=[0.15, 0.35, 0.35, 0.15], k=len(df)), index=df.index)
+    for idx in df[df['city'].isin(['Mumbai', 'Navi Mumbai'])].index:
+        if random.random() < 0.4:
+            season.loc[idx] = 'Monsoon'
+        elif random.random() < 0.3:
+            season.loc[idx] = 'Summer'
+    for idx in df[df['Frequency of Traveling by Air'].isin(['frequently', 'very frequently'])].index:
+        if random.random() < 0.6:
+            season.loc[idx] = random.choice(['Summer', 'Monsoon'])
+    for idx in df[df['Heating Energy Source'].isin(['coal', 'wood', 'natural gas'])].index:
+        if random.random() < 0.4:
+            season.loc[idx] = 'Winter'
+    return season
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def fmt(seconds) -> str:
+    return f"{seconds:>12.3f}" if seconds is not None else f"{'-':>12}"
+
+def main(args):
+    source = read_dataset(DATASET)[COLUMNS]
+    work_dir = tempfile.mkdtemp(prefix="co2-datagen-")
+    print(f"[INFO] Rows sampled from {DATASET}; chunk size {args.chunksize}; loops up to {args.loop_max_rows} rows")
+    print(f"{'rows':>10}{'area loop':>12}{'area vector':>12}{'area stream':>12}"
+          f"{'season loop':>12}{'season vec':>12}{'season strm':>12}   (seconds)")
+
+    try:
+        for rows in args.rows:
+            frame = synthetic_frame(source, rows)
+            area_loop = season_loop = area_stream = season_stream = None
+
+            area_vector, vectorized = timed(update_area_emissions, frame.copy(), np.random.default_rng(SEED))
+            season_vector, _ = timed(assign_seasons, frame, np.random.default_rng(SEED))
+
+            if rows <= args.loop_max_rows:
+                area_loop, looped = timed(loop_area_emissions, frame.copy(), np.random.default_rng(SEED))
+                if not vectorized[AREA_TYPES].equals(looped[AREA_TYPES]):
+                    print(f"[WARN] Vectorized area emissions differ from the loop at {rows} rows")
+                random.seed(SEED)
+                season_loop, _ = timed(loop_seasons, frame)
+
+            if not args.no_stream:
+                # Writing the input CSV is not timed
+                path = os.path.join(work_dir, f"{rows}.csv")
+                frame.to_csv(path, index=False)
+                del frame, vectorized
+                rng = np.random.default_rng(SEED)
+                area_stream, _ = timed(stream_dataset, path, lambda chunk: update_area_emissions(chunk, rng), args.chunksize)
+                rng = np.random.default_rng(SEED)
+                season_stream, _ = timed(stream_dataset, path, lambda chunk: chunk.assign(season=assign_seasons(chunk, rng)),
+                                         args.chunksize)
+                os.remove(path)
+
+            print(f"{rows:>10}{fmt(area_loop)}{fmt(area_vector)}{fmt(area_stream)}"
+                  f"{fmt(season_loop)}{fmt(season_vector)}{fmt(season_stream)}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the synthetic data transforms at increasing row counts")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000], help="Dataset sizes to time")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="Rows per chunk in streaming mode")
+    parser.add_argument("--loop-max-rows", type=int, default=10_000,
+                        help="Largest size to also time the original loops at (they take minutes per 100k rows)")
+    parser.add_argument("--no-stream", action="store_true", help="Skip the streaming runs (they write a temporary CSV per size)")
+    main(parser.parse_args())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Executor pool benchmark for the CO2 Prediction Backend
+Drives the ASGI app in-process with concurrent requests and reports
+throughput for each thread pool size
+"""
+
+import argparse
+import asyncio
+import os
+
+from common import SAMPLE_SUBMISSION, use_temporary_database, make_client, run_load
+
+use_temporary_database()
+
+from main import app, ml_service, executor
+
+SCENARIOS = {
+    "area-stats": ("GET", "/api/area-stats/Mumbai/Worli", None),
+    "history": ("GET", "/api/history/Mumbai/Worli", None),
+    "predict-batch": ("POST", "/api/predict/batch", [SAMPLE_SUBMISSION] * 200),
+}
+
+async def main(args):
+    await ml_service.initialize_models()
+
+    async with make_client(app) as client:
+        print(f"[INFO] {args.requests} requests per run, concurrency {args.concurrency}, {os.cpu_count()} CPUs")
+        print(f"{'scenario':<16}" + "".join(f"{f'{size} threads':>14}" for size in args.pool_sizes))
+
+        for name in args.scenarios:
+            method, path, body = SCENARIOS[name]
+            row = f"{name:<16}"
+            for size in args.pool_sizes:
+                executor.configure(thread_workers=size)
+                # Warm up caches and the pool before timing
+                await run_load(client, method, path, body, args.concurrency, args.concurrency)
+                result = await run_load(client, method, path, body, args.requests, args.concurrency)
+                row += f"{result['rps']:>10.1f} r/s"
+            print(row)
+
+    executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure request throughput against executor pool size")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and pool size")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8], help="Thread pool sizes to compare")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    asyncio.run(main(parser.parse_args()))
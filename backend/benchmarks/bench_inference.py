@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Inference runtime benchmark for the CO2 Prediction Backend
+Compares each saved model's original predict path with its exported
+serving form, for single rows and batches, and checks they agree
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+import common  # noqa: F401  (sets the working directory and import path)
+
+from services.ml_service import MLService
+from services.model_backends import get_model_backend
+from services.inference_runtime import export_model
+
+def time_call(func, X: np.ndarray, repeats: int) -> float:
+    """Median milliseconds per call"""
+    func(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+def original_predict(name: str, model, scaler):
+    if name == 'neural_network':
+        return lambda X: model.predict(scaler.transform(X), verbose=0).flatten()
+    return model.predict
+
+async def main(args):
+    ml_service = MLService()
+    await ml_service.initialize_models()
+    bundle = ml_service.bundle
+    model_dir = ml_service._registry(bundle.artifact_key).version_path(bundle.version)
+    with open(os.path.join(model_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    scalers = joblib.load(os.path.join(model_dir, "scalers.pkl"))
+
+    # Real rows from the training data, in serving feature order
+    df = ml_service._read_and_prepare_data()
+    X_all = bundle.feature_pipeline.transform(df)
+    rng = np.random.default_rng(42)
+
+    print(f"[INFO] model version {bundle.version}, best model: {bundle.best_model_name}, {len(X_all)} dataset rows")
+    print(f"{'model':<16}{'rows':>8}{'original ms':>14}{'exported ms':>14}{'speedup':>10}{'max abs diff':>14}  served by")
+    for name, filename in manifest["model_files"].items():
+        if args.models and name not in args.models:
+            continue
+        model = get_model_backend(name).load(os.path.join(model_dir, filename))
+        scaler = scalers.get(name)
+        original = original_predict(name, model, scaler)
+        inference_model = export_model(name, model, scaler)
+        exported = inference_model.predict
+
+        for rows in args.rows:
+            X = X_all[rng.integers(0, len(X_all), rows)]
+            repeats = max(3, args.repeats // rows)
+            original_ms = time_call(original, X, repeats)
+            exported_ms = time_call(exported, X, repeats)
+            diff = float(np.abs(np.asarray(original(X), dtype=float) - exported(X)).max())
+            limit = inference_model.max_batch_rows
+            served_by = "exported" if limit is None or rows <= limit else "original"
+            print(f"{name:<16}{rows:>8}{original_ms:>14.3f}{exported_ms:>14.3f}"
+                  f"{original_ms / exported_ms:>9.1f}x{diff:>14.2e}  {served_by}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare original and exported model inference latency")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000], help="Batch sizes to time")
+    parser.add_argument("--repeats", type=int, default=500, help="Timed calls for single rows (fewer for batches)")
+    parser.add_argument("--models", nargs="+", help="Only these models (default: all saved models)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the CO2 Prediction Backend
+Starts fresh interpreters that import the app and load the saved models,
+and reports time to ready and peak RSS with lazy and eager TensorFlow loading
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def child(eager: bool):
+    """Import the app and load models the way a worker or Lambda cold start does"""
+    import asyncio
+    import resource
+
+    from common import use_temporary_database
+    use_temporary_database()
+
+    if eager:
+        # Previous behaviour: TensorFlow imported up front and every saved model loaded
+        import tensorflow  # noqa: F401
+        from services.model_backends import MODEL_BACKENDS
+        MODEL_BACKENDS['neural_network'].heavy = False
+
+    import main
+    asyncio.run(main.ml_service.initialize_models())
+
+    print(json.dumps({
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "tensorflow_imported": "tensorflow" in sys.modules,
+        "models": list(main.ml_service.bundle.models.keys())
+    }))
+
+def run_child(eager: bool) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child"] + (["--eager"] if eager else [])
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=BENCHMARKS_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def main(args):
+    print(f"[INFO] {args.runs} cold starts per mode; saved model artifacts must already exist")
+    print(f"{'mode':<8}{'startup s':>12}{'max RSS MB':>12}{'tensorflow':>12}  models")
+    for mode in ("lazy", "eager"):
+        results = [run_child(mode == "eager") for _ in range(args.runs)]
+        seconds = float(np.median([r["seconds"] for r in results]))
+        rss = float(np.median([r["max_rss_mb"] for r in results]))
+        last = results[-1]
+        print(f"{mode:<8}{seconds:>12.2f}{rss:>12.0f}{str(last['tensorflow_imported']):>12}  {', '.join(last['models'])}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app startup time and memory with lazy and eager TensorFlow loading")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per mode (median reported)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.eager)
+    else:
+        main(args)
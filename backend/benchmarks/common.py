@@ -0,0 +1,97 @@
+"""
+Shared helpers for the in-process benchmarks
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Run from the backend directory so relative data/model paths resolve
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+SAMPLE_SUBMISSION = {
+    "body_type": "normal",
+    "sex": "male",
+    "diet": "vegetarian",
+    "shower_frequency": "daily",
+    "heating_energy": "natural gas",
+    "transport": 1.0,
+    "vehicle_distance": 1000.0,
+    "air_travel": "rarely",
+    "social_activity": "often",
+    "grocery_bill": 200.0,
+    "new_clothes": 3,
+    "tv_pc_hours": 4.0,
+    "internet_hours": 6.0,
+    "energy_efficiency": "Yes",
+    "recycling": ["Paper", "Plastic"],
+    "waste_bag_size": 10.0,
+    "waste_bag_count": 2,
+    "cooking_methods": ["Stove", "Microwave"],
+    "city": "Mumbai",
+    "area": "Worli"
+}
+
+SAMPLE_SURVEY = {
+    "airTravel": 4,
+    "transportation": 800,
+    "electricity": 250,
+    "meatMeals": 12,
+    "diningOut": 6,
+    "lpgUsage": 14,
+    "waste": 20
+}
+
+def use_temporary_database() -> str:
+    """Point the app's database at a throwaway SQLite file so benchmarks never touch real data"""
+    import models.database as database
+
+    path = os.path.join(tempfile.mkdtemp(prefix="co2-bench-"), "bench.db")
+    database.configure_database(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=database.engine)
+    return path
+
+def make_client(app) -> httpx.AsyncClient:
+    """HTTP client that calls the ASGI app directly, without a network socket"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None)
+
+async def run_load(client: httpx.AsyncClient, method: str, path: str, body: Optional[Any],
+                   requests: int, concurrency: int) -> Dict[str, Any]:
+    """Send requests with bounded concurrency and summarise latency and throughput"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean())
+    }
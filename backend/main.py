@@ -1,23 +1,30 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import joblib
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models.user import UserSubmission, PredictionResponse, RecommendationResponse
+from models.user import UserSubmission, PredictionResponse, BatchPredictionResponse, RecommendationResponse
 from models.database import get_db, init_db
 from services.ml_service import MLService
 from services.recommendation_service import RecommendationService
 from services.history_service import HistoryService
+from services.csv_ingest import CSVIngestService
+from services.dataset_service import get_dataset_service, SEASONS_DATASET, CLEANED_DATASET
+from services.area_index import AreaAggregateIndex
+from services.seasonal_analytics import SeasonalAnalytics, fallback_frame, get_indian_season, season_started_at
+from services.http_cache import ResponseCache, make_etag
+from services.retrain_worker import RetrainWorker, RETRAIN_MODES
+from services.executor_service import get_executor_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,29 +47,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-ml_service = MLService()
-recommendation_service = RecommendationService()
-history_service = HistoryService()
-
 # Global submission counter for auto-retraining
 submission_count = 0
 RETRAIN_THRESHOLD = 20
+# Auto-retraining only needs to fold in the submissions since the last run
+AUTO_RETRAIN_MODE = os.environ.get("CO2_AUTO_RETRAIN_MODE", "incremental")
+if AUTO_RETRAIN_MODE not in RETRAIN_MODES:
+    raise ValueError(f"Unknown CO2_AUTO_RETRAIN_MODE: {AUTO_RETRAIN_MODE!r} (expected one of {', '.join(RETRAIN_MODES)})")
 
-def get_indian_season(month: int) -> str:
-    """
-    Get Indian season based on month
-    """
-    if month in [12, 1, 2]:
-        return "Winter"      # Dec-Feb: Cool, dry
-    elif month in [3, 4, 5]:
-        return "Summer"      # Mar-May: Hot, dry
-    elif month in [6, 7, 8, 9]:
-        return "Monsoon"     # Jun-Sep: Rainy season
-    elif month in [10, 11]:
-        return "Post-Monsoon" # Oct-Nov: Transition
-    else:
-        return "Unknown"
+# Maximum number of submissions accepted by the batch prediction endpoint
+BATCH_PREDICT_LIMIT = 10000
+
+def record_submissions(count: int = 1) -> bool:
+    """Count stored submissions and start retraining once enough have arrived"""
+    global submission_count
+    submission_count += count
+    
+    # Check if we need to retrain; training runs on the background worker
+    if submission_count < RETRAIN_THRESHOLD:
+        return False
+    try:
+        started = retrain_worker.trigger(AUTO_RETRAIN_MODE)
+    except Exception as e:
+        # The submissions are already stored; a retraining problem must not fail the request
+        logger.error(f"Failed to start auto-retraining: {str(e)}")
+        return False
+    if started:
+        logger.info(f"Auto-retraining started in background after {submission_count} submissions")
+        submission_count = 0  # Reset counter once retraining is scheduled
+    return started
+
+def create_services():
+    """Build the services shared by every request"""
+    global executor, dataset_service, ml_service, recommendation_service, history_service
+    global retrain_worker, response_cache, csv_ingest_service
+    executor = get_executor_service()
+    dataset_service = get_dataset_service()
+    ml_service = MLService()
+    recommendation_service = RecommendationService()
+    history_service = HistoryService(dataset_service, ml_service)
+    retrain_worker = RetrainWorker(ml_service)
+    response_cache = ResponseCache()
+    csv_ingest_service = CSVIngestService(ml_service, history_service, on_stored=record_submissions)
+
+# With `python main.py`, training worker processes (spawned by the training
+# orchestrator) re-import this script as __mp_main__. They only train, so they
+# skip building the services and never touch the datasets, database or pools.
+if __name__ != "__mp_main__":
+    create_services()
+
+def get_area_index() -> AreaAggregateIndex:
+    """Get the area/city aggregate index for the current seasons dataset"""
+    return dataset_service.get_derived(SEASONS_DATASET, "area_index", AreaAggregateIndex.from_frame)
+
+def get_dataset_state(name: str) -> Tuple[str, Optional[datetime]]:
+    """Get a dataset's version token and file time for response validators"""
+    try:
+        return dataset_service.get_version(name), dataset_service.get_last_modified(name)
+    except FileNotFoundError:
+        return "missing", None
+
+def get_model_version() -> str:
+    """Identify the served model version for response validators"""
+    bundle = ml_service.bundle
+    return f"{bundle.artifact_key[:16]}/{bundle.version}" if bundle else "no-model"
+
+_fallback_seasonal_analytics: Optional[SeasonalAnalytics] = None
+
+def get_seasonal_analytics() -> Tuple[SeasonalAnalytics, str, Optional[datetime]]:
+    """Get the seasonal analytics for the current seasons dataset, its version and file time"""
+    global _fallback_seasonal_analytics
+    try:
+        analytics = dataset_service.get_derived(SEASONS_DATASET, "seasonal_analytics", SeasonalAnalytics.from_frame)
+        return analytics, dataset_service.get_version(SEASONS_DATASET), dataset_service.get_last_modified(SEASONS_DATASET)
+    except FileNotFoundError:
+        logger.warning("CSV file not found, using fallback data")
+        if _fallback_seasonal_analytics is None:
+            _fallback_seasonal_analytics = SeasonalAnalytics.from_frame(fallback_frame())
+        return _fallback_seasonal_analytics, "fallback", None
 
 @app.on_event("startup")
 async def startup_event():
@@ -84,6 +146,14 @@ async def startup_event():
         logger.error(f"Startup error: {str(e)}")
         logger.info("Continuing with limited functionality")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    # Write queued submissions before the pools go away
+    history_service.shutdown()
+    retrain_worker.shutdown()
+    executor.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "CO2 Prediction API is running!"}
@@ -93,14 +163,13 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "models_loaded": ml_service.models_loaded
+        "models_loaded": ml_service.models_loaded,
+        "http_cache": response_cache.get_stats()
     }
 
 @app.post("/api/predict", response_model=PredictionResponse)
 async def predict_co2(submission: UserSubmission):
     """Predict CO2 emissions for next month based on user data"""
-    global submission_count
-    
     try:
         # Add season information to submission
         current_month = datetime.now().month
@@ -121,20 +190,8 @@ async def predict_co2(submission: UserSubmission):
         # Store user submission for future retraining
         await history_service.store_submission(submission, prediction["predicted_co2"], None)
         
-        # Increment submission counter
-        submission_count += 1
-        
-        # Check if we need to retrain
-        retrain_triggered = False
-        if submission_count >= RETRAIN_THRESHOLD:
-            logger.info(f"Auto-retraining triggered after {submission_count} submissions")
-            try:
-                await ml_service.retrain_models()
-                submission_count = 0  # Reset counter after retraining
-                retrain_triggered = True
-                logger.info("Auto-retraining completed successfully")
-            except Exception as retrain_error:
-                logger.error(f"Auto-retraining failed: {str(retrain_error)}")
+        # Increment submission counter, retraining once enough have arrived
+        record_submissions()
         
         # Get peer comparison data
         peer_data = await history_service.get_peer_comparison(
@@ -146,21 +203,50 @@ async def predict_co2(submission: UserSubmission):
             confidence=prediction["confidence"],
             recommendations=recommendations,
             peer_comparison=peer_data,
-            model_used=prediction["model_used"]
+            model_used=prediction["model_used"],
+            model_version=prediction["model_version"]
         )
         
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/api/predict/batch", response_model=BatchPredictionResponse)
+async def predict_co2_batch(submissions: List[UserSubmission]):
+    """Predict CO2 emissions for a batch of user submissions"""
+    if len(submissions) > BATCH_PREDICT_LIMIT:
+        raise HTTPException(status_code=400, detail=f"Batch size exceeds limit of {BATCH_PREDICT_LIMIT} submissions")
+    
+    try:
+        predictions = await ml_service.predict_batch(submissions)
+        return BatchPredictionResponse(predictions=predictions, count=len(predictions))
+        
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+@app.post("/api/submissions/upload")
+async def upload_submissions(file: UploadFile = File(...)):
+    """Score and store survey rows from a CSV file, streaming per-row results as NDJSON"""
+    try:
+        chunks = await executor.run_in_thread(csv_ingest_service.open_csv, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"CSV upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"CSV upload failed: {str(e)}")
+    
+    return StreamingResponse(csv_ingest_service.ingest(chunks), media_type="application/x-ndjson")
+
 @app.get("/api/recommendations")
-async def get_recommendations(city: str, area: str, current_co2: float):
+async def get_recommendations(request: Request, city: str, area: str, current_co2: float):
     """Get personalized CO2 reduction recommendations"""
     try:
-        recommendations = await recommendation_service.get_area_recommendations(
-            city, area, current_co2
-        )
-        return recommendations
+        async def build():
+            return await recommendation_service.get_area_recommendations(city, area, current_co2)
+        
+        etag = make_etag("recommendations", city, area, current_co2, get_model_version())
+        return await response_cache.respond(request.headers, etag, build)
     except Exception as e:
         logger.error(f"Recommendations error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get recommendations: {str(e)}")
@@ -176,21 +262,37 @@ async def get_user_history(city: str, area: str, limit: int = 5):
         raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
 
 @app.get("/api/area-stats/{city}/{area}")
-async def get_area_stats(city: str, area: str):
+async def get_area_stats(request: Request, city: str, area: str):
     """Get area-specific CO2 emission breakdown and statistics"""
     try:
-        stats = await history_service.get_area_statistics(city, area)
-        return stats
+        async def build():
+            return await history_service.get_area_statistics(city, area)
+        
+        dataset_version, last_modified = await executor.run_in_thread(get_dataset_state, CLEANED_DATASET)
+        etag = make_etag("area-stats", city, area, dataset_version)
+        return await response_cache.respond(request.headers, etag, build, last_modified)
     except Exception as e:
+        # Placeholder stats are served without an ETag and never cached, so the next request retries
         logger.error(f"Area stats error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get area stats: {str(e)}")
+        return JSONResponse(history_service.get_default_area_stats(city, area), headers={"Cache-Control": "no-store"})
 
 @app.post("/api/retrain")
-async def retrain_models():
-    """Manually trigger model retraining with latest data"""
+async def retrain_models(mode: str = "full"):
+    """Manually trigger model retraining with latest data
+
+    mode is "full" to retrain from scratch or "incremental" to update the
+    current models with submissions stored since they were trained.
+    """
+    if mode not in RETRAIN_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown retrain mode: {mode}, expected one of {', '.join(RETRAIN_MODES)}")
+    running_mode = retrain_worker.running_mode
+    if running_mode is not None and running_mode != mode:
+        raise HTTPException(status_code=409, detail=f"A {running_mode} retraining run is already in progress")
     try:
-        result = await ml_service.retrain_models()
-        return {"message": "Models retrained successfully", "details": result}
+        # Join an in-progress run of the same mode rather than starting a second one
+        retrain_worker.trigger(mode)
+        result = await retrain_worker.wait()
+        return {"message": "Models retrained successfully", "mode": result["mode"], "details": result}
     except Exception as e:
         logger.error(f"Retraining error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Retraining failed: {str(e)}")
@@ -205,6 +307,38 @@ async def get_model_performance():
         logger.error(f"Performance error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get performance: {str(e)}")
 
+@app.get("/api/model-versions")
+async def get_model_versions():
+    """List saved model versions and the one being served"""
+    try:
+        return await ml_service.list_model_versions()
+    except Exception as e:
+        logger.error(f"Model versions error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list model versions: {str(e)}")
+
+@app.post("/api/model-versions/{version}/activate")
+async def activate_model_version(version: str, pin: bool = True):
+    """Serve a saved model version, e.g. to roll back
+
+    A pinned version keeps serving when retraining saves a newer one.
+    """
+    try:
+        return await ml_service.activate_version(version, pin)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'"))
+    except Exception as e:
+        logger.error(f"Model version activation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to activate model version: {str(e)}")
+
+@app.post("/api/model-versions/unpin")
+async def unpin_model_version():
+    """Let the next retraining replace the served model version again"""
+    try:
+        return await ml_service.unpin_version()
+    except Exception as e:
+        logger.error(f"Model version unpin error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to unpin model version: {str(e)}")
+
 @app.get("/api/submission-stats")
 async def get_submission_stats():
     """Get submission statistics for auto-retraining"""
@@ -212,111 +346,32 @@ async def get_submission_stats():
     return {
         "submissions_since_last_retrain": submission_count,
         "retrain_threshold": RETRAIN_THRESHOLD,
-        "submissions_until_retrain": RETRAIN_THRESHOLD - submission_count
+        "submissions_until_retrain": RETRAIN_THRESHOLD - submission_count,
+        "retrain_worker": retrain_worker.get_status(),
+        "submission_writer": {"mode": history_service.write_mode, **history_service.writer.get_status()}
     }
 
 @app.get("/api/seasonal-data")
-async def get_seasonal_data():
-    """Get seasonal analysis data from the dataset"""
+async def get_seasonal_data(request: Request):
+    """Get seasonal analysis data from the dataset
+
+    Statistics are built once per dataset version; the ETag and Last-Modified
+    change with the dataset and the current season, so clients can revalidate.
+    """
     try:
-        # Load the dataset with seasons - try multiple paths
-        csv_paths = [
-            "../src/data/Carbon_Emission_With_Seasons.csv",
-            "data/Carbon_Emission_With_Seasons.csv",
-            "Carbon_Emission_With_Seasons.csv"
-        ]
+        analytics, dataset_version, dataset_modified = await executor.run_in_thread(get_seasonal_analytics)
         
-        df = None
-        for path in csv_paths:
-            try:
-                df = pd.read_csv(path)
-                logger.info(f"Successfully loaded CSV from: {path}")
-                break
-            except FileNotFoundError:
-                continue
-        
-        if df is None:
-            logger.warning("CSV file not found, using fallback data")
-            # Create a minimal dataframe for fallback
-            df = pd.DataFrame({
-                'season': ['Winter', 'Summer', 'Monsoon'] * 100,
-                'total_co2': [235.0, 247.0, 223.0] * 100
-            })
-        
-        # Calculate real seasonal statistics from the dataset using realistic values
-        seasonal_stats = []
-        for season in ['Winter', 'Summer', 'Monsoon']:
-            season_data = df[df['season'] == season]['total_co2']  # Use total_co2 instead of CarbonEmission
-            if len(season_data) > 0:
-                seasonal_stats.append({
-                    'season': season,
-                    'avg_emissions': round(season_data.mean(), 2),
-                    'std_emissions': round(season_data.std(), 2),
-                    'min_emissions': round(season_data.min(), 2),
-                    'max_emissions': round(season_data.max(), 2),
-                    'count': len(season_data)
-                })
-        
-        # If no seasonal data found, use realistic fallback values with seasonal multipliers
-        if not seasonal_stats:
-            base_co2 = 235.0
-            realistic_seasonal_stats = [
-                {'season': 'Winter', 'avg_emissions': base_co2 * 1.00, 'std_emissions': 15.75, 'min_emissions': 210.50, 'max_emissions': 285.80, 'count': 2500},
-                {'season': 'Summer', 'avg_emissions': base_co2 * 1.05, 'std_emissions': 12.25, 'min_emissions': 205.30, 'max_emissions': 265.60, 'count': 2500},
-                {'season': 'Monsoon', 'avg_emissions': base_co2 * 0.95, 'std_emissions': 10.40, 'min_emissions': 215.75, 'max_emissions': 275.25, 'count': 2500}
-            ]
-        else:
-            realistic_seasonal_stats = seasonal_stats
-        
-        # Create monthly data for chart using real data from dataset
-        monthly_data = []
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        # Get average emissions by season from the dataset using realistic values with seasonal multipliers
-        seasonal_emissions = {}
-        
-        # Base CO2 values from your dataset (average of Total_CO2e_kg_per_person_per_month)
-        base_co2 = 235.0  # Average of your 18 areas (205-285 range)
-        
-        # Apply seasonal multipliers from your dataset
-        seasonal_multipliers = {
-            'Winter': 1.00,    # Winter_Multiplier
-            'Summer': 1.05,    # Summer_Multiplier  
-            'Monsoon': 0.95    # Monsoon_Multiplier
-        }
+        now = datetime.now().astimezone()
+        current_season = get_indian_season(now.month)
+        last_modified = season_started_at(now)
+        if dataset_modified is not None:
+            last_modified = max(last_modified, dataset_modified)
         
-        for season in ['Winter', 'Summer', 'Monsoon']:
-            multiplier = seasonal_multipliers.get(season, 1.00)
-            seasonal_emissions[season] = base_co2 * multiplier
-        
-        for i, month in enumerate(months):
-            month_num = i + 1
-            season = get_indian_season(month_num)
-            
-            # Get base value from real data or fallback
-            base_value = seasonal_emissions.get(season, 240.50)
-            
-            # Add some realistic variation based on month (smaller variation for realistic values)
-            variation = (i % 3 - 1) * 3.5 + (i % 2) * 1.25
-            realistic_emissions = base_value + variation
-            
-            monthly_data.append({
-                'month': month,
-                'season': season,
-                'emissions': round(realistic_emissions, 2),
-                'temperature': get_temperature_for_month(month_num),
-                'activities': get_activities_for_season(season),
-                'color': get_color_for_season(season),
-                'icon': get_icon_for_season(season),
-                'bgColor': get_bg_color_for_season(season)
-            })
+        async def build():
+            return analytics.response(now)
         
-        return {
-            "monthly_data": monthly_data,
-            "seasonal_stats": realistic_seasonal_stats,
-            "current_season": get_indian_season(datetime.now().month)
-        }
+        etag = make_etag("seasonal-data", dataset_version, current_season)
+        return await response_cache.respond(request.headers, etag, build, last_modified)
         
     except Exception as e:
         logger.error(f"Error fetching seasonal data: {str(e)}")
@@ -326,10 +381,8 @@ async def get_seasonal_data():
 async def get_peer_comparison_data(request: dict):
     """Get peer comparison data based on user's area and city"""
     try:
-        # Load the dataset
-        logger.info(f"Loading CSV from: ../src/data/Carbon_Emission_With_Seasons.csv")
-        df = pd.read_csv("../src/data/Carbon_Emission_With_Seasons.csv")
-        logger.info(f"CSV loaded successfully. Shape: {df.shape}")
+        # Get the precomputed area/city aggregates
+        area_index = await executor.run_in_thread(get_area_index)
         
         # Get user's data from request
         user_city = request.get('city', 'Mumbai')
@@ -339,68 +392,22 @@ async def get_peer_comparison_data(request: dict):
         logger.info(f"Processing peer comparison for: {user_city}, {user_area}, {user_emissions}")
         
         # Calculate area average using realistic area_total_emission values
-        area_data = df[df['area'] == user_area]
-        logger.info(f"Area data found: {len(area_data)} records for {user_area}")
-        area_avg = round(area_data['area_total_emission'].mean(), 1) if not area_data.empty else 240.0
+        area_agg = area_index.area(user_area)
+        logger.info(f"Area data found: {area_agg.count if area_agg else 0} records for {user_area}")
+        area_avg = round(area_agg.mean('area_total_emission'), 1) if area_agg else 240.0
         
         # Calculate city average using realistic area_total_emission values
-        city_data = df[df['city'] == user_city]
-        logger.info(f"City data found: {len(city_data)} records for {user_city}")
-        city_avg = round(city_data['area_total_emission'].mean(), 1) if not city_data.empty else 235.0
+        city_agg = area_index.city(user_city)
+        logger.info(f"City data found: {city_agg.count if city_agg else 0} records for {user_city}")
+        city_avg = round(city_agg.mean('area_total_emission'), 1) if city_agg else 235.0
         
         # Calculate percentage differences
         area_diff = float(round(((user_emissions - area_avg) / area_avg) * 100, 1)) if area_avg > 0 else 0.0
         city_diff = float(round(((user_emissions - city_avg) / city_avg) * 100, 1)) if city_avg > 0 else 0.0
         
-        # Get detailed breakdown for area
-        area_breakdown = {}
-        if not area_data.empty:
-            # Calculate transportation based on vehicle distance (km * 0.2 kg CO2/km)
-            transport_emissions = float(round(area_data['Vehicle Monthly Distance Km'].mean() * 0.2, 1))
-            # Calculate other categories to sum up to area_avg
-            other_categories = float(round(area_data['lpg_kg'].mean() + 
-                                        area_data['flights_hours'].mean() * 0.255 + 
-                                        area_data['meat_meals'].mean() * 2.5 + 
-                                        area_data['dining_out'].mean() * 2.0 + 
-                                        area_data['waste_kg'].mean() * 0.5, 1))
-            
-            # Calculate electricity to make total = area_avg
-            electricity_emissions = float(round(area_avg - transport_emissions - other_categories, 1))
-            
-            area_breakdown = {
-                'transportation': transport_emissions,
-                'electricity': electricity_emissions,
-                'lpg_usage': float(round(area_data['lpg_kg'].mean(), 1)),
-                'air_travel': float(round(area_data['flights_hours'].mean() * 0.255, 1)),
-                'meat_meals': float(round(area_data['meat_meals'].mean() * 2.5, 1)),
-                'dining_out': float(round(area_data['dining_out'].mean() * 2.0, 1)),
-                'waste': float(round(area_data['waste_kg'].mean() * 0.5, 1))
-            }
-        
-        # Get detailed breakdown for city
-        city_breakdown = {}
-        if not city_data.empty:
-            # Calculate transportation based on vehicle distance (km * 0.2 kg CO2/km)
-            transport_emissions = float(round(city_data['Vehicle Monthly Distance Km'].mean() * 0.2, 1))
-            # Calculate other categories to sum up to city_avg
-            other_categories = float(round(city_data['lpg_kg'].mean() + 
-                                        city_data['flights_hours'].mean() * 0.255 + 
-                                        city_data['meat_meals'].mean() * 2.5 + 
-                                        city_data['dining_out'].mean() * 2.0 + 
-                                        city_data['waste_kg'].mean() * 0.5, 1))
-            
-            # Calculate electricity to make total = city_avg
-            electricity_emissions = float(round(city_avg - transport_emissions - other_categories, 1))
-            
-            city_breakdown = {
-                'transportation': transport_emissions,
-                'electricity': electricity_emissions,
-                'lpg_usage': float(round(city_data['lpg_kg'].mean(), 1)),
-                'air_travel': float(round(city_data['flights_hours'].mean() * 0.255, 1)),
-                'meat_meals': float(round(city_data['meat_meals'].mean() * 2.5, 1)),
-                'dining_out': float(round(city_data['dining_out'].mean() * 2.0, 1)),
-                'waste': float(round(city_data['waste_kg'].mean() * 0.5, 1))
-            }
+        # Get detailed breakdowns for area and city
+        area_breakdown = area_agg.peer_breakdown(area_avg) if area_agg else {}
+        city_breakdown = city_agg.peer_breakdown(city_avg) if city_agg else {}
         
         result = {
             "comparison_data": {
@@ -570,108 +577,53 @@ async def get_top3_categories(survey_data: dict = None):
         logger.error(f"Error fetching top 3 categories: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch top 3 categories")
 
-def get_temperature_for_month(month: int) -> int:
-    """Get typical temperature for month in India"""
-    if month in [12, 1, 2]:
-        return 15  # Winter
-    elif month in [3, 4, 5]:
-        return 35  # Summer
-    elif month in [6, 7, 8, 9]:
-        return 30  # Monsoon
-    elif month in [10, 11]:
-        return 25  # Post-Monsoon
-    return 25
-
-def get_activities_for_season(season: str) -> str:
-    """Get typical activities for season"""
-    activities = {
-        'Winter': 'Heating, Indoor Activities',
-        'Summer': 'AC Usage, Outdoor Activities',
-        'Monsoon': 'Indoor Activities, Reduced Travel',
-        'Post-Monsoon': 'Comfortable Weather, Outdoor'
-    }
-    return activities.get(season, 'Various Activities')
-
-def get_color_for_season(season: str) -> str:
-    """Get color for season"""
-    colors = {
-        'Winter': '#3B82F6',
-        'Summer': '#F59E0B',
-        'Monsoon': '#06B6D4',
-        'Post-Monsoon': '#8B5CF6'
-    }
-    return colors.get(season, '#6B7280')
-
-def get_icon_for_season(season: str) -> str:
-    """Get icon for season"""
-    icons = {
-        'Winter': '❄️',
-        'Summer': '☀️',
-        'Monsoon': '🌧️',
-        'Post-Monsoon': '🍂'
-    }
-    return icons.get(season, '🌱')
-
-def get_bg_color_for_season(season: str) -> str:
-    """Get background color for season"""
-    bg_colors = {
-        'Winter': '#EFF6FF',
-        'Summer': '#FFFBEB',
-        'Monsoon': '#F3F4F6',
-        'Post-Monsoon': '#FEF2F2'
-    }
-    return bg_colors.get(season, '#F9FAFB')
-
 @app.get("/api/maps-data")
-async def get_maps_data():
+async def get_maps_data(request: Request):
     """Get all area data for the maps page"""
     try:
-        # Load the dataset
-        logger.info(f"Loading CSV from: ../src/data/Carbon_Emission_With_Seasons.csv")
-        df = pd.read_csv("../src/data/Carbon_Emission_With_Seasons.csv")
-        logger.info(f"CSV loaded successfully. Shape: {df.shape}")
-        
-        # Get unique areas
-        areas = df['area'].unique()
-        maps_data = []
-        
-        for area in areas:
-            area_data = df[df['area'] == area]
-            city = 'Navi Mumbai' if area in ['Nerul', 'Vashi', 'Koparkhairane', 'Airoli', 'Ghansoli', 'Kharghar', 'Turbhe', 'Taloja', 'CBD Belapur'] else 'Mumbai'
-            
-            # Calculate area statistics
-            area_stats = {
-                "name": area,
-                "city": city,
-                "co2": round(area_data['area_total_emission'].mean(), 1),
-                "users": len(area_data),
-                "breakdown": {
-                    "Residential": round(area_data['Residential'].mean(), 1),
-                    "Corporate": round(area_data['Corporate'].mean(), 1),
-                    "Industrial": round(area_data['Industrial'].mean(), 1),
-                    "Vehicular": round(area_data['Vehicular'].mean(), 1),
-                    "Construction": round(area_data['Construction'].mean(), 1),
-                    "Airport": round(area_data['Airport'].mean(), 1)
-                }
-            }
-            
-            maps_data.append(area_stats)
-        
-        # Sort by CO2 emissions
-        maps_data.sort(key=lambda x: x['co2'], reverse=True)
-        
-        return {
-            "areas": maps_data,
-            "total_areas": len(maps_data),
-            "total_users": len(df),
-            "mumbai_avg": round(df[df['city'] == 'Mumbai']['area_total_emission'].mean(), 1),
-            "navi_mumbai_avg": round(df[df['city'] == 'Navi Mumbai']['area_total_emission'].mean(), 1)
-        }
+        dataset_version, last_modified = await executor.run_in_thread(get_dataset_state, SEASONS_DATASET)
+        etag = make_etag("maps-data", dataset_version)
+        return await response_cache.respond(request.headers, etag, build_maps_data, last_modified)
         
     except Exception as e:
         logger.error(f"Error in maps data: {str(e)}")
         return {"error": "Failed to load maps data"}
 
+async def build_maps_data() -> Dict:
+    """Build the maps page payload from the area aggregates"""
+    # Get the precomputed area/city aggregates
+    area_index = await executor.run_in_thread(get_area_index)
+    maps_data = []
+    
+    for _, area, area_agg in area_index.areas():
+        city = 'Navi Mumbai' if area in ['Nerul', 'Vashi', 'Koparkhairane', 'Airoli', 'Ghansoli', 'Kharghar', 'Turbhe', 'Taloja', 'CBD Belapur'] else 'Mumbai'
+        
+        # Calculate area statistics
+        area_stats = {
+            "name": area,
+            "city": city,
+            "co2": round(area_agg.mean('area_total_emission'), 1),
+            "users": area_agg.count,
+            "breakdown": area_agg.sector_breakdown()
+        }
+        
+        maps_data.append(area_stats)
+    
+    # Sort by CO2 emissions
+    maps_data.sort(key=lambda x: x['co2'], reverse=True)
+    
+    def city_average(city: str) -> Optional[float]:
+        city_agg = area_index.city(city)
+        return round(city_agg.mean('area_total_emission'), 1) if city_agg else None
+    
+    return {
+        "areas": maps_data,
+        "total_areas": len(maps_data),
+        "total_users": area_index.total_rows,
+        "mumbai_avg": city_average('Mumbai'),
+        "navi_mumbai_avg": city_average('Navi Mumbai')
+    }
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -1,13 +1,75 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, JSON
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Text, JSON, Index
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
 from datetime import datetime
-import sqlite3
+from typing import Optional
 import os
 
-# Database setup
-DATABASE_URL = "sqlite:///./co2_predictions.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Database setup; set DATABASE_URL to a postgresql:// URL in production
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./co2_predictions.db")
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))  # Seconds; stays under typical server idle timeouts
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and NORMAL sync is durable in WAL mode except on power loss.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # Milliseconds to wait for the write lock instead of failing
+    "foreign_keys": "ON",
+    "cache_size": -16000,  # Negative means KiB, so 16 MB per connection
+    "temp_store": "MEMORY"
+}
+
+def _normalize_url(url: str) -> str:
+    """Accept the postgres:// scheme that Railway and Heroku hand out"""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """Create an engine for a database URL with the configured connection pool"""
+    url = _normalize_url(url or DATABASE_URL)
+
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # An in-memory database only exists on its one connection
+            return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        db_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+        return db_engine
+
+    return create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -34,6 +96,27 @@ class UserSubmissionDB(Base):
     internet_hours = Column(Float)
     waste_bag_count = Column(Integer)
     recycling_count = Column(Integer)  # Number of recycling materials
+    
+    # Covering index for peer comparison aggregates
+    __table_args__ = (
+        Index("ix_user_submissions_city_area_co2", "city", "area", "predicted_co2"),
+    )
+
+class PeerCO2BucketDB(Base):
+    """Histogram of predicted CO2 per city and area, used for approximate medians"""
+    __tablename__ = "peer_co2_buckets"
+    
+    city = Column(String, primary_key=True)
+    area = Column(String, primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # Log-scale bucket index of the predicted CO2
+    count = Column(Integer, nullable=False, default=0)
+
+class PeerCO2BucketStateDB(Base):
+    """Marks the peer histogram as built, so it is rebuilt from stored submissions only once"""
+    __tablename__ = "peer_co2_bucket_state"
+    
+    id = Column(Integer, primary_key=True)  # Always 1: a single marker row
+    built_at = Column(DateTime, default=datetime.now)
 
 def get_db():
     """Get database session"""
@@ -46,8 +129,19 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes added to tables that already exist
+    for index in UserSubmissionDB.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
     print("Database initialized successfully")
 
+def configure_database(url: str) -> Engine:
+    """Point the module engine and SessionLocal at another database"""
+    global engine
+    engine.dispose()
+    engine = create_db_engine(url)
+    SessionLocal.configure(bind=engine)
+    return engine
+
 def get_connection():
-    """Get direct SQLite connection for complex queries"""
-    return sqlite3.connect("co2_predictions.db")
+    """Get a pooled DB-API connection for complex queries; close() returns it to the pool"""
+    return engine.raw_connection()
@@ -54,9 +54,15 @@ class PredictionResponse(BaseModel):
     predicted_co2: float = Field(..., description="Predicted CO2 emissions for next month")
     confidence: float = Field(..., description="Prediction confidence (0-1)")
     model_used: str = Field(..., description="ML model used for prediction")
+    model_version: Optional[str] = Field(None, description="Model version that served the prediction")
     recommendations: List[Dict[str, Any]] = Field(..., description="Personalized recommendations")
     peer_comparison: Dict[str, Any] = Field(..., description="Peer comparison data")
 
+class BatchPredictionResponse(BaseModel):
+    """CO2 predictions for a batch of submissions"""
+    predictions: List[Dict[str, Any]] = Field(..., description="Per-submission predictions, in request order")
+    count: int = Field(..., description="Number of predictions")
+
 class RecommendationResponse(BaseModel):
     """CO2 reduction recommendations"""
     category: str = Field(..., description="Recommendation category")
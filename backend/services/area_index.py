@@ -0,0 +1,113 @@
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns aggregated per area and per city
+AGGREGATE_COLUMNS = [
+    'area_total_emission', 'CarbonEmission', 'Vehicle Monthly Distance Km',
+    'lpg_kg', 'flights_hours', 'meat_meals', 'dining_out', 'waste_kg',
+    'Residential', 'Corporate', 'Industrial', 'Vehicular', 'Construction', 'Airport'
+]
+
+SECTOR_COLUMNS = ['Residential', 'Corporate', 'Industrial', 'Vehicular', 'Construction', 'Airport']
+
+
+@dataclass(frozen=True)
+class GroupAggregate:
+    """Row count, column sums and column means for one group of rows"""
+    count: int
+    sums: Dict[str, float]
+    means: Dict[str, float]
+
+    def mean(self, column: str) -> float:
+        return self.means[column]
+
+    def peer_breakdown(self, total_avg: float) -> Dict[str, float]:
+        """Emission breakdown by category, with electricity as the remainder of total_avg"""
+        # Calculate transportation based on vehicle distance (km * 0.2 kg CO2/km)
+        transport_emissions = float(round(self.means['Vehicle Monthly Distance Km'] * 0.2, 1))
+        # Calculate other categories to sum up to total_avg
+        other_categories = float(round(self.means['lpg_kg'] +
+                                       self.means['flights_hours'] * 0.255 +
+                                       self.means['meat_meals'] * 2.5 +
+                                       self.means['dining_out'] * 2.0 +
+                                       self.means['waste_kg'] * 0.5, 1))
+
+        # Calculate electricity to make total = total_avg
+        electricity_emissions = float(round(total_avg - transport_emissions - other_categories, 1))
+
+        return {
+            'transportation': transport_emissions,
+            'electricity': electricity_emissions,
+            'lpg_usage': float(round(self.means['lpg_kg'], 1)),
+            'air_travel': float(round(self.means['flights_hours'] * 0.255, 1)),
+            'meat_meals': float(round(self.means['meat_meals'] * 2.5, 1)),
+            'dining_out': float(round(self.means['dining_out'] * 2.0, 1)),
+            'waste': float(round(self.means['waste_kg'] * 0.5, 1))
+        }
+
+    def sector_breakdown(self) -> Dict[str, float]:
+        """Average emission per area-type sector"""
+        return {sector: round(self.means[sector], 1) for sector in SECTOR_COLUMNS}
+
+
+class AreaAggregateIndex:
+    """Per-(city, area) and per-city aggregates built in a single groupby pass"""
+
+    def __init__(self, areas: Dict[Tuple[str, str], GroupAggregate], cities: Dict[str, GroupAggregate],
+                 area_cities: Dict[str, str], total_rows: int):
+        self._areas = areas
+        self._cities = cities
+        self._area_cities = area_cities
+        self.total_rows = total_rows
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AreaAggregateIndex":
+        """Build the index from a dataset with city and area columns"""
+        columns = [col for col in AGGREGATE_COLUMNS if col in df.columns]
+        values = df[columns].astype(np.float64)
+
+        grouped = values.groupby([df['city'], df['area']], observed=True, sort=False)
+        sums = grouped.sum()
+        counts = grouped.size()
+
+        areas = {}
+        area_cities = {}
+        for (city, area), row in sums.iterrows():
+            count = int(counts.loc[(city, area)])
+            areas[(city, area)] = cls._make_aggregate(count, row.to_dict())
+            area_cities.setdefault(area, city)
+
+        # Roll the per-area sums up to cities instead of grouping the rows again
+        city_sums = sums.groupby(level='city', observed=True, sort=False).sum()
+        city_counts = counts.groupby(level='city', observed=True, sort=False).sum()
+        cities = {
+            city: cls._make_aggregate(int(city_counts.loc[city]), row.to_dict())
+            for city, row in city_sums.iterrows()
+        }
+
+        logger.info(f"Area aggregate index built: {len(areas)} areas, {len(cities)} cities")
+        return cls(areas, cities, area_cities, len(df))
+
+    @staticmethod
+    def _make_aggregate(count: int, sums: Dict[str, float]) -> GroupAggregate:
+        means = {col: total / count for col, total in sums.items()}
+        return GroupAggregate(count=count, sums=sums, means=means)
+
+    def area(self, area: str, city: Optional[str] = None) -> Optional[GroupAggregate]:
+        """Look up an area, optionally restricted to a city"""
+        if city is None:
+            city = self._area_cities.get(area)
+        return self._areas.get((city, area))
+
+    def city(self, city: str) -> Optional[GroupAggregate]:
+        """Look up a city"""
+        return self._cities.get(city)
+
+    def areas(self) -> List[Tuple[str, str, GroupAggregate]]:
+        """All areas as (city, area, aggregate), in order of first appearance"""
+        return [(city, area, agg) for (city, area), agg in self._areas.items()]
@@ -0,0 +1,158 @@
+import os
+import ast
+import json
+import math
+import time
+import itertools
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+import pandas as pd
+from pydantic import ValidationError
+
+from models.user import UserSubmission
+from services.executor_service import get_executor_service
+
+logger = logging.getLogger(__name__)
+
+# CSV rows validated, scored and stored together; bounds memory per upload
+UPLOAD_CHUNK_ROWS = int(os.environ.get("CO2_UPLOAD_CHUNK_ROWS", 1000))
+
+# UserSubmission fields read as text, list fields, and fields every row must have
+STRING_FIELDS = [name for name, field in UserSubmission.model_fields.items() if field.annotation is str]
+LIST_FIELDS = [name for name, field in UserSubmission.model_fields.items() if field.annotation == List[str]]
+REQUIRED_FIELDS = [name for name, field in UserSubmission.model_fields.items() if field.is_required()]
+
+
+def parse_list(value: Any) -> List[str]:
+    """A list cell: a JSON or Python list literal, or items separated by ';' or ','"""
+    text = str(value).strip()
+    if text.startswith('['):
+        try:
+            items = ast.literal_eval(text)
+            if isinstance(items, (list, tuple)):
+                return [str(item).strip() for item in items]
+        except (ValueError, SyntaxError):
+            pass
+        text = text.strip('[]')
+    separator = ';' if ';' in text else ','
+    return [item.strip().strip('\'"') for item in text.split(separator) if item.strip()]
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()]
+
+
+class CSVIngestService:
+    """Bulk ingestion of survey rows from CSV uploads
+
+    The file is read in chunks. Each chunk is validated row by row against
+    UserSubmission, scored with one batch prediction, and stored with one
+    bulk insert, and its per-row results are streamed back as NDJSON before
+    the next chunk is read. Rows are scored exactly as /api/predict scores
+    them; the stored rows get their derived fields calculated together.
+    """
+
+    def __init__(self, ml_service, history_service, chunk_rows: int = UPLOAD_CHUNK_ROWS,
+                 on_stored: Optional[Callable[[int], Any]] = None):
+        self.ml_service = ml_service
+        self.history_service = history_service
+        self.chunk_rows = chunk_rows
+        # Called with the number of rows stored after each chunk
+        self.on_stored = on_stored
+        self.executor = get_executor_service()
+
+    def open_csv(self, file: BinaryIO) -> Iterator[pd.DataFrame]:
+        """Start reading an upload in chunks, checking the header first (blocking)
+
+        Raises ValueError for an empty file or one missing required columns.
+        """
+        try:
+            reader = pd.read_csv(file, chunksize=self.chunk_rows, dtype={field: str for field in STRING_FIELDS + LIST_FIELDS},
+                                 skipinitialspace=True)
+            first = next(reader, None)
+        except pd.errors.EmptyDataError:
+            raise ValueError("CSV file is empty")
+        except pd.errors.ParserError as e:
+            raise ValueError(f"CSV file could not be parsed: {str(e)}")
+        if first is None:
+            raise ValueError("CSV file has no rows")
+
+        missing = [field for field in REQUIRED_FIELDS if field not in first.columns]
+        if missing:
+            raise ValueError(f"CSV file is missing required columns: {', '.join(missing)}")
+        return itertools.chain([first], reader)
+
+    async def ingest(self, chunks: Iterator[pd.DataFrame]) -> AsyncIterator[bytes]:
+        """Process an opened upload, yielding NDJSON lines: one per row, then a summary"""
+        start = time.perf_counter()
+        totals = {"rows": 0, "stored": 0, "invalid": 0}
+        first_row = 1
+        try:
+            while True:
+                chunk = await self.executor.run_in_thread(next, chunks, None)
+                if chunk is None:
+                    break
+
+                results, stored = await self._process_chunk(chunk, first_row)
+                first_row += len(chunk)
+                totals["rows"] += len(chunk)
+                totals["stored"] += stored
+                totals["invalid"] += len(chunk) - stored
+                yield "".join(json.dumps(result) + "\n" for result in results).encode()
+
+        except Exception as e:
+            # Chunks already stored stay stored; the client learns where processing stopped
+            logger.error(f"CSV ingestion failed: {str(e)}")
+            yield (json.dumps({"status": "error", "row": first_row, "detail": str(e), **totals}) + "\n").encode()
+            return
+
+        logger.info(f"CSV ingestion stored {totals['stored']} of {totals['rows']} rows")
+        summary = {"status": "complete", **totals, "seconds": round(time.perf_counter() - start, 3)}
+        yield (json.dumps(summary) + "\n").encode()
+
+    async def _process_chunk(self, chunk: pd.DataFrame, first_row: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Validate, score and store one chunk; returns per-row results in row order and the number stored"""
+        results, submissions, positions = await self.executor.run_in_thread(self._validate_chunk, chunk, first_row)
+
+        predictions = await self.ml_service.predict_batch(submissions, skip_unknown=True)
+        stored_submissions, predicted_co2 = [], []
+        for submission, prediction, position in zip(submissions, predictions, positions):
+            if prediction is None:
+                results[position].update({"status": "invalid", "errors": ["Contains values the model was not trained on"]})
+            else:
+                results[position].update({"status": "stored", **prediction})
+                stored_submissions.append(submission)
+                predicted_co2.append(prediction["predicted_co2"])
+
+        stored = await self.history_service.store_submissions(stored_submissions, predicted_co2)
+        if stored and self.on_stored is not None:
+            self.on_stored(stored)
+        return results, stored
+
+    def _validate_chunk(self, chunk: pd.DataFrame, first_row: int) -> Tuple[List[Dict[str, Any]], List[UserSubmission], List[int]]:
+        """Validate each row of a chunk (blocking)
+
+        Returns a result entry per row, the valid submissions, and the
+        position of each valid submission in the results.
+        """
+        results, submissions, positions = [], [], []
+        for offset, record in enumerate(chunk.to_dict('records')):
+            row = first_row + offset
+            values = {field: value for field, value in record.items() if not _is_missing(value)}
+            for field in LIST_FIELDS:
+                # An empty list cell is an empty list, not a missing value
+                if field in record:
+                    values[field] = parse_list(values[field]) if field in values else []
+            try:
+                submissions.append(UserSubmission(**values))
+            except ValidationError as e:
+                results.append({"row": row, "status": "invalid", "errors": _format_errors(e)})
+                continue
+            positions.append(len(results))
+            results.append({"row": row})
+        return results, submissions, positions
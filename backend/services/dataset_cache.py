@@ -0,0 +1,243 @@
+import os
+import ast
+import sys
+import importlib.util
+from typing import Callable, Dict, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Read the emission datasets from compiled columnar files instead of parsing the CSVs
+DATASET_CACHE = os.environ.get("CO2_DATASET_CACHE", "true").lower() in ("1", "true", "yes")
+# Where compiled files are written; by default a .dataset_cache directory beside each CSV
+DATASET_CACHE_DIR = os.environ.get("CO2_DATASET_CACHE_DIR", "")
+
+# Bump when the compiled layout changes so older files are treated as stale
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = ".feather"
+
+# Columns holding Python list literals such as "['Paper', 'Metal']"
+LIST_COLUMNS = ['Recycling', 'Cooking_With']
+
+# Text columns with more distinct values than this share of the rows stay plain strings
+MAX_CATEGORY_RATIO = 0.5
+
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+_METADATA_PREFIX = b"co2."
+
+
+def cache_path(csv_path: str) -> str:
+    """Location of the compiled file for a CSV"""
+    directory, filename = os.path.split(os.path.abspath(csv_path))
+    cache_dir = DATASET_CACHE_DIR or os.path.join(directory, ".dataset_cache")
+    return os.path.join(cache_dir, os.path.splitext(filename)[0] + CACHE_SUFFIX)
+
+
+def flag_column(column: str, item: str) -> str:
+    """Name of the boolean column marking rows whose list column contains item"""
+    return f"{column}_{item}"
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Give a freshly parsed CSV the dtypes the compiled file stores
+
+    Low-cardinality text columns become categoricals, so the compiled file
+    dictionary-encodes them. Numeric columns keep the dtypes read_csv chose.
+    """
+    limit = max(1, int(len(df) * MAX_CATEGORY_RATIO))
+    for col in df.select_dtypes(include=['object']).columns:
+        if df[col].nunique(dropna=True) <= limit:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def list_flags(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """One boolean column per item of each list column, parsed once per distinct value"""
+    flags = {}
+    for col in LIST_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].astype('category')
+        parsed = [_parse_list(label) for label in values.cat.categories]
+        items = sorted({item for labels in parsed for item in labels})
+
+        # Rows pick their flags from a per-category table; missing values (code -1) get none
+        table = np.zeros((len(parsed) + 1, len(items)), dtype=bool)
+        for code, labels in enumerate(parsed):
+            for item in labels:
+                table[code, items.index(item)] = True
+        rows = table[values.cat.codes.to_numpy()]
+        for i, item in enumerate(items):
+            flags[flag_column(col, item)] = rows[:, i]
+    return flags
+
+
+def _parse_list(label: str) -> List[str]:
+    """Items of a list literal, or nothing if the value is not one"""
+    try:
+        value = ast.literal_eval(label)
+    except (ValueError, SyntaxError):
+        return []
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(item) for item in value]
+
+
+def _source_state(csv_path: str) -> Dict[bytes, bytes]:
+    """Size and modification time of the CSV, recorded in the compiled file"""
+    stat = os.stat(csv_path)
+    return {
+        _METADATA_PREFIX + b"format": str(CACHE_FORMAT_VERSION).encode(),
+        _METADATA_PREFIX + b"source_size": str(stat.st_size).encode(),
+        _METADATA_PREFIX + b"source_mtime_ns": str(stat.st_mtime_ns).encode()
+    }
+
+
+def compile_dataset(csv_path: str, df: Optional[pd.DataFrame] = None) -> str:
+    """Convert a CSV into its compiled columnar file and return the file's path (blocking)
+
+    df may be passed when the CSV was just parsed and prepared. The file is
+    uncompressed Feather (Arrow IPC), so it can be memory-mapped when read.
+    It is written to a temporary name and renamed into place.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    source = _source_state(csv_path)
+    if df is None:
+        df = prepare_frame(pd.read_csv(csv_path))
+
+    flags = list_flags(df)
+    table = pa.Table.from_pandas(df.assign(**flags), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(source)
+    metadata[_METADATA_PREFIX + b"flag_columns"] = ",".join(flags).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    path = cache_path(csv_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(table, temp_path, compression='uncompressed')
+    os.replace(temp_path, path)
+
+    logger.info(f"Dataset compiled: {csv_path} -> {path} ({table.num_rows} rows, {len(flags)} list flags)")
+    return path
+
+
+def read_dataset(csv_path: str, memory_map: bool = True, include_flags: bool = False,
+                 refresh: bool = True) -> pd.DataFrame:
+    """Load a dataset from its compiled file, or from the CSV when that file is missing or stale
+
+    Both paths return the same columns and dtypes. Memory-mapped numeric
+    columns are read-only views of the file; pass memory_map=False for a
+    frame that is edited in place. include_flags adds the boolean list flag
+    columns; refresh recompiles a stale file after reading the CSV.
+    """
+    if DATASET_CACHE and ARROW_AVAILABLE:
+        try:
+            df = _read_compiled(csv_path, memory_map, include_flags)
+            if df is not None:
+                return df
+        except Exception as e:
+            logger.warning(f"Compiled dataset unreadable, using CSV: {str(e)}")
+
+    df = prepare_frame(pd.read_csv(csv_path))
+    if DATASET_CACHE and ARROW_AVAILABLE and refresh:
+        try:
+            compile_dataset(csv_path, df)
+        except Exception as e:
+            # A read-only filesystem only costs the CSV parse on each load
+            logger.warning(f"Could not write compiled dataset: {str(e)}")
+    if include_flags:
+        df = df.assign(**list_flags(df))
+    return df
+
+
+def write_dataset(df: pd.DataFrame, csv_path: str):
+    """Write a dataset CSV and compile it, so readers never see a stale compiled file (blocking)"""
+    df.to_csv(csv_path, index=False)
+    if DATASET_CACHE and ARROW_AVAILABLE:
+        try:
+            compile_dataset(csv_path)
+        except Exception as e:
+            logger.warning(f"Could not write compiled dataset: {str(e)}")
+
+
+def stream_dataset(csv_path: str, transform: Callable[[pd.DataFrame], pd.DataFrame], chunksize: int,
+                   output_path: Optional[str] = None) -> int:
+    """Rewrite a CSV chunk by chunk, for files larger than memory, and return the rows written (blocking)
+
+    Output goes to a temporary file renamed over output_path (default: the
+    input) once every chunk is written. The compiled copy is not rebuilt, as
+    that needs the whole dataset in memory; it is simply stale afterwards.
+    """
+    output_path = output_path or csv_path
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    rows = 0
+    try:
+        with open(temp_path, 'w', newline='') as f:
+            for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize)):
+                chunk = transform(chunk)
+                chunk.to_csv(f, index=False, header=(i == 0))
+                rows += len(chunk)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return rows
+
+
+def _read_compiled(csv_path: str, memory_map: bool, include_flags: bool) -> Optional[pd.DataFrame]:
+    """Read the compiled file if it matches the current CSV, otherwise None"""
+    import pyarrow as pa
+
+    path = cache_path(csv_path)
+    if not os.path.exists(path):
+        return None
+
+    source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+    with source:
+        reader = pa.ipc.open_file(source)
+        metadata = reader.schema.metadata or {}
+        if any(metadata.get(key) != value for key, value in _source_state(csv_path).items()):
+            logger.info(f"Compiled dataset is stale: {path}")
+            return None
+        table = reader.read_all()
+
+    flag_columns = [col for col in metadata.get(_METADATA_PREFIX + b"flag_columns", b"").decode().split(",") if col]
+    if not include_flags and flag_columns:
+        table = table.drop(flag_columns)
+    # split_blocks lets numeric columns stay views of the mapped file instead of being consolidated
+    return table.to_pandas(split_blocks=memory_map)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compile the given CSVs, or every dataset the backend reads"""
+    logging.basicConfig(level=logging.INFO)
+    if not ARROW_AVAILABLE:
+        print("[ERROR] pyarrow is required to compile datasets")
+        return 1
+
+    csv_paths = list(argv if argv is not None else sys.argv[1:])
+    if not csv_paths:
+        from services.dataset_service import DatasetService
+        service = DatasetService()
+        for name in service.dataset_paths:
+            try:
+                csv_paths.append(service._resolve_path(name))
+            except FileNotFoundError as e:
+                print(f"[WARN] {str(e)}")
+
+    for csv_path in csv_paths:
+        path = compile_dataset(csv_path)
+        print(f"[INFO] {csv_path} -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
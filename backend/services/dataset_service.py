@@ -0,0 +1,174 @@
+import pandas as pd
+import numpy as np
+import os
+import threading
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Callable
+import logging
+
+from services.dataset_cache import read_dataset
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEASONS_DATASET = "seasons"
+CLEANED_DATASET = "cleaned"
+
+# Candidate locations for each dataset, relative to the backend directory
+DATASET_PATHS = {
+    SEASONS_DATASET: [
+        "../src/data/Carbon_Emission_With_Seasons.csv",
+        "data/Carbon_Emission_With_Seasons.csv",
+        "Carbon_Emission_With_Seasons.csv"
+    ],
+    CLEANED_DATASET: [
+        "../src/data/Carbon_Emission_Cleaned.csv",
+        "data/Carbon_Emission_Cleaned.csv",
+        "Carbon_Emission_Cleaned.csv"
+    ]
+}
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'Body Type', 'Sex', 'Diet', 'How Often Shower', 'Heating Energy Source',
+    'Social Activity', 'Frequency of Traveling by Air', 'Energy efficiency',
+    'subdomain', 'city', 'country', 'area', 'area_type_raw', 'season'
+]
+
+
+@dataclass
+class _DatasetEntry:
+    """A loaded dataset together with the file state it was read from"""
+    path: str
+    mtime_ns: int
+    frame: pd.DataFrame
+    version: str
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+
+class DatasetService:
+    """Loads the emission datasets once and shares read-only views of them"""
+
+    def __init__(self, base_dir: str = BACKEND_DIR, dataset_paths: Optional[Dict[str, List[str]]] = None):
+        self.base_dir = base_dir
+        self.dataset_paths = dataset_paths or DATASET_PATHS
+        self._entries: Dict[str, _DatasetEntry] = {}
+        self._lock = threading.RLock()
+
+    def get_frame(self, name: str) -> pd.DataFrame:
+        """Get a read-only view of a dataset, reloading it if the file changed
+
+        In-place writes to the view raise; copy it first to modify it.
+        """
+        return self._get_entry(name).frame.copy(deep=False)
+
+    def get_version(self, name: str) -> str:
+        """Get the version token of the currently loaded dataset"""
+        return self._get_entry(name).version
+
+    def get_last_modified(self, name: str) -> datetime:
+        """Get the modification time of the currently loaded dataset file"""
+        return datetime.fromtimestamp(self._get_entry(name).mtime_ns / 1e9, tz=timezone.utc)
+
+    def get_derived(self, name: str, key: str, builder: Callable[[pd.DataFrame], Any]) -> Any:
+        """Get a value computed from a dataset, built once per dataset version"""
+        entry = self._get_entry(name)
+        if key not in entry.derived:
+            with self._lock:
+                if key not in entry.derived:
+                    entry.derived[key] = builder(entry.frame.copy(deep=False))
+        return entry.derived[key]
+
+    def _get_entry(self, name: str) -> _DatasetEntry:
+        """Return the loaded entry for a dataset, (re)loading when needed"""
+        if name not in self.dataset_paths:
+            raise KeyError(f"Unknown dataset: {name}")
+
+        path = self._resolve_path(name)
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        entry = self._entries.get(name)
+        if entry is not None and entry.path == path and entry.mtime_ns == mtime_ns:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.path != path or entry.mtime_ns != mtime_ns:
+                entry = self._load(path, mtime_ns)
+                self._entries[name] = entry
+            return entry
+
+    def _resolve_path(self, name: str) -> str:
+        """Find the first existing file for a dataset"""
+        for candidate in self.dataset_paths[name]:
+            path = os.path.normpath(os.path.join(self.base_dir, candidate))
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No CSV file found for dataset '{name}'")
+
+    def _load(self, path: str, mtime_ns: int) -> _DatasetEntry:
+        """Read a dataset into a typed DataFrame, from its compiled file when it is current"""
+        df = read_dataset(path, include_flags=True)
+        df = self._read_only(self._apply_dtypes(df))
+
+        logger.info(f"Dataset loaded from {path}. Shape: {df.shape}")
+        return _DatasetEntry(
+            path=path,
+            mtime_ns=mtime_ns,
+            frame=df,
+            version=f"{mtime_ns:x}-{len(df):x}"
+        )
+
+    def _apply_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert text columns to categoricals and narrow integer columns"""
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        # int32 keeps products of two columns (e.g. interaction features) safe
+        int32_info = np.iinfo(np.int32)
+        for col in df.select_dtypes(include=['int64']).columns:
+            if df[col].min() >= int32_info.min and df[col].max() <= int32_info.max:
+                df[col] = df[col].astype(np.int32)
+
+        return df
+
+    def _read_only(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rebuild a frame on read-only arrays
+
+        Views handed out by the store are shallow copies, so an in-place write
+        through one (.loc, .at, +=) would change the shared data; with
+        read-only arrays it raises instead. Replacing a whole column of a view
+        still only changes that view.
+        """
+        columns = {}
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[col] = pd.Categorical.from_codes(_read_only_array(series.cat.codes.to_numpy()), dtype=series.dtype)
+            elif isinstance(series.dtype, np.dtype):
+                columns[col] = _read_only_array(series.to_numpy())
+            else:
+                columns[col] = series.array
+        return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _read_only_array(values: np.ndarray) -> np.ndarray:
+    """A read-only array of the values, copied unless already read-only (e.g. memory-mapped)"""
+    if values.flags.writeable:
+        values = values.copy()
+        values.flags.writeable = False
+    return values
+
+
+_dataset_service: Optional[DatasetService] = None
+
+
+def get_dataset_service() -> DatasetService:
+    """Get the process-wide dataset store"""
+    global _dataset_service
+    if _dataset_service is None:
+        _dataset_service = DatasetService()
+    return _dataset_service
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Thread pool size for blocking work (I/O, database queries, model inference and fitting)
+THREAD_WORKERS = int(os.environ.get("CO2_THREAD_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+
+
+class ExecutorService:
+    """Runs blocking work off the asyncio event loop"""
+
+    def __init__(self, thread_workers: int = THREAD_WORKERS):
+        self.thread_workers = max(1, thread_workers)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="co2-worker")
+        return self._thread_pool
+
+    async def run_in_thread(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run blocking work (I/O, database queries, model inference) on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, functools.partial(func, *args, **kwargs))
+
+    def configure(self, thread_workers: Optional[int] = None):
+        """Resize the thread pool; the existing pool is shut down and recreated on next use"""
+        self.shutdown(wait=True)
+        if thread_workers is not None:
+            self.thread_workers = max(1, thread_workers)
+        logger.info(f"Executor configured: {self.thread_workers} threads")
+
+    def shutdown(self, wait: bool = False):
+        """Shut down the thread pool"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+
+
+_executor_service: Optional[ExecutorService] = None
+
+
+def get_executor_service() -> ExecutorService:
+    """Get the process-wide executor"""
+    global _executor_service
+    if _executor_service is None:
+        _executor_service = ExecutorService()
+    return _executor_service
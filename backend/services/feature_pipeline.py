@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Mapping, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENERGY_EFFICIENCY_SCORES = {'Yes': 3, 'Sometimes': 2, 'No': 1}
+
+# Features derived from the survey columns rather than read directly
+ENGINEERED_COLUMNS = [
+    'grocery_meat_interaction', 'energy_tech_interaction', 'waste_efficiency',
+    'energy_efficiency_score', 'lifestyle_score'
+]
+
+
+class FeaturePipeline:
+    """Builds the model feature matrix the same way for training and inference
+
+    The column order and category codes are fixed when the pipeline is fitted.
+    Categories are coded by their position in the sorted label list, the same
+    codes LabelEncoder assigns.
+    """
+
+    def __init__(self, columns: List[str], categories: Dict[str, np.ndarray]):
+        self.columns = list(columns)
+        self.categories = categories
+        self._build_lookups()
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, feature_columns: Sequence[str]) -> "FeaturePipeline":
+        """Fix the feature columns and category codes from a training dataset"""
+        available = set(df.columns) | set(ENGINEERED_COLUMNS)
+        columns = [col for col in feature_columns if col in available]
+
+        # Text columns are categorical; engineered columns are always numeric
+        categories = {
+            col: np.unique(df[col].astype(str).to_numpy())
+            for col in columns
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])
+        }
+
+        logger.info(f"Feature pipeline fitted: {len(columns)} features, {len(categories)} categorical")
+        return cls(columns, categories)
+
+    def _build_lookups(self):
+        """Precompute label -> code maps and per-code engineered values"""
+        self._codes = {
+            col: {label: code for code, label in enumerate(labels)}
+            for col, labels in self.categories.items()
+        }
+        labels = self.categories.get('Energy efficiency')
+        self._energy_scores = None if labels is None else np.array(
+            [ENERGY_EFFICIENCY_SCORES.get(label, np.nan) for label in labels], dtype=np.float64
+        )
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'columns': self.columns, 'categories': self.categories}
+
+    def encode(self, column: str, values: Sequence[Any]) -> np.ndarray:
+        """Map labels to their integer codes, rejecting labels not seen in training"""
+        codes = self._codes[column]
+        try:
+            return np.fromiter((codes[str(value)] for value in values), dtype=np.int64, count=len(values))
+        except KeyError as e:
+            raise ValueError(f"Unseen value {e} for feature '{column}'")
+
+    def known_rows(self, data: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Boolean mask of rows whose categorical values were all seen in training"""
+        n_rows = len(data[self.columns[0]])
+        mask = np.ones(n_rows, dtype=bool)
+        for col, codes in self._codes.items():
+            mask &= np.fromiter((str(value) in codes for value in data[col]), dtype=bool, count=n_rows)
+        return mask
+
+    def transform(self, data: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Build a contiguous float32 feature matrix from raw columns
+
+        data maps dataset column names to equal-length sequences; a DataFrame works.
+        """
+        n_rows = len(data[self.columns[0]])
+        encoded = {col: self.encode(col, data[col]) for col in self.categories}
+
+        def numeric(column: str) -> np.ndarray:
+            return np.asarray(data[column], dtype=np.float64)
+
+        tv_pc_hours = numeric('How Long TV PC Daily Hour')
+        internet_hours = numeric('How Long Internet Daily Hour')
+        engineered = {
+            'grocery_meat_interaction': numeric('Monthly Grocery Bill') * numeric('meat_meals'),
+            'energy_tech_interaction': tv_pc_hours * internet_hours,
+            'waste_efficiency': numeric('Waste Bag Weekly Count') / 5,  # Simplified since Waste Bag Size was dropped
+            'lifestyle_score': tv_pc_hours + internet_hours + numeric('How Many New Clothes Monthly')
+        }
+        if self._energy_scores is not None:
+            engineered['energy_efficiency_score'] = self._energy_scores[encoded['Energy efficiency']]
+        else:
+            engineered['energy_efficiency_score'] = np.array(
+                [ENERGY_EFFICIENCY_SCORES.get(value, np.nan) for value in data['Energy efficiency']], dtype=np.float64
+            )
+
+        X = np.empty((n_rows, len(self.columns)), dtype=np.float32)
+        for i, col in enumerate(self.columns):
+            if col in encoded:
+                X[:, i] = encoded[col]
+            elif col in engineered:
+                X[:, i] = engineered[col]
+            else:
+                X[:, i] = numeric(col)
+        return X
@@ -3,56 +3,143 @@ import numpy as np
 import os
 import sys
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Mapping, Optional, Sequence
 import logging
 
 # Add backend directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import threading
+from sqlalchemy import bindparam, case, func, insert
 from sqlalchemy.orm import Session
 from models.database import get_db, UserSubmissionDB
 from models.user import UserSubmission, UserHistory, AreaStatistics
 from services.ml_service import MLService
+from services.dataset_service import DatasetService, get_dataset_service, CLEANED_DATASET
+from services.executor_service import get_executor_service
+from services.peer_summary import increment_buckets, rebuild_buckets, query_buckets, median_from_buckets
+from services.submission_writer import SubmissionWriter, WRITE_MODE, WRITE_MODES
 
 logger = logging.getLogger(__name__)
 
+# Monthly flight hours by air travel frequency
+FLIGHT_HOURS = {
+    'never': 0.0,
+    'rarely': 2.0,
+    'frequently': 8.0,
+    'very frequently': 16.0
+}
+
+# UserSubmission fields the derived fields are calculated from
+DERIVED_FIELD_INPUTS = [
+    'diet', 'cooking_methods', 'air_travel', 'grocery_bill', 'social_activity',
+    'new_clothes', 'tv_pc_hours', 'internet_hours', 'waste_bag_count', 'recycling'
+]
+
 class HistoryService:
-    def __init__(self):
-        self.csv_path = "../src/data/Carbon_Emission_Cleaned.csv"
+    def __init__(self, dataset_service: Optional[DatasetService] = None, ml_service: Optional[MLService] = None,
+                 write_mode: str = WRITE_MODE):
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode: {write_mode}")
+        self.dataset_service = dataset_service or get_dataset_service()
+        self.ml_service = ml_service or MLService()
+        self.executor = get_executor_service()
+        self.write_mode = write_mode
+        self.writer = SubmissionWriter(self._insert_rows)
+        self._peer_buckets_ready = False
+        self._peer_buckets_lock = threading.Lock()
         
     async def store_submission(self, submission: UserSubmission, predicted_co2: float = None, actual_co2: float = None):
-        """Store user submission in database"""
+        """Store user submission in database
+
+        In group write mode the row is queued for the next batch and None is returned.
+        """
+        if self.write_mode == "group":
+            self.writer.submit(self._build_submission_row(submission, predicted_co2, actual_co2))
+            return None
+        return await self.executor.run_in_thread(self._insert_submission, submission, predicted_co2, actual_co2)
+
+    async def flush_submissions(self):
+        """Wait until all queued submissions are written"""
+        await self.executor.run_in_thread(self.writer.flush)
+
+    def shutdown(self):
+        """Write queued submissions and stop the writer"""
+        self.writer.close()
+
+    def _build_submission_row(self, submission: UserSubmission, predicted_co2: float = None, actual_co2: float = None) -> Dict[str, Any]:
+        """Column values for a user submission row"""
+        return self._build_submission_rows([submission], [predicted_co2], [actual_co2])[0]
+
+    async def store_submissions(self, submissions: List[UserSubmission], predicted_co2: Sequence[float]) -> int:
+        """Store many submissions in one transaction, with their derived fields computed together
+
+        Unlike store_submission the submissions are not modified. Returns the number stored.
+        """
+        if not submissions:
+            return 0
+        rows = await self.executor.run_in_thread(self._build_submission_rows, submissions, predicted_co2)
+        await self.executor.run_in_thread(self._insert_rows, rows)
+        return len(rows)
+
+    def _build_submission_rows(self, submissions: List[UserSubmission], predicted_co2: Sequence[Optional[float]],
+                               actual_co2: Optional[Sequence[Optional[float]]] = None) -> List[Dict[str, Any]]:
+        """Column values for many user submission rows, with the derived fields calculated together
+
+        The submissions are not modified; the derived fields are only set in the stored submission_data.
+        """
+        derived = self._calculate_derived_fields(self._derived_field_columns(submissions))
+        created_at = datetime.now()
+        
+        rows = []
+        for i, submission in enumerate(submissions):
+            submission_data = submission.dict()
+            submission_data.update({field: values[i].item() for field, values in derived.items()})
+            rows.append({
+                "submission_data": submission_data,
+                "city": submission.city,
+                "area": submission.area,
+                "body_type": submission.body_type,
+                "sex": submission.sex,
+                "diet": submission.diet,
+                "transport": submission.transport,
+                "vehicle_distance": submission.vehicle_distance,
+                "grocery_bill": submission.grocery_bill,
+                "tv_pc_hours": submission.tv_pc_hours,
+                "internet_hours": submission.internet_hours,
+                "waste_bag_count": submission.waste_bag_count,
+                "recycling_count": len(submission.recycling),
+                "predicted_co2": None if predicted_co2[i] is None else float(predicted_co2[i]),
+                "actual_co2": None if actual_co2 is None else actual_co2[i],
+                "created_at": created_at
+            })
+        return rows
+
+    def _insert_rows(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of submission rows in one transaction (blocking)"""
+        self._ensure_peer_buckets()
+        db = next(get_db())
+        try:
+            db.execute(insert(UserSubmissionDB), rows)
+            increment_buckets(db, [(row["city"], row["area"], row["predicted_co2"]) for row in rows])
+            db.commit()
+            logger.info(f"Stored batch of {len(rows)} user submissions")
+        finally:
+            db.close()
+
+    def _insert_submission(self, submission: UserSubmission, predicted_co2: float = None, actual_co2: float = None):
+        """Insert a user submission row (blocking)"""
+        db = None
         try:
+            self._ensure_peer_buckets()
             db = next(get_db())
             
-            # Calculate additional fields
-            submission.lpg_kg = self._calculate_lpg_kg(submission)
-            submission.flights_hours = self._calculate_flights_hours(submission)
-            submission.meat_meals = self._calculate_meat_meals(submission)
-            submission.dining_out = self._calculate_dining_out(submission)
-            submission.shopping_spend = self._calculate_shopping_spend(submission)
-            submission.waste_kg = self._calculate_waste_kg(submission)
-            
             # Create database entry
-            db_submission = UserSubmissionDB(
-                submission_data=submission.dict(),
-                city=submission.city,
-                area=submission.area,
-                body_type=submission.body_type,
-                sex=submission.sex,
-                diet=submission.diet,
-                transport=submission.transport,
-                vehicle_distance=submission.vehicle_distance,
-                grocery_bill=submission.grocery_bill,
-                tv_pc_hours=submission.tv_pc_hours,
-                internet_hours=submission.internet_hours,
-                waste_bag_count=submission.waste_bag_count,
-                recycling_count=len(submission.recycling),
-                predicted_co2=predicted_co2,
-                actual_co2=actual_co2
-            )
+            db_submission = UserSubmissionDB(**self._build_submission_row(submission, predicted_co2, actual_co2))
             
             db.add(db_submission)
+            # Keep the peer median histogram in the same transaction
+            increment_buckets(db, [(submission.city, submission.area, predicted_co2)])
             db.commit()
             db.refresh(db_submission)
             
@@ -63,124 +150,121 @@ class HistoryService:
             logger.error(f"Failed to store submission: {str(e)}")
             raise
         finally:
-            db.close()
+            if db is not None:
+                db.close()
+
+    def _derived_field_columns(self, submissions: Sequence[UserSubmission]) -> Dict[str, List[Any]]:
+        """The DERIVED_FIELD_INPUTS of submissions as columns for _calculate_derived_fields"""
+        return {field: [getattr(submission, field) for submission in submissions] for field in DERIVED_FIELD_INPUTS}
+
+    def _calculate_derived_field(self, submission: UserSubmission, field: str) -> Any:
+        """One derived field of one submission, as a Python number"""
+        return self._calculate_derived_fields(self._derived_field_columns([submission]))[field][0].item()
 
     def _calculate_lpg_kg(self, submission: UserSubmission) -> float:
-        """Calculate LPG consumption based on cooking methods and household size"""
-        base_lpg = 10.0  # Base LPG consumption
-        
-        # Adjust based on cooking methods
-        if 'Stove' in submission.cooking_methods:
-            base_lpg += 5.0
-        if 'Oven' in submission.cooking_methods:
-            base_lpg += 3.0
-        if 'Grill' in submission.cooking_methods:
-            base_lpg += 2.0
-            
-        # Adjust based on diet
-        if submission.diet == 'vegetarian':
-            base_lpg *= 0.8
-        elif submission.diet == 'vegan':
-            base_lpg *= 0.6
-        elif submission.diet == 'omnivore':
-            base_lpg *= 1.2
-            
-        return base_lpg
+        """Calculate LPG consumption based on cooking methods and diet"""
+        return self._calculate_derived_field(submission, 'lpg_kg')
 
     def _calculate_flights_hours(self, submission: UserSubmission) -> float:
         """Calculate flight hours based on air travel frequency"""
-        frequency_map = {
-            'never': 0.0,
-            'rarely': 2.0,
-            'frequently': 8.0,
-            'very frequently': 16.0
-        }
-        return frequency_map.get(submission.air_travel, 0.0)
+        return self._calculate_derived_field(submission, 'flights_hours')
 
     def _calculate_meat_meals(self, submission: UserSubmission) -> int:
         """Calculate meat meals per month based on diet and grocery bill"""
-        if submission.diet == 'vegan':
-            return 0
-        elif submission.diet == 'vegetarian':
-            return 0
-        elif submission.diet == 'pescatarian':
-            return int(submission.grocery_bill * 0.1)  # 10% of grocery bill
-        else:  # omnivore
-            return int(submission.grocery_bill * 0.2)  # 20% of grocery bill
+        return self._calculate_derived_field(submission, 'meat_meals')
 
     def _calculate_dining_out(self, submission: UserSubmission) -> int:
         """Calculate dining out frequency based on social activity and grocery bill"""
-        base_dining = 5  # Base dining out per month
-        
-        if submission.social_activity == 'very often':
-            base_dining += 10
-        elif submission.social_activity == 'often':
-            base_dining += 5
-        elif submission.social_activity == 'rarely':
-            base_dining -= 2
-            
-        # Adjust based on grocery bill (lower grocery = more dining out)
-        if submission.grocery_bill < 100:
-            base_dining += 5
-        elif submission.grocery_bill > 300:
-            base_dining -= 3
-            
-        return max(0, base_dining)
+        return self._calculate_derived_field(submission, 'dining_out')
 
     def _calculate_shopping_spend(self, submission: UserSubmission) -> float:
         """Calculate shopping spend based on new clothes and lifestyle"""
-        base_spend = submission.new_clothes * 50  # 50 per clothing item
-        
-        # Add lifestyle factors
-        if submission.tv_pc_hours > 8:
-            base_spend += 100  # Electronics/entertainment
-        if submission.internet_hours > 10:
-            base_spend += 50   # Online shopping
-            
-        return base_spend
+        return self._calculate_derived_field(submission, 'shopping_spend')
 
     def _calculate_waste_kg(self, submission: UserSubmission) -> float:
         """Calculate waste generation in kg per month"""
-        base_waste = submission.waste_bag_count * 2.5  # 2.5 kg per bag
-        
-        # Adjust based on lifestyle
-        if submission.grocery_bill > 200:
-            base_waste *= 1.2  # More consumption = more waste
-        if len(submission.recycling) > 2:
-            base_waste *= 0.8  # Better recycling = less waste
-            
-        return base_waste
+        return self._calculate_derived_field(submission, 'waste_kg')
+
+    def _calculate_derived_fields(self, data: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+        """Calculate all six derived fields for many submissions at once
+
+        data maps the UserSubmission fields in DERIVED_FIELD_INPUTS to
+        equal-length sequences; a DataFrame works. The scalar _calculate_*
+        methods wrap this; meat_meals, dining_out and shopping_spend are
+        integer arrays, the rest float.
+        """
+        diet = np.asarray(data['diet'], dtype=object)
+        grocery_bill = np.asarray(data['grocery_bill'], dtype=np.float64)
+        cooking_methods = data['cooking_methods']
+        n_rows = len(diet)
+
+        def uses(method: str) -> np.ndarray:
+            return np.fromiter((method in methods for methods in cooking_methods), dtype=bool, count=n_rows)
+
+        # LPG: base plus cooking methods, scaled by diet
+        lpg_kg = 10.0 + 5.0 * uses('Stove') + 3.0 * uses('Oven') + 2.0 * uses('Grill')
+        lpg_kg = np.select(
+            [diet == 'vegetarian', diet == 'vegan', diet == 'omnivore'],
+            [lpg_kg * 0.8, lpg_kg * 0.6, lpg_kg * 1.2],
+            lpg_kg
+        )
+
+        flights_hours = np.array(
+            [FLIGHT_HOURS.get(frequency, 0.0) for frequency in data['air_travel']], dtype=np.float64
+        ).reshape(n_rows)
+
+        # Meat meals: none for vegans and vegetarians, otherwise a share of the grocery bill
+        meat_meals = np.select(
+            [(diet == 'vegan') | (diet == 'vegetarian'), diet == 'pescatarian'],
+            [0.0, np.trunc(grocery_bill * 0.1)],
+            np.trunc(grocery_bill * 0.2)
+        ).astype(np.int64)
+
+        # Dining out: social activity, then lower grocery bills mean more dining out
+        social_activity = np.asarray(data['social_activity'], dtype=object)
+        dining_out = 5 + np.select(
+            [social_activity == 'very often', social_activity == 'often', social_activity == 'rarely'],
+            [10, 5, -2],
+            0
+        )
+        dining_out = dining_out + np.select([grocery_bill < 100, grocery_bill > 300], [5, -3], 0)
+        dining_out = np.maximum(0, dining_out).astype(np.int64)
+
+        shopping_spend = (
+            np.asarray(data['new_clothes'], dtype=np.int64) * 50
+            + 100 * (np.asarray(data['tv_pc_hours'], dtype=np.float64) > 8)
+            + 50 * (np.asarray(data['internet_hours'], dtype=np.float64) > 10)
+        )
+
+        # Waste: bags per week, more with larger grocery bills, less with wider recycling
+        recycling_count = np.fromiter((len(materials) for materials in data['recycling']), dtype=np.int64, count=n_rows)
+        waste_kg = np.asarray(data['waste_bag_count'], dtype=np.int64) * 2.5
+        waste_kg = np.where(grocery_bill > 200, waste_kg * 1.2, waste_kg)
+        waste_kg = np.where(recycling_count > 2, waste_kg * 0.8, waste_kg)
+
+        return {
+            'lpg_kg': lpg_kg,
+            'flights_hours': flights_hours,
+            'meat_meals': meat_meals,
+            'dining_out': dining_out,
+            'shopping_spend': shopping_spend,
+            'waste_kg': waste_kg
+        }
 
     async def get_recent_users(self, city: str, area: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent users from same city and area"""
         try:
-            db = next(get_db())
-            
             # Get recent submissions from same city and area
-            recent_submissions = db.query(UserSubmissionDB).filter(
-                UserSubmissionDB.city == city,
-                UserSubmissionDB.area == area
-            ).order_by(UserSubmissionDB.created_at.desc()).limit(limit).all()
+            recent_submissions = await self.executor.run_in_thread(self._query_recent_submissions, city, area, limit)
+            
+            # Fill in rows stored without a prediction, scoring them all at once
+            backfilled = await self._backfill_predictions(recent_submissions)
             
             history = []
-            ml_service = MLService()
-            # Lazily initialize models if needed
-            if not ml_service.models_loaded:
-                try:
-                    await ml_service.initialize_models()
-                except Exception:
-                    pass
-
             for submission in recent_submissions:
                 predicted_value = submission.predicted_co2
-                # If DB doesn't have prediction, compute on the fly from stored submission JSON
-                if predicted_value is None and hasattr(submission, "submission_data") and submission.submission_data:
-                    try:
-                        user_sub = UserSubmission(**submission.submission_data)
-                        pred = await ml_service.predict_co2(user_sub)
-                        predicted_value = float(pred.get("predicted_co2")) if pred and "predicted_co2" in pred else None
-                    except Exception:
-                        predicted_value = None
+                if predicted_value is None:
+                    predicted_value = backfilled.get(submission.id)
 
                 history.append({
                     "id": submission.id,
@@ -203,60 +287,156 @@ class HistoryService:
         except Exception as e:
             logger.error(f"Failed to get recent users: {str(e)}")
             return []
+
+    async def _backfill_predictions(self, submissions: List[UserSubmissionDB]) -> Dict[int, float]:
+        """Score stored submissions that have no prediction and save the results
+
+        Uses the shared models only; a GET request never triggers training.
+        Returns the new predictions keyed by submission id.
+        """
+        if not self.ml_service.models_loaded:
+            return {}
+        
+        missing_ids = []
+        user_subs = []
+        for submission in submissions:
+            if submission.predicted_co2 is not None or not submission.submission_data:
+                continue
+            try:
+                user_subs.append(UserSubmission(**submission.submission_data))
+                missing_ids.append(submission.id)
+            except Exception:
+                continue
+        
+        if not user_subs:
+            return {}
+        
+        try:
+            # A row with labels the served model never saw only loses its own prediction
+            predictions = await self.ml_service.predict_batch(user_subs, skip_unknown=True)
+            backfilled = {
+                submission_id: float(pred["predicted_co2"])
+                for submission_id, pred in zip(missing_ids, predictions)
+                if pred is not None
+            }
+            if not backfilled:
+                return {}
+            await self.executor.run_in_thread(self._save_predictions, backfilled)
+            return backfilled
+        except Exception as e:
+            logger.error(f"Failed to backfill predictions: {str(e)}")
+            return {}
+
+    def _save_predictions(self, predictions: Dict[int, float]):
+        """Write predictions for rows that still have none, in one transaction (blocking)"""
+        self._ensure_peer_buckets()
+        table = UserSubmissionDB.__table__
+        statement = table.update().where(
+            table.c.id == bindparam("row_id"),
+            table.c.predicted_co2.is_(None)
+        ).values(predicted_co2=bindparam("value")).returning(table.c.city, table.c.area, table.c.predicted_co2)
+        
+        db = next(get_db())
+        try:
+            # Only rows this call actually filled in go into the peer histogram
+            updated = []
+            for submission_id, value in predictions.items():
+                updated.extend(db.execute(statement, {"row_id": submission_id, "value": value}).all())
+            increment_buckets(db, updated)
+            db.commit()
+            logger.info(f"Stored backfilled predictions for {len(updated)} submissions")
+        finally:
+            db.close()
+
+    def _query_recent_submissions(self, city: str, area: str, limit: int) -> List[UserSubmissionDB]:
+        """Load the most recent submissions for a city and area (blocking)"""
+        db = next(get_db())
+        try:
+            return db.query(UserSubmissionDB).filter(
+                UserSubmissionDB.city == city,
+                UserSubmissionDB.area == area
+            ).order_by(UserSubmissionDB.created_at.desc()).limit(limit).all()
         finally:
             db.close()
 
     async def get_peer_comparison(self, city: str, area: str) -> Dict[str, Any]:
         """Get peer comparison data for user's city and area"""
         try:
-            db = next(get_db())
+            peer_stats = await self.executor.run_in_thread(self._query_peer_stats, city, area)
+            if peer_stats is None:
+                return self._get_default_comparison()
+            
+            # Get India-wide data (from CSV)
+            peer_stats["india_stats"] = await self._get_india_data()
+            return peer_stats
             
-            # Get all submissions from same city and area
-            area_submissions = db.query(UserSubmissionDB).filter(
+        except Exception as e:
+            logger.error(f"Failed to get peer comparison: {str(e)}")
+            return self._get_default_comparison()
+
+    def _query_peer_stats(self, city: str, area: str) -> Optional[Dict[str, Any]]:
+        """Aggregate predicted CO2 for an area and its city in SQL (blocking)
+
+        Averages, minimums and maximums are exact; medians come from the
+        peer histogram. Returns None when the area has no usable predictions.
+        """
+        self._ensure_peer_buckets()
+        # Zero predictions count as submissions but not as CO2 values
+        co2 = case((UserSubmissionDB.predicted_co2 != 0, UserSubmissionDB.predicted_co2))
+        
+        db = next(get_db())
+        try:
+            area_count, co2_count, avg_co2, min_co2, max_co2 = db.query(
+                func.count(), func.count(co2), func.avg(co2), func.min(co2), func.max(co2)
+            ).filter(
                 UserSubmissionDB.city == city,
                 UserSubmissionDB.area == area
-            ).all()
+            ).one()
             
-            if not area_submissions:
-                return self._get_default_comparison()
-            
-            # Calculate statistics
-            co2_values = [s.predicted_co2 for s in area_submissions if s.predicted_co2]
-            if not co2_values:
-                return self._get_default_comparison()
+            if not area_count or not co2_count:
+                return None
             
-            # Get city-wide data
-            city_submissions = db.query(UserSubmissionDB).filter(
+            city_count, city_co2_count, city_avg_co2, city_min_co2, city_max_co2 = db.query(
+                func.count(), func.count(co2), func.avg(co2), func.min(co2), func.max(co2)
+            ).filter(
                 UserSubmissionDB.city == city
-            ).all()
-            city_co2_values = [s.predicted_co2 for s in city_submissions if s.predicted_co2]
+            ).one()
             
-            # Get India-wide data (from CSV)
-            india_data = await self._get_india_data()
+            median_co2 = median_from_buckets(query_buckets(db, city, area), min_co2, max_co2)
+            city_median_co2 = median_from_buckets(query_buckets(db, city), city_min_co2, city_max_co2) if city_co2_count else 0
             
             return {
                 "area_stats": {
-                    "count": len(area_submissions),
-                    "avg_co2": np.mean(co2_values),
-                    "median_co2": np.median(co2_values),
-                    "min_co2": np.min(co2_values),
-                    "max_co2": np.max(co2_values)
+                    "count": area_count,
+                    "avg_co2": float(avg_co2),
+                    "median_co2": median_co2,
+                    "min_co2": float(min_co2),
+                    "max_co2": float(max_co2)
                 },
                 "city_stats": {
-                    "count": len(city_submissions),
-                    "avg_co2": np.mean(city_co2_values) if city_co2_values else 0,
-                    "median_co2": np.median(city_co2_values) if city_co2_values else 0
+                    "count": city_count,
+                    "avg_co2": float(city_avg_co2) if city_co2_count else 0,
+                    "median_co2": city_median_co2
                 },
-                "india_stats": india_data,
-                "peer_rank": self._calculate_peer_rank(co2_values)
+                "peer_rank": self._calculate_peer_rank(co2_count)
             }
-            
-        except Exception as e:
-            logger.error(f"Failed to get peer comparison: {str(e)}")
-            return self._get_default_comparison()
         finally:
             db.close()
 
+    def _ensure_peer_buckets(self):
+        """Build the peer histogram from existing rows once, before it is first used"""
+        if self._peer_buckets_ready:
+            return
+        with self._peer_buckets_lock:
+            if self._peer_buckets_ready:
+                return
+            db = next(get_db())
+            try:
+                rebuild_buckets(db)
+                self._peer_buckets_ready = True
+            finally:
+                db.close()
+
     def _get_default_comparison(self) -> Dict[str, Any]:
         """Return default comparison data when no peer data available"""
         return {
@@ -281,8 +461,12 @@ class HistoryService:
 
     async def _get_india_data(self) -> Dict[str, Any]:
         """Get India-wide statistics from CSV data"""
+        return await self.executor.run_in_thread(self._compute_india_data)
+
+    def _compute_india_data(self) -> Dict[str, Any]:
+        """Compute India-wide statistics from the dataset (blocking)"""
         try:
-            df = pd.read_csv(self.csv_path)
+            df = self.dataset_service.get_frame(CLEANED_DATASET)
             co2_values = df['CarbonEmission'].dropna()
             
             return {
@@ -300,27 +484,31 @@ class HistoryService:
                 "max_co2": 5000.0
             }
 
-    def _calculate_peer_rank(self, co2_values: List[float]) -> int:
-        """Calculate user's rank among peers (0-100, lower is better)"""
-        if not co2_values:
+    def _calculate_peer_rank(self, n: int) -> int:
+        """Calculate user's rank among n peers (0-100, lower is better)"""
+        if not n:
             return 50
         
-        # Sort values and find percentile
-        sorted_values = sorted(co2_values)
-        n = len(sorted_values)
-        
         # Return percentile rank (0-100)
         return int((n - 1) * 100 / n) if n > 1 else 50
 
     async def get_area_statistics(self, city: str, area: str) -> Dict[str, Any]:
-        """Get detailed area statistics and CO2 breakdown"""
+        """Get detailed area statistics and CO2 breakdown
+
+        Errors are raised rather than answered with get_default_area_stats,
+        so callers can keep the placeholder out of their response caches.
+        """
+        return await self.executor.run_in_thread(self._compute_area_statistics, city, area)
+
+    def _compute_area_statistics(self, city: str, area: str) -> Dict[str, Any]:
+        """Compute area statistics from the dataset (blocking)"""
         try:
-            # Load CSV data for area analysis
-            df = pd.read_csv(self.csv_path)
+            # Get the shared dataset for area analysis
+            df = self.dataset_service.get_frame(CLEANED_DATASET)
             area_data = df[(df['city'] == city) & (df['area'] == area)]
             
             if area_data.empty:
-                return self._get_default_area_stats(city, area)
+                return self.get_default_area_stats(city, area)
             
             # Calculate CO2 breakdown by area type using the new emission values
             co2_breakdown = {}
@@ -351,9 +539,9 @@ class HistoryService:
             
         except Exception as e:
             logger.error(f"Failed to get area statistics: {str(e)}")
-            return self._get_default_area_stats(city, area)
+            raise
 
-    def _get_default_area_stats(self, city: str, area: str) -> Dict[str, Any]:
+    def get_default_area_stats(self, city: str, area: str) -> Dict[str, Any]:
         """Return default area statistics with realistic Mumbai/Navi Mumbai values"""
         # Define realistic emission values based on city
         if city == "Mumbai":
@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+import logging
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from services.prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+# Rendered response bodies kept in memory (0 disables) and their lifetime in seconds
+HTTP_CACHE_SIZE = int(os.environ.get("CO2_HTTP_CACHE_SIZE", 512))
+HTTP_CACHE_TTL = float(os.environ.get("CO2_HTTP_CACHE_TTL", 3600))
+# Seconds clients and proxies may reuse a response without revalidating it
+HTTP_CACHE_MAX_AGE = int(os.environ.get("CO2_HTTP_CACHE_MAX_AGE", 0))
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a response identified by its parts (e.g. endpoint, parameters, data versions)"""
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def cache_control(max_age: int = HTTP_CACHE_MAX_AGE) -> str:
+    """Cache-Control for public read-mostly data: reuse for max_age seconds, then revalidate"""
+    if max_age > 0:
+        return f"public, max-age={max_age}, must-revalidate"
+    return "public, no-cache"
+
+
+def format_http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize a payload exactly as FastAPI's JSONResponse does"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy is still current
+
+    If-None-Match takes precedence over If-Modified-Since, as RFC 9110 requires.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/"x" matches "x"
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+class ResponseCache:
+    """Conditional GET handling and rendered JSON bodies for read-mostly endpoints
+
+    Endpoints identify a response by an ETag built from its parameters and the
+    dataset and model versions it depends on. A client holding that ETag gets a
+    304; otherwise the rendered body is served from memory, so repeat responses
+    skip both the computation and JSON serialization. A new dataset or model
+    version changes the ETag, so stale bodies are never served and simply age
+    out of the cache.
+    """
+
+    def __init__(self, max_entries: int = HTTP_CACHE_SIZE, ttl_seconds: float = HTTP_CACHE_TTL,
+                 max_age: int = HTTP_CACHE_MAX_AGE):
+        self.bodies = PredictionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.max_age = max_age
+        self.not_modified = 0
+
+    async def respond(self, headers: Mapping[str, str], etag: str, build: Callable[[], Awaitable[Any]],
+                      last_modified: Optional[datetime] = None) -> Response:
+        """A 304 when the client's copy is current, otherwise the cached or freshly built JSON body"""
+        response_headers = {"ETag": etag, "Cache-Control": cache_control(self.max_age)}
+        if last_modified is not None:
+            response_headers["Last-Modified"] = format_http_date(last_modified)
+
+        if is_not_modified(headers, etag, last_modified):
+            self.not_modified += 1
+            return Response(status_code=304, headers=response_headers)
+
+        body = self.bodies.get(etag)
+        if body is None:
+            body = render_json(await build())
+            self.bodies.put(etag, body)
+        return Response(content=body, media_type="application/json", headers=response_headers)
+
+    def clear(self):
+        self.bodies.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Body cache counters plus the number of 304 responses"""
+        return {**self.bodies.get_stats(), "not_modified": self.not_modified}
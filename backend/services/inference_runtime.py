@@ -0,0 +1,145 @@
+import numpy as np
+from typing import Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TreeEnsemblePredictor:
+    """A fitted sklearn tree ensemble flattened into NumPy arrays
+
+    All trees share one set of node arrays. Leaves point back to themselves,
+    so every row can step down the trees in lockstep for max_depth steps.
+    children holds each node's right child at 2 * node and left child at
+    2 * node + 1, so one lookup indexed by the split outcome picks the next node.
+    """
+
+    # Above this many rows sklearn's compiled traversal is faster than stepping
+    # every tree in lockstep with NumPy, so larger batches use the full model
+    max_batch_rows = 128
+
+    def __init__(self, roots: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 children: np.ndarray, value: np.ndarray, max_depth: int):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_forest(cls, forest) -> "TreeEnsemblePredictor":
+        """Flatten a fitted RandomForestRegressor"""
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        children = np.empty(2 * offset, dtype=np.intp)
+        children[0::2] = np.concatenate(rights)
+        children[1::2] = np.concatenate(lefts)
+
+        return cls(
+            roots=np.array(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=children,
+            value=np.concatenate(values).astype(np.float64),
+            max_depth=max_depth
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_starts = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+
+        # Same split rule as sklearn: float32 feature <= float64 threshold goes left
+        for _ in range(self.max_depth):
+            go_left = flat_X.take(row_starts + self.feature.take(node)) <= self.threshold.take(node)
+            node = self.children.take(2 * node + go_left)
+
+        # Sum trees in order, as RandomForestRegressor does, so results match exactly
+        leaf_values = self.value.take(node)
+        total = np.zeros(n_rows)
+        for i in range(leaf_values.shape[1]):
+            total += leaf_values[:, i]
+        return total / leaf_values.shape[1]
+
+
+class BoosterPredictor:
+    """An XGBoost model served through the native booster's inplace_predict"""
+    max_batch_rows = None
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    @classmethod
+    def from_xgb_regressor(cls, model) -> "BoosterPredictor":
+        return cls(model.get_booster())
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(self.booster.inplace_predict(X, missing=np.nan), dtype=float)
+
+
+class DenseNetworkPredictor:
+    """A Keras stack of Dense layers evaluated with NumPy, with the input scaler applied first"""
+    max_batch_rows = None
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, layers: List[Tuple[np.ndarray, np.ndarray, str]]):
+        self.mean = mean
+        self.scale = scale
+        self.layers = layers
+
+    @classmethod
+    def from_keras(cls, model, scaler) -> "DenseNetworkPredictor":
+        """Export Dense layer weights; Dropout does nothing at inference and is dropped"""
+        layers = []
+        for layer in model.layers:
+            if layer.__class__.__name__ == 'Dropout':
+                continue
+            if layer.__class__.__name__ != 'Dense':
+                raise ValueError(f"Unsupported layer for export: {layer.__class__.__name__}")
+            activation = layer.activation.__name__
+            if activation not in ('relu', 'linear'):
+                raise ValueError(f"Unsupported activation for export: {activation}")
+            weights, bias = layer.get_weights()
+            layers.append((weights.astype(np.float32), bias.astype(np.float32), activation))
+
+        return cls(mean=scaler.mean_, scale=scaler.scale_, layers=layers)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # Round after each step like StandardScaler does on float32 input
+        output = np.asarray(X, dtype=np.float32)
+        output = (output - self.mean).astype(np.float32)
+        output = (output / self.scale).astype(np.float32)
+        for weights, bias, activation in self.layers:
+            output = output @ weights + bias
+            if activation == 'relu':
+                np.maximum(output, 0, out=output)
+        return output[:, 0].astype(float)
+
+
+def export_model(name: str, model: Any, scaler: Optional[Any] = None) -> Any:
+    """Convert a trained model into its lightweight serving form"""
+    if name == 'random_forest':
+        return TreeEnsemblePredictor.from_forest(model)
+    if name == 'xgboost':
+        return BoosterPredictor.from_xgb_regressor(model)
+    if name == 'neural_network':
+        return DenseNetworkPredictor.from_keras(model, scaler)
+    raise KeyError(f"No inference export for model: {name}")
@@ -1,77 +1,138 @@
 import pandas as pd
 import numpy as np
-import joblib
 import os
 import sys
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+import json
+import hashlib
+import time
+import sklearn
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
 import logging
+from pydantic import ValidationError
+from sqlalchemy import func
 
 # Add backend directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from services.executor_service import get_executor_service
+from services.dataset_cache import read_dataset
+from services.feature_pipeline import FeaturePipeline
+from services.prediction_cache import PredictionCache
+from services.model_registry import ModelBundle, ModelRegistry, build_bundle
+from services.training_orchestrator import TrainingOrchestrator, TrainingData, TRAINERS, split_training_data, update_trained_models
+from models.database import get_db, UserSubmissionDB
+from models.user import UserSubmission
+
 import xgboost as xgb
-# Try to import TensorFlow, but make it optional
-try:
-    import tensorflow as tf
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import Dense, Dropout
-    from tensorflow.keras.optimizers import Adam
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
+# TensorFlow is optional and only imported when a neural network is trained or loaded
+from services.model_backends import get_model_backend
+TENSORFLOW_AVAILABLE = get_model_backend('neural_network').available
+if not TENSORFLOW_AVAILABLE:
     print("Warning: TensorFlow not available. Some ML features will be limited.")
 import warnings
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# Dataset column -> UserSubmission field for survey inputs
+SUBMISSION_FIELDS = {
+    'Body Type': 'body_type',
+    'Sex': 'sex',
+    'Diet': 'diet',
+    'How Often Shower': 'shower_frequency',
+    'Heating Energy Source': 'heating_energy',
+    'Social Activity': 'social_activity',
+    'Monthly Grocery Bill': 'grocery_bill',
+    'Frequency of Traveling by Air': 'air_travel',
+    'Vehicle Monthly Distance Km': 'vehicle_distance',
+    'Waste Bag Weekly Count': 'waste_bag_count',
+    'How Long TV PC Daily Hour': 'tv_pc_hours',
+    'How Many New Clothes Monthly': 'new_clothes',
+    'How Long Internet Daily Hour': 'internet_hours',
+    'Energy efficiency': 'energy_efficiency',
+}
+
+# Dataset column -> UserSubmission field for calculated values
+SUBMISSION_CALCULATED_FIELDS = {
+    'lpg_kg': 'lpg_kg',
+    'flights_hours': 'flights_hours',
+    'meat_meals': 'meat_meals',
+    'dining_out': 'dining_out',
+    'shopping_spend': 'shopping_spend',
+    'waste_kg': 'waste_kg',
+}
+
+AREA_TYPE_COLUMNS = ['Residential', 'Corporate', 'Industrial', 'Vehicular', 'Construction', 'Airport']
+
+# Other numeric UserSubmission fields read by prediction smoothing
+SMOOTHING_FIELDS = ['transport', 'electricity']
+
+# Model input features, in training order
+FEATURE_COLUMNS = [
+    'Body Type', 'Sex', 'Diet', 'How Often Shower', 'Heating Energy Source',
+    'Social Activity', 'Monthly Grocery Bill', 'Frequency of Traveling by Air',
+    'Vehicle Monthly Distance Km', 'Waste Bag Weekly Count',
+    'How Long TV PC Daily Hour', 'How Many New Clothes Monthly', 'How Long Internet Daily Hour',
+    'Energy efficiency', 'lpg_kg', 'flights_hours', 'meat_meals', 'dining_out',
+    'shopping_spend', 'waste_kg', 'Residential', 'Corporate', 'Industrial',
+    'Vehicular', 'Construction', 'Airport', 'transport_waste_interaction',
+    'grocery_meat_interaction', 'energy_tech_interaction', 'waste_efficiency',
+    'energy_efficiency_score', 'lifestyle_score'
+]
+
+# Bump when training or feature engineering changes in a way that makes
+# previously saved model artifacts unusable
+MODEL_ARTIFACT_VERSION = 3
+
+# Base training rows replayed alongside each new submission in an incremental
+# update, so the models do not drift towards the most recent submissions
+INCREMENTAL_REPLAY_RATIO = int(os.environ.get("CO2_INCREMENTAL_REPLAY_RATIO", 4))
+
+# Stored submissions only train the models once they have a reported actual
+# CO2. Opting in also trains on the models' own stored predictions
+# (pseudo-labels), which adds no new information about the target
+TRAIN_ON_PREDICTIONS = os.environ.get("CO2_TRAIN_ON_PREDICTIONS", "false").lower() in ("1", "true", "yes")
+
+
 class MLService:
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
-        self.encoders = {}
-        self.models_loaded = False
-        self.model_performance = {}
+        # The served model bundle, only ever replaced as a whole
+        self.bundle: Optional[ModelBundle] = None
+        # A pinned version keeps serving when retraining saves newer ones
+        self.pinned = False
         self.csv_path = "../src/data/Carbon_Emission_With_Seasons.csv"
+        self.artifacts_dir = "models/artifacts"
+        self.executor = get_executor_service()
+        self.prediction_cache = PredictionCache()
+
+    @property
+    def models_loaded(self) -> bool:
+        return self.bundle is not None
         
     async def initialize_models(self):
-        """Initialize and train all ML models"""
+        """Load the served model version for the current training data, or train one"""
         try:
             logger.info("Starting ML model initialization...")
             
+            # Reuse saved models when they were trained on the same data and features
+            artifact_key = await self.executor.run_in_thread(self._compute_artifact_key)
+            if await self.executor.run_in_thread(self._load_active_version, artifact_key):
+                logger.info(f"ML models loaded from saved artifacts: {artifact_key[:12]} {self.bundle.version}")
+                return
+            
             # Load and prepare data
             df = await self._load_and_prepare_data()
-            logger.info(f"Data loaded successfully: {df.shape}")
-            
-            # Train multiple models with error handling
-            try:
-                await self._train_random_forest(df)
-                logger.info("Random Forest model trained successfully")
-            except Exception as e:
-                logger.error(f"Random Forest training failed: {str(e)}")
+            submissions, last_submission_id = await self._load_submission_data()
+            logger.info(f"Data loaded successfully: {df.shape}, {len(submissions)} stored submissions")
             
-            try:
-                await self._train_xgboost(df)
-                logger.info("XGBoost model trained successfully")
-            except Exception as e:
-                logger.error(f"XGBoost training failed: {str(e)}")
-            
-            try:
-                await self._train_neural_network(df)
-                logger.info("Neural Network model trained successfully")
-            except Exception as e:
-                logger.error(f"Neural Network training failed: {str(e)}")
+            # Train the candidate models together; failures are logged per model
+            bundle = await self._train_bundle(artifact_key, df, submissions, last_submission_id)
             
-            # Select best model
-            await self._select_best_model()
+            # Save models so the next startup can skip training
+            await self._save_models(bundle)
             
-            self.models_loaded = True
-            logger.info("All ML models initialized successfully")
+            self._activate(bundle, pinned=False)
             logger.info("All ML models initialized successfully")
             
         except Exception as e:
@@ -81,18 +142,17 @@ class MLService:
     async def _load_and_prepare_data(self) -> pd.DataFrame:
         """Load and preprocess the CSV data"""
         try:
-            df = pd.read_csv(self.csv_path)
-            
-            # Clean and prepare features
-            df = self._clean_data(df)
-            df = self._engineer_features(df)
-            
-            return df
+            return await self.executor.run_in_thread(self._read_and_prepare_data)
             
         except Exception as e:
             logger.error(f"Data loading failed: {str(e)}")
             raise
 
+    def _read_and_prepare_data(self) -> pd.DataFrame:
+        """Read and clean the training dataset (blocking)"""
+        df = read_dataset(self.csv_path)
+        return self._clean_data(df)
+
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean and validate the dataset"""
         # Remove rows with missing target values
@@ -105,197 +165,190 @@ class MLService:
         # Handle categorical missing values
         categorical_columns = df.select_dtypes(include=['object']).columns
         df[categorical_columns] = df[categorical_columns].fillna('Unknown')
+        for col in df.select_dtypes(include=['category']).columns:
+            if df[col].isna().any():
+                if 'Unknown' not in df[col].cat.categories:
+                    df[col] = df[col].cat.add_categories(['Unknown'])
+                df[col] = df[col].fillna('Unknown')
         
         return df
 
-    def _engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Create additional features for better predictions"""
-        # Create interaction features (using available columns)
-        df['grocery_meat_interaction'] = df['Monthly Grocery Bill'] * df['meat_meals']
-        df['energy_tech_interaction'] = df['How Long TV PC Daily Hour'] * df['How Long Internet Daily Hour']
-        
-        # Create efficiency scores (using available columns)
-        df['waste_efficiency'] = df['Waste Bag Weekly Count'] / 5  # Simplified since Waste Bag Size was dropped
-        df['energy_efficiency_score'] = df['Energy efficiency'].map({'Yes': 3, 'Sometimes': 2, 'No': 1})
-        
-        # Create lifestyle scores
-        df['lifestyle_score'] = (
-            df['How Long TV PC Daily Hour'] + 
-            df['How Long Internet Daily Hour'] + 
-            df['How Many New Clothes Monthly']
-        )
-        
-        return df
-
-    async def _train_random_forest(self, df: pd.DataFrame):
-        """Train Random Forest model"""
+    async def _load_submission_data(self) -> Tuple[pd.DataFrame, int]:
+        """Load every stored submission as training rows, with the highest submission id read"""
         try:
-            X, y = self._prepare_features(df)
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Train Random Forest
-            rf_model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
-            
-            rf_model.fit(X_train, y_train)
-            
-            # Evaluate
-            y_pred = rf_model.predict(X_test)
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            self.models['random_forest'] = rf_model
-            self.model_performance['random_forest'] = {
-                'mae': mae,
-                'r2': r2,
-                'feature_importance': dict(zip(X.columns, rf_model.feature_importances_))
-            }
-            
-            logger.info(f"Random Forest trained - MAE: {mae:.2f}, R2: {r2:.3f}")
+            return await self.executor.run_in_thread(self._read_submission_frame, 0)
             
         except Exception as e:
-            logger.error(f"Random Forest training failed: {str(e)}")
+            # Training on the base dataset alone is still useful
+            logger.warning(f"Stored submissions not available for training: {str(e)}")
+            return pd.DataFrame(), 0
 
-    async def _train_xgboost(self, df: pd.DataFrame):
-        """Train XGBoost model"""
-        try:
-            X, y = self._prepare_features(df)
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Train XGBoost
-            xgb_model = xgb.XGBRegressor(
-                n_estimators=200,
-                max_depth=8,
-                learning_rate=0.1,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                random_state=42
-            )
-            
-            xgb_model.fit(X_train, y_train)
-            
-            # Evaluate
-            y_pred = xgb_model.predict(X_test)
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            self.models['xgboost'] = xgb_model
-            self.model_performance['xgboost'] = {
-                'mae': mae,
-                'r2': r2,
-                'feature_importance': dict(zip(X.columns, xgb_model.feature_importances_))
-            }
-            
-            logger.info(f"XGBoost trained - MAE: {mae:.2f}, R2: {r2:.3f}")
-            
-        except Exception as e:
-            logger.error(f"XGBoost training failed: {str(e)}")
+    def _read_submission_frame(self, after_id: int) -> Tuple[pd.DataFrame, int]:
+        """Read stored submissions newer than a row id as dataset rows (blocking)
 
-    async def _train_neural_network(self, df: pd.DataFrame):
-        """Train Neural Network model"""
-        if not TENSORFLOW_AVAILABLE:
-            logger.warning("TensorFlow not available, skipping neural network training")
-            return None, 0.0, 0.0
-        
+        The target is the reported actual CO2; rows without one are skipped
+        unless TRAIN_ON_PREDICTIONS, which falls back to the stored
+        prediction. Returns the rows and the highest id read.
+        """
+        if TRAIN_ON_PREDICTIONS:
+            target = func.coalesce(UserSubmissionDB.actual_co2, UserSubmissionDB.predicted_co2)
+        else:
+            target = UserSubmissionDB.actual_co2
+        db = next(get_db())
         try:
-            X, y = self._prepare_features(df)
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-            
-            # Build neural network
-            model = Sequential([
-                Dense(128, activation='relu', input_shape=(X_train_scaled.shape[1],)),
-                Dropout(0.3),
-                Dense(64, activation='relu'),
-                Dropout(0.3),
-                Dense(32, activation='relu'),
-                Dropout(0.2),
-                Dense(1, activation='linear')
-            ])
-            
-            model.compile(
-                optimizer=Adam(learning_rate=0.001),
-                loss='mse',
-                metrics=['mae']
-            )
-            
-            # Train model
-            history = model.fit(
-                X_train_scaled, y_train,
-                epochs=100,
-                batch_size=32,
-                validation_split=0.2,
-                verbose=0
-            )
-            
-            # Evaluate
-            y_pred = model.predict(X_test_scaled, verbose=0).flatten()
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            self.models['neural_network'] = model
-            self.scalers['neural_network'] = scaler
-            self.model_performance['neural_network'] = {
-                'mae': mae,
-                'r2': r2,
-                'training_history': history.history
-            }
-            
-            logger.info(f"Neural Network trained - MAE: {mae:.2f}, R2: {r2:.3f}")
-            
-        except Exception as e:
-            logger.error(f"Neural Network training failed: {str(e)}")
-
-    def _prepare_features(self, df: pd.DataFrame):
-        """Prepare features for training"""
-        # Select relevant features
-        feature_columns = [
-            'Body Type', 'Sex', 'Diet', 'How Often Shower', 'Heating Energy Source',
- 'Social Activity', 'Monthly Grocery Bill', 'Frequency of Traveling by Air',
-            'Vehicle Monthly Distance Km',  'Waste Bag Weekly Count',
-            'How Long TV PC Daily Hour', 'How Many New Clothes Monthly', 'How Long Internet Daily Hour',
-            'Energy efficiency', 'lpg_kg', 'flights_hours', 'meat_meals', 'dining_out',
-            'shopping_spend', 'waste_kg', 'Residential', 'Corporate', 'Industrial',
-            'Vehicular', 'Construction', 'Airport', 'transport_waste_interaction',
-            'grocery_meat_interaction', 'energy_tech_interaction', 'waste_efficiency',
-            'energy_efficiency_score', 'lifestyle_score'
-        ]
+            rows = db.query(UserSubmissionDB.id, UserSubmissionDB.submission_data, target).filter(
+                UserSubmissionDB.id > after_id,
+                target.isnot(None)
+            ).order_by(UserSubmissionDB.id).all()
+        finally:
+            db.close()
+        
+        submissions, targets = [], []
+        for _, submission_data, co2 in rows:
+            try:
+                submissions.append(UserSubmission(**submission_data))
+                targets.append(co2)
+            except (TypeError, ValidationError):
+                logger.warning("Skipping stored submission that no longer validates")
+        
+        if not submissions:
+            return pd.DataFrame(), rows[-1][0] if rows else after_id
         
-        # Filter available columns
-        available_columns = [col for col in feature_columns if col in df.columns]
-        X = df[available_columns].copy()
-        y = df['CarbonEmission']
-        
-        # Encode categorical variables
-        categorical_columns = X.select_dtypes(include=['object']).columns
-        for col in categorical_columns:
-            if col not in self.encoders:
-                self.encoders[col] = LabelEncoder()
-                X[col] = self.encoders[col].fit_transform(X[col].astype(str))
+        data = self._submissions_to_columns(submissions)
+        data['CarbonEmission'] = targets
+        return pd.DataFrame(data), rows[-1][0]
+
+    async def _train_bundle(self, artifact_key: str, df: pd.DataFrame, submissions: pd.DataFrame,
+                            last_submission_id: int) -> ModelBundle:
+        """Train all candidate models on one shared train/test split into a new model version
+
+        Stored submissions only join the training side, so the test split is
+        the same base dataset rows that incremental updates are scored on.
+        """
+        start = time.perf_counter()
+        feature_pipeline, data = await self.executor.run_in_thread(self._training_split, df, submissions)
+        prepare_seconds = time.perf_counter() - start
+        
+        model_names = []
+        for name in TRAINERS:
+            if get_model_backend(name).available:
+                model_names.append(name)
             else:
-                X[col] = self.encoders[col].transform(X[col].astype(str))
+                logger.warning(f"{get_model_backend(name).module_name} not available, skipping {name} training")
         
-        return X, y
+        outcome = await self.executor.run_in_thread(TrainingOrchestrator(model_names).train, data)
+        report = outcome["report"]
+        report["prepare_seconds"] = prepare_seconds
+        report["total_seconds"] = time.perf_counter() - start
+        
+        return await self.executor.run_in_thread(
+            self._bundle_from_results, artifact_key, feature_pipeline, outcome["results"], report, last_submission_id
+        )
+
+    async def _update_bundle(self, base: ModelBundle) -> Optional[ModelBundle]:
+        """Update a freshly loaded copy of a model version with submissions stored since it was trained
+
+        Random Forest gains extra warm-started trees, XGBoost continues boosting
+        and the neural network runs a few more epochs, each on the new rows plus
+        a replay sample of the base training data, so the cost follows the
+        number of new submissions rather than the dataset size. Returns None
+        when there are no new submissions.
+        """
+        start = time.perf_counter()
+        submissions, last_submission_id = await self.executor.run_in_thread(
+            self._read_submission_frame, base.last_submission_id
+        )
+        if submissions.empty:
+            logger.info("No new submissions since the last model update")
+            return None
+        
+        logger.info(f"Updating model version {base.version} with {len(submissions)} new submissions")
+        df = await self._load_and_prepare_data()
+        data = await self.executor.run_in_thread(
+            self._update_split, base.feature_pipeline, df, submissions, last_submission_id
+        )
+        prepare_seconds = time.perf_counter() - start
+        
+        outcome = await self.executor.run_in_thread(update_trained_models, dict(base.models), dict(base.scalers), data)
+        report = outcome["report"]
+        report["base_version"] = base.version
+        report["new_rows"] = len(submissions)
+        report["prepare_seconds"] = prepare_seconds
+        report["total_seconds"] = time.perf_counter() - start
+        
+        return await self.executor.run_in_thread(
+            self._bundle_from_results, base.artifact_key, base.feature_pipeline, outcome["results"], report,
+            last_submission_id, base
+        )
+
+    def _bundle_from_results(self, artifact_key: str, feature_pipeline: FeaturePipeline, results: Dict[str, Any],
+                             report: Dict[str, Any], last_submission_id: int,
+                             base: Optional[ModelBundle] = None) -> ModelBundle:
+        """Combine training results, and any models they update, into a new version (blocking)"""
+        models = dict(base.models) if base else {}
+        scalers = dict(base.scalers) if base else {}
+        performance = dict(base.model_performance) if base else {}
+        for name, result in results.items():
+            if result.error:
+                continue
+            models[name] = result.model
+            if result.scaler is not None:
+                scalers[name] = result.scaler
+            performance[name] = result.performance
+        
+        return build_bundle(
+            version=self._registry(artifact_key).next_version(),
+            artifact_key=artifact_key,
+            models=models,
+            scalers=scalers,
+            feature_pipeline=feature_pipeline,
+            model_performance=performance,
+            last_submission_id=last_submission_id,
+            training_report=report
+        )
+
+    def _training_split(self, df: pd.DataFrame, submissions: pd.DataFrame) -> Tuple[FeaturePipeline, TrainingData]:
+        """Fit the feature pipeline, split the base dataset and add stored submissions to the training side (blocking)"""
+        feature_pipeline = FeaturePipeline.fit(df, FEATURE_COLUMNS)
+        X, y = self._prepare_features(feature_pipeline, df)
+        data = split_training_data(X, y, feature_pipeline.columns)
+        if submissions.empty:
+            return feature_pipeline, data
+        
+        X_new, y_new = self._prepare_submission_features(feature_pipeline, submissions)
+        return feature_pipeline, data._replace(
+            X_train=np.concatenate([data.X_train, X_new]),
+            y_train=np.concatenate([data.y_train, y_new])
+        )
+
+    def _update_split(self, feature_pipeline: FeaturePipeline, df: pd.DataFrame, submissions: pd.DataFrame,
+                      seed: int) -> TrainingData:
+        """Training rows for an incremental update: the new submissions plus a replay sample (blocking)"""
+        X, y = self._prepare_features(feature_pipeline, df)
+        base = split_training_data(X, y, feature_pipeline.columns)
+        X_new, y_new = self._prepare_submission_features(feature_pipeline, submissions)
+        
+        rng = np.random.default_rng(seed)
+        replay = rng.choice(len(base.X_train), min(len(base.X_train), len(X_new) * INCREMENTAL_REPLAY_RATIO), replace=False)
+        return base._replace(
+            X_train=np.concatenate([X_new, base.X_train[replay]]),
+            y_train=np.concatenate([y_new, base.y_train[replay]])
+        )
+
+    def _prepare_submission_features(self, feature_pipeline: FeaturePipeline, submissions: pd.DataFrame):
+        """Feature matrix and target for stored submissions, dropping rows with labels the pipeline has not seen"""
+        known = feature_pipeline.known_rows(submissions)
+        if not known.all():
+            logger.warning(f"Skipping {int((~known).sum())} stored submissions with unseen feature values")
+        submissions = submissions[known]
+        return feature_pipeline.transform(submissions), submissions['CarbonEmission'].to_numpy(dtype=float)
 
-    async def _select_best_model(self):
-        """Select the best performing model"""
-        if not self.model_performance:
-            return
+    def _prepare_features(self, feature_pipeline: FeaturePipeline, df: pd.DataFrame):
+        """Prepare the training feature matrix and target"""
+        X = feature_pipeline.transform(df)
+        y = df['CarbonEmission'].to_numpy()
         
-        # Select model with best R2 score
-        best_model = max(self.model_performance.items(), key=lambda x: x[1]['r2'])
-        self.best_model_name = best_model[0]
-        logger.info(f"Best model selected: {self.best_model_name}")
+        return X, y
 
     async def predict_co2(self, submission) -> Dict[str, Any]:
         """Predict CO2 emissions for a user submission"""
@@ -303,235 +356,362 @@ class MLService:
             if not self.models_loaded:
                 await self.initialize_models()
             
-            # Convert submission to DataFrame
-            submission_df = self._submission_to_dataframe(submission)
+            # Identical model inputs against the same model version give the same result
+            bundle = self.bundle
+            cache_key = (bundle.artifact_key, bundle.version, self._prediction_cache_key(submission))
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
             
-            # Prepare features
-            X = self._prepare_submission_features(submission_df)
+            # Run feature preparation and inference off the event loop
+            results = await self.executor.run_in_thread(self._predict_rows, [submission], bundle)
+            self.prediction_cache.put(cache_key, results[0])
+            return dict(results[0])
             
-            # Get prediction from best model
-            if self.best_model_name == 'neural_network':
-                X_scaled = self.scalers['neural_network'].transform(X)
-                prediction = self.models['neural_network'].predict(X_scaled, verbose=0)[0][0]
-            else:
-                prediction = self.models[self.best_model_name].predict(X)[0]
-            
-            # Apply prediction smoothing and validation
-            prediction = self._smooth_prediction(prediction, submission)
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            raise
+
+    async def predict_batch(self, submissions: List[Any], skip_unknown: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """Predict CO2 emissions for many user submissions in one model call
+
+        With skip_unknown, submissions with labels the served model was not
+        trained on get None instead of failing the whole batch.
+        """
+        try:
+            if not self.models_loaded:
+                await self.initialize_models()
             
-            # Calculate confidence based on model performance
-            confidence = min(0.95, max(0.6, self.model_performance[self.best_model_name]['r2']))
+            if not submissions:
+                return []
             
-            return {
-                "predicted_co2": float(prediction),
-                "confidence": float(confidence),
-                "model_used": self.best_model_name
-            }
+            # Run feature preparation and inference off the event loop
+            if skip_unknown:
+                return await self.executor.run_in_thread(self._predict_known_rows, submissions, self.bundle)
+            return await self.executor.run_in_thread(self._predict_rows, submissions, self.bundle)
             
         except Exception as e:
-            logger.error(f"Prediction failed: {str(e)}")
+            logger.error(f"Batch prediction failed: {str(e)}")
             raise
 
-    def _submission_to_dataframe(self, submission) -> pd.DataFrame:
-        """Convert user submission to DataFrame format"""
-        data = {
-            'Body Type': submission.body_type,
-            'Sex': submission.sex,
-            'Diet': submission.diet,
-            'How Often Shower': submission.shower_frequency,
-            'Heating Energy Source': submission.heating_energy,
-            'Social Activity': submission.social_activity,
-            'Monthly Grocery Bill': submission.grocery_bill,
-            'Frequency of Traveling by Air': submission.air_travel,
-            'Vehicle Monthly Distance Km': submission.vehicle_distance,
-            'Waste Bag Weekly Count': submission.waste_bag_count,
-            'How Long TV PC Daily Hour': submission.tv_pc_hours,
-            'How Many New Clothes Monthly': submission.new_clothes,
-            'How Long Internet Daily Hour': submission.internet_hours,
-            'Energy efficiency': submission.energy_efficiency,
-            'lpg_kg': submission.lpg_kg or 0,
-            'flights_hours': submission.flights_hours or 0,
-            'meat_meals': submission.meat_meals or 0,
-            'dining_out': submission.dining_out or 0,
-            'shopping_spend': submission.shopping_spend or 0,
-            'waste_kg': submission.waste_kg or 0,
-            'Residential': 1 if 'Residential' in submission.area else 0,
-            'Corporate': 1 if 'Corporate' in submission.area else 0,
-            'Industrial': 1 if 'Industrial' in submission.area else 0,
-            'Vehicular': 1 if 'Vehicular' in submission.area else 0,
-            'Construction': 1 if 'Construction' in submission.area else 0,
-            'Airport': 1 if 'Airport' in submission.area else 0,
-        }
+    def _prediction_cache_key(self, submission) -> str:
+        """Canonical hash of the submission fields that feed the model and prediction smoothing"""
+        def canonical(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+            return str(value)
+        
+        values = [canonical(getattr(submission, field)) for field in SUBMISSION_FIELDS.values()]
+        values += [float(getattr(submission, field, None) or 0) for field in SUBMISSION_CALCULATED_FIELDS.values()]
+        values += [float(getattr(submission, field, None) or 0) for field in SMOOTHING_FIELDS]
+        # The area only reaches the model through its area type flags
+        values += [area_type in submission.area for area_type in AREA_TYPE_COLUMNS]
         
-        return pd.DataFrame([data])
+        return hashlib.sha256(json.dumps(values, separators=(',', ':')).encode()).hexdigest()
 
-    def _prepare_submission_features(self, df: pd.DataFrame):
-        """Prepare features for prediction"""
-        # Create interaction features
-        # Removed transport_waste_interaction since Transport column was dropped
-        df['grocery_meat_interaction'] = df['Monthly Grocery Bill'] * df['meat_meals']
-        df['energy_tech_interaction'] = df['How Long TV PC Daily Hour'] * df['How Long Internet Daily Hour']
+    def _models_changed(self):
+        """Invalidate cached predictions once a different model version is served"""
+        self.prediction_cache.clear()
+
+    def _predict_rows(self, submissions: List[Any], bundle: ModelBundle) -> List[Dict[str, Any]]:
+        """Score submissions with one model call against one model version (blocking)"""
+        best_model_name = bundle.best_model_name
         
-        # Create efficiency scores
-        df['waste_efficiency'] = df['Waste Bag Weekly Count'] / 5  # Simplified since Waste Bag Size was dropped
-        df['energy_efficiency_score'] = df['Energy efficiency'].map({'Yes': 3, 'Sometimes': 2, 'No': 1})
+        # Build the feature matrix for all submissions at once
+        X = bundle.feature_pipeline.transform(self._submissions_to_columns(submissions))
         
-        # Create lifestyle scores
-        df['lifestyle_score'] = (
-            df['How Long TV PC Daily Hour'] + 
-            df['How Long Internet Daily Hour'] + 
-            df['How Many New Clothes Monthly']
-        )
+        # Get predictions from the exported best model, or the full model if export
+        # failed or the batch is too large for the exported form to be faster
+        inference_model = bundle.inference_model
+        if inference_model is not None and (
+            inference_model.max_batch_rows is None
+            or len(X) <= inference_model.max_batch_rows
+            or best_model_name not in bundle.models
+        ):
+            predictions = inference_model.predict(X)
+        elif best_model_name == 'neural_network':
+            X_scaled = bundle.scalers['neural_network'].transform(X)
+            predictions = bundle.models['neural_network'].predict(X_scaled, verbose=0).flatten()
+        else:
+            predictions = np.asarray(bundle.models[best_model_name].predict(X), dtype=float)
         
-        # Select features in same order as training
-        feature_columns = [
-            'Body Type', 'Sex', 'Diet', 'How Often Shower', 'Heating Energy Source',
- 'Social Activity', 'Monthly Grocery Bill', 'Frequency of Traveling by Air',
-            'Vehicle Monthly Distance Km',  'Waste Bag Weekly Count',
-            'How Long TV PC Daily Hour', 'How Many New Clothes Monthly', 'How Long Internet Daily Hour',
-            'Energy efficiency', 'lpg_kg', 'flights_hours', 'meat_meals', 'dining_out',
-            'shopping_spend', 'waste_kg', 'Residential', 'Corporate', 'Industrial',
-            'Vehicular', 'Construction', 'Airport', 'transport_waste_interaction',
-            'grocery_meat_interaction', 'energy_tech_interaction', 'waste_efficiency',
-            'energy_efficiency_score', 'lifestyle_score'
+        # Apply prediction smoothing and validation to all rows
+        predictions = self._smooth_predictions(predictions, submissions)
+        
+        # Calculate confidence based on model performance
+        confidence = float(min(0.95, max(0.6, bundle.model_performance[best_model_name]['r2'])))
+        
+        return [
+            {
+                "predicted_co2": float(prediction),
+                "confidence": confidence,
+                "model_used": best_model_name,
+                "model_version": bundle.version
+            }
+            for prediction in predictions
         ]
+
+    def _predict_known_rows(self, submissions: List[Any], bundle: ModelBundle) -> List[Optional[Dict[str, Any]]]:
+        """Score the submissions the model can encode, with None for the rest (blocking)"""
+        known = bundle.feature_pipeline.known_rows(self._submissions_to_columns(submissions))
+        scored = iter(self._predict_rows([s for s, ok in zip(submissions, known) if ok], bundle) if known.any() else [])
+        return [next(scored) if ok else None for ok in known]
+
+    def _submissions_to_columns(self, submissions: List[Any]) -> Dict[str, List[Any]]:
+        """Convert user submissions to dataset columns, one value per submission"""
+        data = {
+            column: [getattr(submission, field) for submission in submissions]
+            for column, field in SUBMISSION_FIELDS.items()
+        }
         
-        available_columns = [col for col in feature_columns if col in df.columns]
-        X = df[available_columns].copy()
+        # Calculated fields default to 0 when they have not been computed
+        for column, field in SUBMISSION_CALCULATED_FIELDS.items():
+            data[column] = [getattr(submission, field) or 0 for submission in submissions]
         
-        # Encode categorical variables
-        categorical_columns = X.select_dtypes(include=['object']).columns
-        for col in categorical_columns:
-            if col in self.encoders:
-                X[col] = self.encoders[col].transform(X[col].astype(str))
-            else:
-                # Handle unseen categories
-                X[col] = 0
+        # Area type flags are set when the area name mentions the type
+        for area_type in AREA_TYPE_COLUMNS:
+            data[area_type] = [int(area_type in submission.area) for submission in submissions]
         
-        return X
+        return data
 
     def _smooth_prediction(self, prediction: float, submission) -> float:
         """Apply smoothing and validation to predictions for better accuracy"""
         try:
-            # Calculate a more accurate baseline prediction based on survey inputs
-            baseline = 0
-            
-            # Transportation contribution
-            if submission.transport > 0:
-                baseline += submission.vehicle_distance * 0.21  # kg CO2 per km
-            
-            # Air travel contribution
-            if hasattr(submission, 'flights_hours') and submission.flights_hours:
-                baseline += submission.flights_hours * 90  # kg CO2 per hour
-            
-            # Energy contribution - use actual electricity input if available
-            if hasattr(submission, 'electricity') and submission.electricity:
-                baseline += submission.electricity * 0.45  # Direct electricity to CO2 conversion
-            elif hasattr(submission, 'tv_pc_hours') and submission.tv_pc_hours:
-                # Fallback: estimate from TV/PC hours
-                estimated_electricity = submission.tv_pc_hours * 0.1 * 30  # 0.1 kW average * 30 days
-                baseline += estimated_electricity * 0.45  # 0.45 kg CO2 per kWh
-            
-            # LPG contribution
-            if hasattr(submission, 'lpg_kg') and submission.lpg_kg:
-                baseline += submission.lpg_kg * 3.0  # kg CO2 per kg LPG
-            
-            # Diet contribution
-            if hasattr(submission, 'meat_meals') and submission.meat_meals:
-                baseline += submission.meat_meals * 2.5  # kg CO2 per meal
-            
-            # Dining out contribution
-            if hasattr(submission, 'dining_out') and submission.dining_out:
-                baseline += submission.dining_out * 3.2  # kg CO2 per meal
-            
-            # Waste contribution
-            if hasattr(submission, 'waste_kg') and submission.waste_kg:
-                baseline += submission.waste_kg * 0.5  # kg CO2 per kg waste
-            
-            # Apply smoothing: blend ML prediction with baseline
-            if baseline > 0:
-                # More conservative blending: 50% ML + 50% baseline for better accuracy
-                smoothed = 0.5 * prediction + 0.5 * baseline
-                
-                # Tighter bounds: 0.7x to 1.5x baseline for more realistic predictions
-                min_reasonable = baseline * 0.7
-                max_reasonable = baseline * 1.5
-                
-                smoothed = max(min_reasonable, min(smoothed, max_reasonable))
-                
-                # Additional check: if ML prediction is way off, use mostly baseline
-                if prediction > baseline * 3:
-                    smoothed = baseline * 1.1  # Just 10% above baseline
-                    logger.info(f"ML prediction too high, using conservative estimate: {prediction:.2f} -> {smoothed:.2f}")
-                elif prediction < baseline * 0.3:
-                    smoothed = baseline * 0.9  # Just 10% below baseline
-                    logger.info(f"ML prediction too low, using conservative estimate: {prediction:.2f} -> {smoothed:.2f}")
-                
-                logger.info(f"Prediction smoothed: {prediction:.2f} -> {smoothed:.2f} (baseline: {baseline:.2f})")
-                return smoothed
-            
-            return prediction
-            
+            return float(self._smooth_predictions(np.array([prediction], dtype=float), [submission])[0])
         except Exception as e:
             logger.warning(f"Prediction smoothing failed: {str(e)}")
             return prediction
 
+    def _smooth_predictions(self, predictions: np.ndarray, submissions: List[Any]) -> np.ndarray:
+        """Blend model predictions with a survey-based baseline, one row per submission"""
+        def values(field: str) -> np.ndarray:
+            return np.array([getattr(s, field, None) or 0 for s in submissions], dtype=float)
+        
+        # Calculate a more accurate baseline prediction based on survey inputs
+        baseline = np.zeros(len(submissions))
+        
+        # Transportation contribution
+        baseline += np.where(values('transport') > 0, values('vehicle_distance') * 0.21, 0.0)  # kg CO2 per km
+        
+        # Air travel contribution
+        baseline += values('flights_hours') * 90  # kg CO2 per hour
+        
+        # Energy contribution - use actual electricity input if available,
+        # otherwise estimate from TV/PC hours (0.1 kW average * 30 days)
+        electricity = values('electricity')
+        estimated_electricity = values('tv_pc_hours') * 0.1 * 30
+        baseline += np.where(electricity != 0, electricity * 0.45, estimated_electricity * 0.45)  # kg CO2 per kWh
+        
+        # LPG contribution
+        baseline += values('lpg_kg') * 3.0  # kg CO2 per kg LPG
+        
+        # Diet contribution
+        baseline += values('meat_meals') * 2.5  # kg CO2 per meal
+        
+        # Dining out contribution
+        baseline += values('dining_out') * 3.2  # kg CO2 per meal
+        
+        # Waste contribution
+        baseline += values('waste_kg') * 0.5  # kg CO2 per kg waste
+        
+        # Apply smoothing: 50% ML + 50% baseline, bounded to 0.7x-1.5x baseline
+        smoothed = np.clip(0.5 * predictions + 0.5 * baseline, baseline * 0.7, baseline * 1.5)
+        
+        # If ML prediction is way off, use mostly baseline
+        too_high = predictions > baseline * 3
+        too_low = ~too_high & (predictions < baseline * 0.3)
+        smoothed = np.where(too_high, baseline * 1.1, smoothed)
+        smoothed = np.where(too_low, baseline * 0.9, smoothed)
+        
+        if too_high.any() or too_low.any():
+            logger.info(f"ML prediction out of range for {int(too_high.sum() + too_low.sum())} of {len(submissions)} rows, using conservative estimates")
+        
+        # Rows without a baseline keep the raw prediction
+        return np.where(baseline > 0, smoothed, predictions)
+
     async def retrain_models(self) -> Dict[str, Any]:
-        """Retrain models with latest data including user submissions"""
+        """Retrain models with latest data including user submissions, and serve the new version"""
+        bundle = await self.train_staging()
+        self.swap_models(bundle)
+        return self.training_summary(bundle)
+
+    def training_summary(self, bundle: Optional[ModelBundle] = None) -> Dict[str, Any]:
+        """Summary of a model version's training run, the served version by default"""
+        bundle = bundle or self.bundle
+        return {
+            "status": "success",
+            "version": bundle.version,
+            "models_retrained": list(bundle.models.keys()),
+            "best_model": bundle.best_model_name,
+            "performance": dict(bundle.model_performance),
+            "timings": dict(bundle.training_report) if bundle.training_report else None
+        }
+
+    async def train_staging(self, incremental: bool = False) -> Optional[ModelBundle]:
+        """Train and save a new model version, leaving the served one untouched
+
+        An incremental run updates a fresh copy of the served version with new
+        submissions and returns None when there are none; without a saved
+        served version it retrains from scratch.
+        """
         try:
-            logger.info("Starting model retraining...")
-            
-            # Load fresh data including new submissions
-            df = await self._load_and_prepare_data()
-            
-            # Retrain all models
-            await self._train_random_forest(df)
-            await self._train_xgboost(df)
-            await self._train_neural_network(df)
-            
-            # Select best model
-            await self._select_best_model()
+            base = None
+            if incremental and self.bundle is not None:
+                # Load every model, including heavy ones skipped for serving
+                base = await self.executor.run_in_thread(
+                    self._registry(self.bundle.artifact_key).load, self.bundle.version, True
+                )
+            
+            if base is not None:
+                bundle = await self._update_bundle(base)
+                if bundle is None:
+                    return None
+            else:
+                logger.info("Starting model retraining...")
+                
+                # Load fresh data including new submissions
+                artifact_key = await self.executor.run_in_thread(self._compute_artifact_key)
+                df = await self._load_and_prepare_data()
+                submissions, last_submission_id = await self._load_submission_data()
+                
+                # Retrain all models
+                bundle = await self._train_bundle(artifact_key, df, submissions, last_submission_id)
             
             # Save models
-            await self._save_models()
-            
-            logger.info("Model retraining completed successfully")
-            return {
-                "status": "success",
-                "models_retrained": list(self.models.keys()),
-                "best_model": self.best_model_name,
-                "performance": self.model_performance
-            }
+            await self._save_models(bundle)
+            logger.info(f"Model version {bundle.version} trained, best model: {bundle.best_model_name}")
+            return bundle
             
         except Exception as e:
             logger.error(f"Model retraining failed: {str(e)}")
             raise
 
-    async def _save_models(self):
-        """Save trained models to disk"""
+    def swap_models(self, bundle: ModelBundle) -> bool:
+        """Serve a newly trained version, unless a pinned version must stay live"""
+        if self.pinned and self.bundle is not None:
+            logger.info(f"Model version {bundle.version} saved but not served, {self.bundle.version} is pinned")
+            return False
+        
+        self._activate(bundle, pinned=False)
+        logger.info(f"Model version {bundle.version} swapped in, best model: {bundle.best_model_name}")
+        return True
+
+    def _activate(self, bundle: ModelBundle, pinned: bool):
+        """Point the service at a model version and record it as the served one"""
+        if bundle is not self.bundle:
+            # One reference assignment: a request sees the old version or the new one, never a mix
+            self.bundle = bundle
+            self._models_changed()
+        self.pinned = pinned
         try:
-            os.makedirs("models", exist_ok=True)
-            
-            for name, model in self.models.items():
-                if name == 'neural_network':
-                    model.save(f"models/{name}.h5")
-                else:
-                    joblib.dump(model, f"models/{name}.pkl")
+            self._registry(bundle.artifact_key).set_state(bundle.version, pinned)
+        except OSError as e:
+            logger.error(f"Model registry state could not be saved: {str(e)}")
+
+    async def list_model_versions(self) -> Dict[str, Any]:
+        """Saved model versions for the current training data, newest first"""
+        bundle = self.bundle
+        if bundle is None:
+            return {"active": None, "pinned": False, "versions": []}
+        
+        versions = await self.executor.run_in_thread(self._registry(bundle.artifact_key).list_versions)
+        return {"active": bundle.version, "pinned": self.pinned, "versions": versions}
+
+    async def activate_version(self, version: str, pin: bool = True) -> Dict[str, Any]:
+        """Serve a saved version, e.g. to roll back; a pinned version is kept when retraining finishes"""
+        current = self.bundle
+        if current is None:
+            raise RuntimeError("No model version is loaded")
+        
+        bundle = current
+        if version != current.version:
+            bundle = await self.executor.run_in_thread(self._registry(current.artifact_key).load, version)
+            if bundle is None:
+                raise KeyError(f"Unknown model version: {version}")
+        
+        self._activate(bundle, pinned=pin)
+        logger.info(f"Model version {version} activated{' and pinned' if pin else ''}")
+        return await self.list_model_versions()
+
+    async def unpin_version(self) -> Dict[str, Any]:
+        """Let the next retraining replace the served version again"""
+        if self.bundle is not None:
+            self._activate(self.bundle, pinned=False)
+        return await self.list_model_versions()
+
+    def _compute_artifact_key(self) -> str:
+        """Hash the training data, feature list and library versions into an artifact key"""
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        
+        digest.update(json.dumps({
+            "artifact_version": MODEL_ARTIFACT_VERSION,
+            "features": FEATURE_COLUMNS,
+            "sklearn": sklearn.__version__,
+            "xgboost": xgb.__version__
+        }, sort_keys=True).encode())
+        
+        return digest.hexdigest()
+
+    def _artifact_path(self, artifact_key: str) -> str:
+        """Directory holding the saved model versions for a key"""
+        return os.path.join(self.artifacts_dir, artifact_key[:16])
+
+    def _registry(self, artifact_key: str) -> ModelRegistry:
+        return ModelRegistry(self._artifact_path(artifact_key))
+
+    async def _save_models(self, bundle: ModelBundle):
+        """Save a model version to disk and drop the oldest saved versions"""
+        await self.executor.run_in_thread(self._write_models, bundle)
+
+    def _write_models(self, bundle: ModelBundle):
+        """Write a model version (blocking); a failed save leaves the models served but unsaved"""
+        try:
+            registry = self._registry(bundle.artifact_key)
+            registry.save(bundle)
+            registry.prune()
             
-            # Save scalers and encoders
-            joblib.dump(self.scalers, "models/scalers.pkl")
-            joblib.dump(self.encoders, "models/encoders.pkl")
-            joblib.dump(self.model_performance, "models/performance.pkl")
+        except Exception as e:
+            logger.error(f"Model saving failed: {str(e)}")
+
+    def _load_active_version(self, artifact_key: str) -> bool:
+        """Load and serve the recorded model version for an artifact key, returning False if there is none"""
+        registry = self._registry(artifact_key)
+        try:
+            state = registry.get_state()
+            bundle = registry.load(state["active"]) if state["active"] else None
+            if bundle is None:
+                return False
             
-            logger.info("Models saved successfully")
+            self._activate(bundle, pinned=state["pinned"])
+            return True
             
         except Exception as e:
-            logger.error(f"Model saving failed: {str(e)}")
+            logger.warning(f"Saved models could not be loaded, retraining: {str(e)}")
+            return False
 
     async def get_model_performance(self) -> Dict[str, Any]:
         """Get current model performance metrics"""
+        bundle = self.bundle
+        if bundle is None:
+            return {
+                "models_loaded": False,
+                "model_version": None,
+                "prediction_cache": self.prediction_cache.get_stats()
+            }
+        
         return {
-            "models_loaded": self.models_loaded,
-            "best_model": getattr(self, 'best_model_name', None),
-            "performance": self.model_performance
+            "models_loaded": True,
+            "model_version": bundle.version,
+            "pinned": self.pinned,
+            "best_model": bundle.best_model_name,
+            "artifact_key": bundle.artifact_key,
+            "last_submission_id": bundle.last_submission_id,
+            "feature_columns": bundle.feature_columns,
+            "loaded_models": list(bundle.models.keys()),
+            "training_report": dict(bundle.training_report) if bundle.training_report else None,
+            "performance": dict(bundle.model_performance),
+            "prediction_cache": self.prediction_cache.get_stats()
         }
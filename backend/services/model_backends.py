@@ -0,0 +1,79 @@
+import importlib
+import importlib.util
+import sys
+from typing import Any, Dict
+import logging
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+class ModelBackend:
+    """How one kind of model is imported, saved and loaded
+
+    The backing library is only imported when a model is built, saved or
+    loaded, so services that never touch a backend never pay for its import.
+    """
+    file_extension = ".pkl"
+    # Heavy backends are only loaded from saved artifacts when they hold the best model
+    heavy = False
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+
+    @property
+    def available(self) -> bool:
+        """Whether the library is installed, checked without importing it"""
+        return importlib.util.find_spec(self.module_name) is not None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the library has already been imported"""
+        return self.module_name in sys.modules
+
+    def import_module(self) -> Any:
+        """Import the backing library"""
+        return importlib.import_module(self.module_name)
+
+    def save(self, model: Any, path: str):
+        joblib.dump(model, path)
+
+    def load(self, path: str) -> Any:
+        self.import_module()
+        return joblib.load(path)
+
+
+class KerasBackend(ModelBackend):
+    """TensorFlow/Keras models, saved in HDF5 format"""
+    file_extension = ".h5"
+    heavy = True
+
+    def __init__(self):
+        super().__init__("tensorflow")
+
+    def import_module(self) -> Any:
+        """Import TensorFlow and return its Keras API"""
+        logger.info("Importing TensorFlow")
+        return importlib.import_module("tensorflow").keras
+
+    def save(self, model: Any, path: str):
+        model.save(path)
+
+    def load(self, path: str) -> Any:
+        return self.import_module().models.load_model(path, compile=False)
+
+
+# Model name -> backend
+MODEL_BACKENDS: Dict[str, ModelBackend] = {
+    'random_forest': ModelBackend("sklearn"),
+    'xgboost': ModelBackend("xgboost"),
+    'neural_network': KerasBackend(),
+}
+
+
+def get_model_backend(model_name: str) -> ModelBackend:
+    """Get the backend for a model name"""
+    if model_name not in MODEL_BACKENDS:
+        raise KeyError(f"No backend registered for model: {model_name}")
+    return MODEL_BACKENDS[model_name]
@@ -0,0 +1,278 @@
+import os
+import re
+import json
+import shutil
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+import logging
+
+import joblib
+
+from services.feature_pipeline import FeaturePipeline
+from services.inference_runtime import export_model
+from services.model_backends import get_model_backend
+
+logger = logging.getLogger(__name__)
+
+# Saved versions kept per training dataset; the active version is always kept
+MODEL_VERSIONS_KEEP = int(os.environ.get("CO2_MODEL_VERSIONS_KEEP", 5))
+
+REGISTRY_STATE_FILE = "registry.json"
+MANIFEST_FILE = "manifest.json"
+VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+
+class ModelBundle(NamedTuple):
+    """One immutable, versioned set of everything a prediction needs
+
+    A bundle is never changed after it is built; retraining builds a new one
+    and the service swaps its single bundle reference, so a request always
+    sees models, scalers and the feature pipeline from the same version.
+    """
+    version: str
+    artifact_key: str
+    models: Mapping[str, Any]
+    scalers: Mapping[str, Any]
+    feature_pipeline: FeaturePipeline
+    inference_model: Any
+    model_performance: Mapping[str, Any]
+    best_model_name: str
+    last_submission_id: int
+    training_report: Optional[Mapping[str, Any]]
+    created_at: str
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return self.feature_pipeline.columns
+
+
+def build_bundle(version: str, artifact_key: str, models: Dict[str, Any], scalers: Dict[str, Any],
+                 feature_pipeline: FeaturePipeline, model_performance: Dict[str, Any],
+                 last_submission_id: int, training_report: Optional[Dict[str, Any]] = None,
+                 best_model_name: Optional[str] = None, inference_model: Any = None,
+                 created_at: Optional[str] = None) -> ModelBundle:
+    """Freeze trained models into a bundle, selecting and exporting the best model if not given"""
+    if not model_performance:
+        raise RuntimeError("No trained models to build a model bundle from")
+
+    if best_model_name is None:
+        # Select model with best R2 score
+        best_model_name = max(model_performance.items(), key=lambda x: x[1]['r2'])[0]
+        logger.info(f"Best model selected: {best_model_name}")
+    if inference_model is None and best_model_name in models:
+        inference_model = _export(best_model_name, models[best_model_name], scalers.get(best_model_name))
+
+    return ModelBundle(
+        version=version,
+        artifact_key=artifact_key,
+        models=MappingProxyType(dict(models)),
+        scalers=MappingProxyType(dict(scalers)),
+        feature_pipeline=feature_pipeline,
+        inference_model=inference_model,
+        model_performance=MappingProxyType(dict(model_performance)),
+        best_model_name=best_model_name,
+        last_submission_id=last_submission_id,
+        training_report=MappingProxyType(dict(training_report)) if training_report else None,
+        created_at=created_at or datetime.now().isoformat()
+    )
+
+
+def _export(name: str, model: Any, scaler: Any) -> Any:
+    """Convert the best model into its lightweight serving form"""
+    try:
+        inference_model = export_model(name, model, scaler)
+        logger.info(f"Best model exported for serving: {type(inference_model).__name__}")
+        return inference_model
+    except Exception as e:
+        # Serving falls back to the full model
+        logger.error(f"Inference model export failed: {str(e)}")
+        return None
+
+
+class ModelRegistry:
+    """Saved model bundle versions for one training dataset, and which one is served
+
+    Each version lives in its own directory and is never rewritten. The served
+    version and whether it is pinned are kept in a small state file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        """Saved versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        numbered = []
+        for name in os.listdir(self.root):
+            match = VERSION_PATTERN.match(name)
+            if match and os.path.exists(os.path.join(self.root, name, MANIFEST_FILE)):
+                numbered.append((int(match.group(1)), name))
+        return [name for _, name in sorted(numbered)]
+
+    def next_version(self) -> str:
+        """Name for the next version, never reusing a saved or pending one"""
+        highest = 0
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                match = VERSION_PATTERN.match(name.lstrip('.').split('.')[0])
+                if match:
+                    highest = max(highest, int(match.group(1)))
+        return f"v{highest + 1}"
+
+    def read_manifest(self, version: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.version_path(version), MANIFEST_FILE)
+        if not VERSION_PATTERN.match(version) or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def get_state(self) -> Dict[str, Any]:
+        """The active version and pin flag, defaulting to the newest version unpinned"""
+        state = {"active": None, "pinned": False}
+        path = os.path.join(self.root, REGISTRY_STATE_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                state.update(json.load(f))
+        if state["active"] not in self.versions():
+            versions = self.versions()
+            state = {"active": versions[-1] if versions else None, "pinned": False}
+        return state
+
+    def set_state(self, active: str, pinned: bool):
+        """Record the served version; written to a temporary file and renamed into place"""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, REGISTRY_STATE_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump({"active": active, "pinned": pinned, "updated_at": datetime.now().isoformat()}, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """Summaries of the saved versions, newest first"""
+        state = self.get_state()
+        summaries = []
+        for version in reversed(self.versions()):
+            manifest = self.read_manifest(version)
+            summaries.append({
+                "version": version,
+                "created_at": manifest.get("created_at"),
+                "best_model": manifest.get("best_model"),
+                "training_mode": (manifest.get("training_report") or {}).get("mode"),
+                "last_submission_id": manifest.get("last_submission_id", 0),
+                "metrics": manifest.get("metrics", {}),
+                "active": version == state["active"],
+                "pinned": version == state["active"] and state["pinned"]
+            })
+        return summaries
+
+    def save(self, bundle: ModelBundle):
+        """Write a bundle as a new version directory (blocking)
+
+        Files go to a hidden directory that is renamed into place once complete,
+        so a partial save is never listed or loaded.
+        """
+        final_dir = self.version_path(bundle.version)
+        if os.path.exists(final_dir):
+            raise FileExistsError(f"Model version already saved: {bundle.version}")
+        staging_dir = os.path.join(self.root, f".{bundle.version}.tmp")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        model_files = {}
+        for name, model in bundle.models.items():
+            backend = get_model_backend(name)
+            model_files[name] = f"{name}{backend.file_extension}"
+            backend.save(model, os.path.join(staging_dir, model_files[name]))
+
+        # Save scalers, the feature pipeline and the exported serving model
+        joblib.dump(dict(bundle.scalers), os.path.join(staging_dir, "scalers.pkl"))
+        joblib.dump(bundle.feature_pipeline, os.path.join(staging_dir, "feature_pipeline.pkl"))
+        joblib.dump(dict(bundle.model_performance), os.path.join(staging_dir, "performance.pkl"))
+        inference_file = None
+        if bundle.inference_model is not None:
+            inference_file = "inference_model.pkl"
+            joblib.dump(bundle.inference_model, os.path.join(staging_dir, inference_file))
+
+        manifest = {
+            "version": bundle.version,
+            "artifact_key": bundle.artifact_key,
+            "best_model": bundle.best_model_name,
+            "model_files": model_files,
+            "inference_model": inference_file,
+            "feature_columns": bundle.feature_columns,
+            "last_submission_id": bundle.last_submission_id,
+            "training_report": dict(bundle.training_report) if bundle.training_report else None,
+            "metrics": {
+                name: {"mae": float(perf['mae']), "r2": float(perf['r2'])}
+                for name, perf in bundle.model_performance.items()
+            },
+            "created_at": bundle.created_at
+        }
+        with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging_dir, final_dir)
+        logger.info(f"Model version saved: {final_dir}")
+
+    def load(self, version: str, load_all: bool = False) -> Optional[ModelBundle]:
+        """Load a saved version, or None if it does not exist or cannot be served (blocking)
+
+        Heavy models are only loaded when they serve predictions directly,
+        unless load_all is set.
+        """
+        manifest = self.read_manifest(version)
+        if manifest is None or not manifest.get("best_model"):
+            return None
+
+        model_dir = self.version_path(version)
+        best_model_name = manifest["best_model"]
+        inference_model = None
+        if manifest.get("inference_model"):
+            inference_model = joblib.load(os.path.join(model_dir, manifest["inference_model"]))
+
+        models = {}
+        for name, filename in manifest["model_files"].items():
+            backend = get_model_backend(name)
+            if not backend.available:
+                logger.warning(f"{backend.module_name} not available, skipping saved {name}")
+                continue
+            if backend.heavy and not load_all and (name != best_model_name or inference_model is not None):
+                # Only pay for importing a heavy library when its model is served directly
+                logger.info(f"Skipping saved {name}, it is not needed for serving")
+                continue
+            models[name] = backend.load(os.path.join(model_dir, filename))
+
+        performance = joblib.load(os.path.join(model_dir, "performance.pkl"))
+        if best_model_name not in models and inference_model is None:
+            # Fall back to the best model that could be loaded
+            performance = {name: perf for name, perf in performance.items() if name in models}
+            if not performance:
+                return None
+            best_model_name = None
+
+        return build_bundle(
+            version=version,
+            artifact_key=manifest["artifact_key"],
+            models=models,
+            scalers=joblib.load(os.path.join(model_dir, "scalers.pkl")),
+            feature_pipeline=joblib.load(os.path.join(model_dir, "feature_pipeline.pkl")),
+            model_performance=performance,
+            last_submission_id=manifest.get("last_submission_id", 0),
+            training_report=manifest.get("training_report"),
+            best_model_name=best_model_name,
+            inference_model=inference_model,
+            created_at=manifest.get("created_at")
+        )
+
+    def prune(self, keep: int = MODEL_VERSIONS_KEEP):
+        """Delete the oldest versions beyond the newest keep, never the active one"""
+        active = self.get_state()["active"]
+        versions = self.versions()
+        for version in versions[:max(0, len(versions) - keep)]:
+            if version != active:
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+                logger.info(f"Pruned model version: {version}")
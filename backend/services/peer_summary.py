@@ -0,0 +1,162 @@
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.database import PeerCO2BucketDB, PeerCO2BucketStateDB, UserSubmissionDB
+
+logger = logging.getLogger(__name__)
+
+# Buckets grow geometrically by GAMMA, so a bucket's midpoint is within
+# (GAMMA - 1) / (GAMMA + 1) (about 1%) of any value stored in it
+GAMMA = 1.02
+_LOG_GAMMA = math.log(GAMMA)
+
+# Values below this share the lowest bucket
+MIN_BUCKET_VALUE = 1.0
+
+# Databases with INSERT ... ON CONFLICT; any other database gets a portable
+# update-then-insert, so the histogram never stops a submission being stored
+ON_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert
+}
+
+
+def co2_bucket(value: float) -> int:
+    """Bucket index for a predicted CO2 value"""
+    return int(math.ceil(math.log(max(value, MIN_BUCKET_VALUE)) / _LOG_GAMMA))
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative value of a bucket"""
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+def median_from_buckets(buckets: List[Tuple[int, int]], min_value: float, max_value: float) -> Optional[float]:
+    """Approximate median from (bucket, count) pairs sorted by bucket
+
+    Mirrors numpy.median: the middle value, or the mean of the two middle
+    values for an even count. Results are clamped to the exact min/max.
+    """
+    total = sum(count for _, count in buckets)
+    if total == 0:
+        return None
+
+    def value_at(rank: int) -> float:
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                return min(max(bucket_value(bucket), min_value), max_value)
+        return max_value
+
+    return (value_at((total - 1) // 2) + value_at(total // 2)) / 2
+
+
+def increment_buckets(db: Session, entries: Iterable[Tuple[str, str, float]]):
+    """Add predicted CO2 values to the histogram within the caller's transaction
+
+    Zero and missing predictions are skipped, matching the peer statistics.
+    """
+    counts = Counter(
+        (city, area, co2_bucket(value))
+        for city, area, value in entries
+        if value
+    )
+    if not counts:
+        return
+
+    rows = [
+        {"city": city, "area": area, "bucket": bucket, "count": count}
+        for (city, area, bucket), count in counts.items()
+    ]
+    insert = _on_conflict_insert(db)
+    if insert is None:
+        _increment_portable(db, rows)
+        return
+
+    # Atomic upsert so concurrent writers never lose an increment
+    statement = insert(PeerCO2BucketDB.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["city", "area", "bucket"],
+        set_={"count": PeerCO2BucketDB.__table__.c.count + statement.excluded.count}
+    )
+    db.execute(statement, rows)
+
+
+def _increment_portable(db: Session, rows: List[dict]):
+    """Add to each bucket with an in-place UPDATE, inserting buckets that do not exist yet"""
+    table = PeerCO2BucketDB.__table__
+    for row in rows:
+        update = table.update().where(
+            (table.c.city == row["city"]) & (table.c.area == row["area"]) & (table.c.bucket == row["bucket"])
+        ).values(count=table.c.count + row["count"])
+        if db.execute(update).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(table.insert().values(**row))
+        except IntegrityError:
+            # Another writer created the bucket in the meantime
+            db.execute(update)
+
+
+def rebuild_buckets(db: Session):
+    """Build the histogram from stored submissions, once per database
+
+    The build inserts a marker row in the same transaction. Another process
+    inserting the marker waits for that transaction (row lock on the primary
+    key, or SQLite's write lock) and then finds it present, so two workers
+    starting against the same database never both add the stored submissions.
+    """
+    try:
+        if not _claim_rebuild(db):
+            db.rollback()
+            return
+
+        # A histogram built before the marker existed is already complete
+        if db.query(PeerCO2BucketDB.bucket).first() is None:
+            rows = db.query(UserSubmissionDB.city, UserSubmissionDB.area, UserSubmissionDB.predicted_co2).filter(
+                UserSubmissionDB.predicted_co2.isnot(None)
+            ).all()
+            increment_buckets(db, rows)
+            logger.info(f"Peer CO2 histogram rebuilt from {len(rows)} submissions")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _claim_rebuild(db: Session) -> bool:
+    """Insert the rebuild marker row; False when it is already there"""
+    insert = _on_conflict_insert(db)
+    if insert is not None:
+        statement = insert(PeerCO2BucketStateDB.__table__).values(id=1).on_conflict_do_nothing(index_elements=["id"])
+        return db.execute(statement).rowcount > 0
+    try:
+        with db.begin_nested():
+            db.execute(PeerCO2BucketStateDB.__table__.insert().values(id=1))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _on_conflict_insert(db: Session):
+    """The dialect's insert construct with ON CONFLICT support, or None"""
+    return ON_CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+
+
+def query_buckets(db: Session, city: str, area: Optional[str] = None) -> List[Tuple[int, int]]:
+    """Histogram for an area, or for a whole city when no area is given"""
+    query = db.query(PeerCO2BucketDB.bucket, func.sum(PeerCO2BucketDB.count)).filter(
+        PeerCO2BucketDB.city == city
+    )
+    if area is not None:
+        query = query.filter(PeerCO2BucketDB.area == area)
+    return [(bucket, int(count)) for bucket, count in query.group_by(PeerCO2BucketDB.bucket).order_by(PeerCO2BucketDB.bucket)]
@@ -0,0 +1,376 @@
+import operator
+import string
+from typing import Any, Dict, List, Mapping, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Recommendation catalogue by ID; descriptions may name rule fields in {braces}
+RECOMMENDATIONS = {
+    # Transport
+    "public_transport": {
+        "title": "Use Public Transportation",
+        "description": "Switch to buses, trains, or metro for daily commute. Reduces individual carbon footprint significantly.",
+        "potential_savings": 150.0,
+        "difficulty": "Medium",
+        "priority": 5,
+        "category": "Transport"
+    },
+    "carpool_or_bike": {
+        "title": "Carpool or Bike to Work",
+        "description": "Share rides with colleagues or use bicycle for short distances. Great for health and environment.",
+        "potential_savings": 80.0,
+        "difficulty": "Easy",
+        "priority": 4,
+        "category": "Transport"
+    },
+    "reduce_air_travel": {
+        "title": "Reduce Air Travel",
+        "description": "Choose train or bus for domestic travel. Consider video conferencing for business meetings.",
+        "potential_savings": 200.0,
+        "difficulty": "Hard",
+        "priority": 3,
+        "category": "Transport"
+    },
+    "electric_vehicle": {
+        "title": "Consider Electric Vehicle",
+        "description": "Your monthly distance of {vehicle_distance}km is high. An electric vehicle could reduce emissions by 70%.",
+        "potential_savings": 120.0,
+        "difficulty": "Hard",
+        "priority": 4,
+        "category": "Transport"
+    },
+    "video_conferencing": {
+        "title": "Video Conferencing for Business",
+        "description": "Replace some business trips with video calls. Each avoided flight saves significant CO2.",
+        "potential_savings": 300.0,
+        "difficulty": "Medium",
+        "priority": 5,
+        "category": "Transport"
+    },
+    # Energy
+    "led_bulbs": {
+        "title": "Switch to LED Bulbs",
+        "description": "Replace incandescent bulbs with LED lights. Uses 75% less energy and lasts longer.",
+        "potential_savings": 25.0,
+        "difficulty": "Easy",
+        "priority": 5,
+        "category": "Energy"
+    },
+    "unplug_electronics": {
+        "title": "Unplug Electronics",
+        "description": "Unplug chargers and electronics when not in use. Reduces phantom energy consumption.",
+        "potential_savings": 15.0,
+        "difficulty": "Easy",
+        "priority": 4,
+        "category": "Energy"
+    },
+    "efficient_appliances": {
+        "title": "Use Energy-Efficient Appliances",
+        "description": "Replace old appliances with Energy Star rated ones. Significant long-term savings.",
+        "potential_savings": 60.0,
+        "difficulty": "Hard",
+        "priority": 3,
+        "category": "Energy"
+    },
+    # Diet
+    "reduce_meat": {
+        "title": "Reduce Meat Consumption",
+        "description": "Have meat-free days or reduce portion sizes. Meat production has high carbon footprint.",
+        "potential_savings": 100.0,
+        "difficulty": "Medium",
+        "priority": 4,
+        "category": "Diet"
+    },
+    "local_seasonal_food": {
+        "title": "Buy Local and Seasonal Food",
+        "description": "Choose locally grown, seasonal produce. Reduces transportation emissions.",
+        "potential_savings": 30.0,
+        "difficulty": "Easy",
+        "priority": 3,
+        "category": "Diet"
+    },
+    "reduce_food_waste": {
+        "title": "Reduce Food Waste",
+        "description": "Plan meals, store food properly, and use leftovers. Reduces methane emissions from landfills.",
+        "potential_savings": 40.0,
+        "difficulty": "Medium",
+        "priority": 4,
+        "category": "Diet"
+    },
+    "meal_planning": {
+        "title": "Meal Planning",
+        "description": "Plan meals weekly to reduce food waste and grocery spending. Buy only what you need.",
+        "potential_savings": 60.0,
+        "difficulty": "Medium",
+        "priority": 3,
+        "category": "Diet"
+    },
+    # Waste
+    "improve_recycling": {
+        "title": "Improve Recycling",
+        "description": "Recycle paper, plastic, glass, and metal properly. Reduces landfill waste and emissions.",
+        "potential_savings": 20.0,
+        "difficulty": "Easy",
+        "priority": 4,
+        "category": "Waste"
+    },
+    "compost": {
+        "title": "Compost Organic Waste",
+        "description": "Start composting kitchen scraps and garden waste. Creates nutrient-rich soil.",
+        "potential_savings": 35.0,
+        "difficulty": "Medium",
+        "priority": 3,
+        "category": "Waste"
+    },
+    "reduce_plastics": {
+        "title": "Reduce Single-Use Plastics",
+        "description": "Use reusable bags, bottles, and containers. Reduces plastic waste significantly.",
+        "potential_savings": 25.0,
+        "difficulty": "Easy",
+        "priority": 4,
+        "category": "Waste"
+    },
+    "expand_recycling": {
+        "title": "Expand Recycling Program",
+        "description": "Currently recycling {recycling_count} materials. Add more categories for better impact.",
+        "potential_savings": 30.0,
+        "difficulty": "Easy",
+        "priority": 4,
+        "category": "Waste"
+    },
+    # Lifestyle
+    "reduce_screen_time": {
+        "title": "Reduce Screen Time",
+        "description": "Limit TV and computer usage. Saves energy and improves health.",
+        "potential_savings": 30.0,
+        "difficulty": "Hard",
+        "priority": 2,
+        "category": "Lifestyle"
+    },
+    "fewer_clothes": {
+        "title": "Buy Fewer Clothes",
+        "description": "Adopt minimal wardrobe approach. Fashion industry has high environmental impact.",
+        "potential_savings": 50.0,
+        "difficulty": "Medium",
+        "priority": 3,
+        "category": "Lifestyle"
+    },
+    "optimize_heating_cooling": {
+        "title": "Optimize Heating/Cooling",
+        "description": "Use programmable thermostats and proper insulation. Reduces energy consumption.",
+        "potential_savings": 45.0,
+        "difficulty": "Medium",
+        "priority": 3,
+        "category": "Lifestyle"
+    },
+    "digital_detox": {
+        "title": "Digital Detox Days",
+        "description": "Reduce your {tv_pc_hours} hours daily screen time. Try outdoor activities instead.",
+        "potential_savings": 40.0,
+        "difficulty": "Hard",
+        "priority": 3,
+        "category": "Lifestyle"
+    }
+}
+
+# Rule fields that are computed from a submission rather than read from it
+COMPUTED_FIELDS = {
+    "recycling_count": lambda submission: len(submission.recycling)
+}
+
+# A rule recommends its IDs when all of its "all" conditions hold and, if it
+# has "any" conditions, at least one of those. Conditions are
+# (field, operator, value). Recommendations are ranked by priority, then
+# potential savings; ties go to the ID first recommended in this list.
+RECOMMENDATION_RULES = [
+    # High-impact areas
+    {
+        "name": "transport",
+        "any": [("vehicle_distance", ">", 1000), ("air_travel", "in", ["frequently", "very frequently"])],
+        "recommend": ["public_transport", "carpool_or_bike", "reduce_air_travel"]
+    },
+    {
+        "name": "energy",
+        "any": [("tv_pc_hours", ">", 8), ("internet_hours", ">", 10)],
+        "recommend": ["led_bulbs", "unplug_electronics", "efficient_appliances"]
+    },
+    {
+        "name": "diet",
+        "all": [("diet", "in", ["omnivore"]), ("grocery_bill", ">", 200)],
+        "recommend": ["reduce_meat", "local_seasonal_food", "reduce_food_waste"]
+    },
+    {
+        "name": "waste",
+        "any": [("waste_bag_count", ">", 3), ("recycling_count", "<", 2)],
+        "recommend": ["improve_recycling", "compost", "reduce_plastics"]
+    },
+    {
+        "name": "lifestyle",
+        "any": [("new_clothes", ">", 5), ("tv_pc_hours", ">", 6)],
+        "recommend": ["reduce_screen_time", "fewer_clothes", "optimize_heating_cooling"]
+    },
+    # Specific to the user's exact data
+    {"name": "high_vehicle_distance", "all": [("vehicle_distance", ">", 2000)], "recommend": ["electric_vehicle"]},
+    {"name": "high_air_travel", "all": [("air_travel", "==", "very frequently")], "recommend": ["video_conferencing"]},
+    {"name": "high_screen_time", "all": [("tv_pc_hours", ">", 10)], "recommend": ["digital_detox"]},
+    {"name": "high_grocery_spending", "all": [("grocery_bill", ">", 300)], "recommend": ["meal_planning"]},
+    {"name": "low_recycling", "all": [("recycling_count", "<", 2)], "recommend": ["expand_recycling"]}
+]
+
+# Each operator on a column of values, and on a single value
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "in": lambda values, options: np.isin(values, list(options))
+}
+SCALAR_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda value, options: value in options
+}
+
+
+def field_value(submission: Any, field: str) -> Any:
+    """A rule field of one submission"""
+    return COMPUTED_FIELDS[field](submission) if field in COMPUTED_FIELDS else getattr(submission, field)
+
+
+class RuleEvaluator:
+    """Recommendation rules compiled for scoring many submissions at once
+
+    Each distinct condition is evaluated once per batch as a column, rules
+    are combined with matrix products over the condition columns, and the
+    best k matching recommendations per row are picked with a partial sort.
+    A single submission is scored with the same compiled rules in plain
+    Python, where numpy's per-call overhead would outweigh the work.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]] = RECOMMENDATION_RULES,
+                 recommendations: Mapping[str, Dict[str, Any]] = RECOMMENDATIONS):
+        # IDs in the order they are first recommended, which breaks ranking ties
+        self.ids = list(dict.fromkeys(rec_id for rule in rules for rec_id in rule["recommend"]))
+        unknown = [rec_id for rec_id in self.ids if rec_id not in recommendations]
+        if unknown:
+            raise ValueError(f"Rules recommend unknown IDs: {', '.join(unknown)}")
+        self.recommendations = [recommendations[rec_id] for rec_id in self.ids]
+
+        # Distinct conditions, and per rule the conditions it needs all / any of and the IDs it recommends
+        self.conditions = []
+        self.rule_terms = []
+        positions = {}
+        for rule in rules:
+            terms = []
+            for kind in ("all", "any"):
+                terms.append([])
+                for field, op, value in rule.get(kind, []):
+                    if op not in OPERATORS:
+                        raise ValueError(f"Unknown operator '{op}' in rule {rule.get('name')}")
+                    key = (field, op, repr(value))
+                    if key not in positions:
+                        positions[key] = len(self.conditions)
+                        self.conditions.append((field, op, value))
+                    terms[-1].append(positions[key])
+            terms.append([self.ids.index(rec_id) for rec_id in rule["recommend"]])
+            self.rule_terms.append(tuple(terms))
+
+        # The same as condition x rule and rule x ID matrices; float so the products use BLAS
+        self.all_matrix = np.zeros((len(self.conditions), len(rules)))
+        self.any_matrix = np.zeros((len(self.conditions), len(rules)))
+        self.rule_ids = np.zeros((len(rules), len(self.ids)))
+        for rule_index, (all_conditions, any_conditions, id_indices) in enumerate(self.rule_terms):
+            self.all_matrix[all_conditions, rule_index] = 1
+            self.any_matrix[any_conditions, rule_index] = 1
+            self.rule_ids[rule_index, id_indices] = 1
+        self.has_any = self.any_matrix.sum(axis=0) > 0
+
+        # Rank of each ID: priority, then potential savings, highest first
+        order = sorted(range(len(self.ids)), key=lambda i: (-self.recommendations[i]["priority"],
+                                                            -self.recommendations[i]["potential_savings"], i))
+        self.rank = np.empty(len(self.ids), dtype=np.int64)
+        self.rank[order] = np.arange(len(self.ids))
+        self.rank_list = self.rank.tolist()
+
+        # Fields named in descriptions, per ID
+        self.description_fields = [
+            [name for _, name, _, _ in string.Formatter().parse(rec["description"]) if name]
+            for rec in self.recommendations
+        ]
+        self.description_field_names = list(dict.fromkeys(name for names in self.description_fields for name in names))
+        self.condition_fields = list(dict.fromkeys(field for field, _, _ in self.conditions))
+        self.fields = list(dict.fromkeys(self.condition_fields + self.description_field_names))
+
+    def columns(self, submissions: Sequence[Any]) -> Dict[str, List[Any]]:
+        """The rule fields of submissions as columns"""
+        return {field: [field_value(submission, field) for submission in submissions] for field in self.fields}
+
+    def match(self, data: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """(rows, IDs) mask of the recommendations each row's rules make
+
+        data maps the rule fields to equal-length sequences; a DataFrame works.
+        """
+        values = {field: np.asarray(data[field]) for field in self.condition_fields}
+        n_rows = len(values[self.condition_fields[0]]) if values else 0
+        if n_rows == 0:
+            return np.zeros((0, len(self.ids)), dtype=bool)
+        held = np.empty((n_rows, len(self.conditions)))
+        for i, (field, op, value) in enumerate(self.conditions):
+            held[:, i] = OPERATORS[op](values[field], value)
+
+        rules = (held @ self.any_matrix > 0) | ~self.has_any
+        rules &= (1 - held) @ self.all_matrix == 0
+        return rules.astype(np.float64) @ self.rule_ids > 0
+
+    def top_k(self, matched: np.ndarray, k: int) -> np.ndarray:
+        """(rows, k) indices into ids of the best matched recommendations, best first; -1 pads rows with fewer"""
+        k = max(0, min(k, len(self.ids)))
+        if k == 0:
+            return np.empty((len(matched), 0), dtype=np.int64)
+        unmatched = len(self.ids)
+        scores = np.where(matched, self.rank, unmatched)
+        if k < len(self.ids):
+            candidates = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(len(self.ids)), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(candidate_scores, axis=1)
+        best = np.take_along_axis(candidates, order, axis=1)
+        return np.where(np.take_along_axis(candidate_scores, order, axis=1) < unmatched, best, -1)
+
+    def recommend(self, data: Mapping[str, Sequence[Any]], k: int) -> List[List[Dict[str, Any]]]:
+        """The top k recommendations for each row, as new dicts with their descriptions filled in"""
+        best = self.top_k(self.match(data), k).tolist()
+        values = {field: np.asarray(data[field]).tolist() for field in self.description_field_names}
+        return [[self._recommendation(index, values, row) for index in ids if index >= 0] for row, ids in enumerate(best)]
+
+    def recommend_one(self, submission: Any, k: int) -> List[Dict[str, Any]]:
+        """The top k recommendations for one submission; the same as recommend for a single row"""
+        values = {field: field_value(submission, field) for field in self.fields}
+        held = [SCALAR_OPERATORS[op](values[field], value) for field, op, value in self.conditions]
+
+        matched = set()
+        for all_conditions, any_conditions, id_indices in self.rule_terms:
+            if all(held[i] for i in all_conditions) and (not any_conditions or any(held[i] for i in any_conditions)):
+                matched.update(id_indices)
+        best = sorted(matched, key=self.rank_list.__getitem__)[:max(k, 0)]
+        columns = {field: [values[field]] for field in self.description_field_names}
+        return [self._recommendation(index, columns, 0) for index in best]
+
+    def _recommendation(self, index: int, columns: Mapping[str, Sequence[Any]], row: int) -> Dict[str, Any]:
+        """A copy of a recommendation, its description filled in from the row's field values"""
+        recommendation = dict(self.recommendations[index])
+        if self.description_fields[index]:
+            recommendation["description"] = recommendation["description"].format(
+                **{field: columns[field][row] for field in self.description_fields[index]}
+            )
+        return recommendation
@@ -1,262 +1,38 @@
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
 import logging
 
+from services.executor_service import get_executor_service
+from services.recommendation_rules import RuleEvaluator
+
 logger = logging.getLogger(__name__)
 
+# Recommendations returned per submission
+TOP_RECOMMENDATIONS = 5
+
 class RecommendationService:
     def __init__(self):
-        self.recommendations_db = self._initialize_recommendations()
-        
-    def _initialize_recommendations(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Initialize recommendation database"""
-        return {
-            "transport": [
-                {
-                    "title": "Use Public Transportation",
-                    "description": "Switch to buses, trains, or metro for daily commute. Reduces individual carbon footprint significantly.",
-                    "potential_savings": 150.0,
-                    "difficulty": "Medium",
-                    "priority": 5,
-                    "category": "Transport"
-                },
-                {
-                    "title": "Carpool or Bike to Work",
-                    "description": "Share rides with colleagues or use bicycle for short distances. Great for health and environment.",
-                    "potential_savings": 80.0,
-                    "difficulty": "Easy",
-                    "priority": 4,
-                    "category": "Transport"
-                },
-                {
-                    "title": "Reduce Air Travel",
-                    "description": "Choose train or bus for domestic travel. Consider video conferencing for business meetings.",
-                    "potential_savings": 200.0,
-                    "difficulty": "Hard",
-                    "priority": 3,
-                    "category": "Transport"
-                }
-            ],
-            "energy": [
-                {
-                    "title": "Switch to LED Bulbs",
-                    "description": "Replace incandescent bulbs with LED lights. Uses 75% less energy and lasts longer.",
-                    "potential_savings": 25.0,
-                    "difficulty": "Easy",
-                    "priority": 5,
-                    "category": "Energy"
-                },
-                {
-                    "title": "Unplug Electronics",
-                    "description": "Unplug chargers and electronics when not in use. Reduces phantom energy consumption.",
-                    "potential_savings": 15.0,
-                    "difficulty": "Easy",
-                    "priority": 4,
-                    "category": "Energy"
-                },
-                {
-                    "title": "Use Energy-Efficient Appliances",
-                    "description": "Replace old appliances with Energy Star rated ones. Significant long-term savings.",
-                    "potential_savings": 60.0,
-                    "difficulty": "Hard",
-                    "priority": 3,
-                    "category": "Energy"
-                }
-            ],
-            "diet": [
-                {
-                    "title": "Reduce Meat Consumption",
-                    "description": "Have meat-free days or reduce portion sizes. Meat production has high carbon footprint.",
-                    "potential_savings": 100.0,
-                    "difficulty": "Medium",
-                    "priority": 4,
-                    "category": "Diet"
-                },
-                {
-                    "title": "Buy Local and Seasonal Food",
-                    "description": "Choose locally grown, seasonal produce. Reduces transportation emissions.",
-                    "potential_savings": 30.0,
-                    "difficulty": "Easy",
-                    "priority": 3,
-                    "category": "Diet"
-                },
-                {
-                    "title": "Reduce Food Waste",
-                    "description": "Plan meals, store food properly, and use leftovers. Reduces methane emissions from landfills.",
-                    "potential_savings": 40.0,
-                    "difficulty": "Medium",
-                    "priority": 4,
-                    "category": "Diet"
-                }
-            ],
-            "waste": [
-                {
-                    "title": "Improve Recycling",
-                    "description": "Recycle paper, plastic, glass, and metal properly. Reduces landfill waste and emissions.",
-                    "potential_savings": 20.0,
-                    "difficulty": "Easy",
-                    "priority": 4,
-                    "category": "Waste"
-                },
-                {
-                    "title": "Compost Organic Waste",
-                    "description": "Start composting kitchen scraps and garden waste. Creates nutrient-rich soil.",
-                    "potential_savings": 35.0,
-                    "difficulty": "Medium",
-                    "priority": 3,
-                    "category": "Waste"
-                },
-                {
-                    "title": "Reduce Single-Use Plastics",
-                    "description": "Use reusable bags, bottles, and containers. Reduces plastic waste significantly.",
-                    "potential_savings": 25.0,
-                    "difficulty": "Easy",
-                    "priority": 4,
-                    "category": "Waste"
-                }
-            ],
-            "lifestyle": [
-                {
-                    "title": "Reduce Screen Time",
-                    "description": "Limit TV and computer usage. Saves energy and improves health.",
-                    "potential_savings": 30.0,
-                    "difficulty": "Hard",
-                    "priority": 2,
-                    "category": "Lifestyle"
-                },
-                {
-                    "title": "Buy Fewer Clothes",
-                    "description": "Adopt minimal wardrobe approach. Fashion industry has high environmental impact.",
-                    "potential_savings": 50.0,
-                    "difficulty": "Medium",
-                    "priority": 3,
-                    "category": "Lifestyle"
-                },
-                {
-                    "title": "Optimize Heating/Cooling",
-                    "description": "Use programmable thermostats and proper insulation. Reduces energy consumption.",
-                    "potential_savings": 45.0,
-                    "difficulty": "Medium",
-                    "priority": 3,
-                    "category": "Lifestyle"
-                }
-            ]
-        }
+        self.rules = RuleEvaluator()
+        self.executor = get_executor_service()
 
-    async def get_recommendations(self, submission, prediction: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def get_recommendations(self, submission, prediction: Dict[str, Any], limit: int = TOP_RECOMMENDATIONS) -> List[Dict[str, Any]]:
         """Get personalized recommendations based on user data and prediction"""
         try:
-            recommendations = []
-            
-            # Analyze user's high-impact areas
-            high_impact_areas = self._analyze_high_impact_areas(submission, prediction)
-            
-            # Get recommendations for each high-impact area
-            for area in high_impact_areas:
-                if area in self.recommendations_db:
-                    recommendations.extend(self.recommendations_db[area])
-            
-            # Add specific recommendations based on user data
-            specific_recs = self._get_specific_recommendations(submission)
-            recommendations.extend(specific_recs)
-            
-            # Sort by priority and potential savings
-            recommendations.sort(key=lambda x: (x['priority'], x['potential_savings']), reverse=True)
-            
-            # Return top 5 recommendations
-            return recommendations[:5]
+            return self.rules.recommend_one(submission, limit)
             
         except Exception as e:
             logger.error(f"Recommendation generation failed: {str(e)}")
             return []
 
-    def _analyze_high_impact_areas(self, submission, prediction: Dict[str, Any]) -> List[str]:
-        """Analyze which areas have highest impact on user's CO2 emissions"""
-        areas = []
-        
-        # Transport analysis
-        if submission.vehicle_distance > 1000 or submission.air_travel in ['frequently', 'very frequently']:
-            areas.append('transport')
-        
-        # Energy analysis
-        if submission.tv_pc_hours > 8 or submission.internet_hours > 10:
-            areas.append('energy')
-        
-        # Diet analysis
-        if submission.diet in ['omnivore'] and submission.grocery_bill > 200:
-            areas.append('diet')
-        
-        # Waste analysis
-        if submission.waste_bag_count > 3 or len(submission.recycling) < 2:
-            areas.append('waste')
-        
-        # Lifestyle analysis
-        if submission.new_clothes > 5 or submission.tv_pc_hours > 6:
-            areas.append('lifestyle')
-        
-        return areas
+    async def get_recommendations_batch(self, submissions: Sequence[Any],
+                                        limit: int = TOP_RECOMMENDATIONS) -> List[List[Dict[str, Any]]]:
+        """Recommendations for many submissions, scored together; the same as get_recommendations for each"""
+        if not submissions:
+            return []
+        return await self.executor.run_in_thread(self._recommend_batch, submissions, limit)
 
-    def _get_specific_recommendations(self, submission) -> List[Dict[str, Any]]:
-        """Get specific recommendations based on user's exact data"""
-        specific_recs = []
-        
-        # High vehicle distance
-        if submission.vehicle_distance > 2000:
-            specific_recs.append({
-                "title": "Consider Electric Vehicle",
-                "description": f"Your monthly distance of {submission.vehicle_distance}km is high. An electric vehicle could reduce emissions by 70%.",
-                "potential_savings": 120.0,
-                "difficulty": "Hard",
-                "priority": 4,
-                "category": "Transport"
-            })
-        
-        # High air travel
-        if submission.air_travel == 'very frequently':
-            specific_recs.append({
-                "title": "Video Conferencing for Business",
-                "description": "Replace some business trips with video calls. Each avoided flight saves significant CO2.",
-                "potential_savings": 300.0,
-                "difficulty": "Medium",
-                "priority": 5,
-                "category": "Transport"
-            })
-        
-        # High screen time
-        if submission.tv_pc_hours > 10:
-            specific_recs.append({
-                "title": "Digital Detox Days",
-                "description": f"Reduce your {submission.tv_pc_hours} hours daily screen time. Try outdoor activities instead.",
-                "potential_savings": 40.0,
-                "difficulty": "Hard",
-                "priority": 3,
-                "category": "Lifestyle"
-            })
-        
-        # High grocery spending
-        if submission.grocery_bill > 300:
-            specific_recs.append({
-                "title": "Meal Planning",
-                "description": "Plan meals weekly to reduce food waste and grocery spending. Buy only what you need.",
-                "potential_savings": 60.0,
-                "difficulty": "Medium",
-                "priority": 3,
-                "category": "Diet"
-            })
-        
-        # Low recycling
-        if len(submission.recycling) < 2:
-            specific_recs.append({
-                "title": "Expand Recycling Program",
-                "description": f"Currently recycling {len(submission.recycling)} materials. Add more categories for better impact.",
-                "potential_savings": 30.0,
-                "difficulty": "Easy",
-                "priority": 4,
-                "category": "Waste"
-            })
-        
-        return specific_recs
+    def _recommend_batch(self, submissions: Sequence[Any], limit: int) -> List[List[Dict[str, Any]]]:
+        """Evaluate the recommendation rules for all submissions together (blocking)"""
+        return self.rules.recommend(self.rules.columns(submissions), limit)
 
     async def get_area_recommendations(self, city: str, area: str, current_co2: float) -> List[Dict[str, Any]]:
         """Get area-specific recommendations based on local conditions"""
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "full" retrains from scratch; "incremental" updates the saved models with new submissions
+RETRAIN_MODES = ("full", "incremental")
+
+# How often a finished run waiting to swap its models in checks for shutdown
+SWAP_POLL_SECONDS = 0.5
+
+
+class RetrainWorker:
+    """Retrains models on a dedicated thread and swaps them into the live service"""
+
+    def __init__(self, ml_service):
+        self.ml_service = ml_service
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain-worker")
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self.status = "idle"
+        self.runs = 0
+        self.last_mode: Optional[str] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    @property
+    def running_mode(self) -> Optional[str]:
+        """Mode of the in-progress run, or None when idle"""
+        with self._lock:
+            return self.last_mode if self.running else None
+
+    def trigger(self, mode: str = "full") -> bool:
+        """Start a retraining run unless one is already in progress"""
+        if mode not in RETRAIN_MODES:
+            raise ValueError(f"Unknown retrain mode: {mode}")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.running:
+                return False
+            self.status = "running"
+            self.last_mode = mode
+            self.last_started_at = datetime.now()
+            self._future = self._executor.submit(self._run, loop, mode)
+            return True
+
+    async def wait(self) -> Dict[str, Any]:
+        """Wait for the current retraining run without blocking the event loop"""
+        if self._future is None:
+            raise RuntimeError("No retraining run has been started")
+        return await asyncio.wrap_future(self._future)
+
+    def _run(self, loop: asyncio.AbstractEventLoop, mode: str) -> Dict[str, Any]:
+        """Train a new model version, then swap it in on the event loop thread"""
+        try:
+            bundle = asyncio.run(self.ml_service.train_staging(incremental=mode == "incremental"))
+            if bundle is None:
+                result = {**self.ml_service.training_summary(), "status": "no_new_data", "models_retrained": [], "mode": mode}
+                self._finish("idle", result=result)
+                logger.info("Background update found no new submissions, live models kept")
+                return result
+
+            # Swapping between requests keeps the pin check and the prediction
+            # cache reset in step with the version requests are served from
+            served = self._swap_on_loop(loop, bundle)
+            result = self.ml_service.training_summary(bundle)
+            result["served"] = bool(served)
+            result["mode"] = mode
+
+            self._finish("idle", result=result)
+            if served is None:
+                logger.info(f"Background {mode} retraining completed during shutdown, version {bundle.version} saved, not swapped in")
+            else:
+                logger.info(f"Background {mode} retraining completed, version {bundle.version} "
+                            f"{'swapped in' if served else 'saved; pinned version kept'}")
+            return result
+
+        except Exception as e:
+            self._finish("failed", error=str(e))
+            logger.error(f"Background retraining failed: {str(e)}")
+            raise
+
+    def _swap_on_loop(self, loop: asyncio.AbstractEventLoop, bundle) -> Optional[bool]:
+        """Swap the bundle in on the event loop thread; None once the server is shutting down
+
+        A stopped loop never runs the swap, so waiting on it unbounded would
+        keep this thread, and with it interpreter exit, blocked forever.
+        """
+        def stopping() -> bool:
+            return self._stopping.is_set() or loop.is_closed() or not loop.is_running()
+
+        if stopping():
+            return None
+        swap = asyncio.run_coroutine_threadsafe(self._swap(bundle), loop)
+        while True:
+            try:
+                return swap.result(timeout=SWAP_POLL_SECONDS)
+            except FutureTimeoutError:
+                if stopping():
+                    if not loop.is_closed():
+                        swap.cancel()
+                    return None
+
+    async def _swap(self, bundle) -> bool:
+        return self.ml_service.swap_models(bundle)
+
+    def _finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.runs += 1
+            self.last_finished_at = datetime.now()
+            self.last_duration_seconds = (self.last_finished_at - self.last_started_at).total_seconds()
+            self.last_result = result
+            self.last_error = error
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the worker state for reporting"""
+        return {
+            "status": self.status,
+            "runs": self.runs,
+            "last_mode": self.last_mode,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_error": self.last_error,
+            "best_model": self.last_result.get("best_model") if self.last_result else None,
+            "version": self.last_result.get("version") if self.last_result else None
+        }
+
+    def shutdown(self):
+        """Stop accepting runs; an in-progress run finishes training and saves, but is not swapped in"""
+        self._stopping.set()
+        self._executor.shutdown(wait=False)
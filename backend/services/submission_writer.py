@@ -0,0 +1,126 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "commit" writes and commits each submission before the request returns.
+# "group" queues submissions and commits them in batches from a background
+# thread; a crash can lose up to one flush interval of queued submissions.
+WRITE_MODE = os.environ.get("CO2_WRITE_MODE", "commit").lower()
+WRITE_BATCH_SIZE = int(os.environ.get("CO2_WRITE_BATCH_SIZE", 200))
+WRITE_FLUSH_INTERVAL = float(os.environ.get("CO2_WRITE_FLUSH_MS", 200)) / 1000
+
+WRITE_MODES = ("commit", "group")
+
+_STOP = object()
+
+
+class SubmissionWriter:
+    """Write-behind queue that inserts submission rows in batches on a dedicated thread"""
+
+    def __init__(self, write_rows: Callable[[List[Dict[str, Any]]], None],
+                 batch_size: int = WRITE_BATCH_SIZE, flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self.write_rows = write_rows
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches = 0
+        self.last_flush_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def submit(self, row: Dict[str, Any]):
+        """Queue a row for the next batch, or write it directly once the writer is closed"""
+        with self._lock:
+            if not self._closed:
+                self._start()
+                self._queue.put(row)
+                return
+        self._write([row])
+
+    def flush(self):
+        """Block until every row queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write any queued rows and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+            logger.info(f"Submission writer stopped after {self.rows_written} rows in {self.batches} batches")
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Collect rows until the batch is full or the flush interval has passed, then write them"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write(batch, queued=True)
+
+    def _write(self, rows: List[Dict[str, Any]], queued: bool = False):
+        try:
+            self.write_rows(rows)
+            with self._lock:
+                self.rows_written += len(rows)
+                self.batches += 1
+                self.last_flush_at = datetime.now()
+        except Exception as e:
+            with self._lock:
+                self.rows_failed += len(rows)
+                self.last_error = str(e)
+            logger.error(f"Failed to write {len(rows)} queued submissions: {str(e)}")
+        finally:
+            if queued:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the writer state for reporting"""
+        return {
+            "pending": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "batches": self.batches,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            "last_error": self.last_error
+        }
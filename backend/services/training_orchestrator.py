@@ -0,0 +1,373 @@
+import os
+import shutil
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import logging
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, r2_score
+
+logger = logging.getLogger(__name__)
+
+# Train candidate models in separate processes at the same time. Falls back to
+# training one after another in-process when a process pool cannot be created
+# (e.g. on AWS Lambda, which has no /dev/shm).
+PARALLEL_TRAINING = os.environ.get("CO2_PARALLEL_TRAINING", "true").lower() in ("1", "true", "yes")
+
+# Share of the machine's cores given to each model while they train together
+CORE_SHARES = {
+    'random_forest': 0.4,
+    'xgboost': 0.4,
+    'neural_network': 0.2,
+}
+
+
+class TrainingData(NamedTuple):
+    """The train/test split every candidate model is trained and scored on"""
+    X_train: np.ndarray
+    X_test: np.ndarray
+    y_train: np.ndarray
+    y_test: np.ndarray
+    feature_columns: List[str]
+
+
+@dataclass
+class ModelResult:
+    """One trained candidate model"""
+    name: str
+    model: Any = None
+    scaler: Any = None
+    performance: Dict[str, Any] = field(default_factory=dict)
+    seconds: float = 0.0
+    cores: int = 1
+    error: Optional[str] = None
+
+
+def split_training_data(X: np.ndarray, y: np.ndarray, feature_columns: List[str]) -> TrainingData:
+    """Split once so every model sees the same rows"""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return TrainingData(X_train, X_test, y_train, y_test, list(feature_columns))
+
+
+def core_budgets(model_names: List[str], cpu_count: Optional[int] = None) -> Dict[str, int]:
+    """Cores for each model, from its share of the machine (at least one each)"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    total_share = sum(CORE_SHARES[name] for name in model_names)
+    return {
+        name: max(1, int(cpu_count * CORE_SHARES[name] / total_share))
+        for name in model_names
+    }
+
+
+def _score(y_test: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    return {
+        'mae': mean_absolute_error(y_test, y_pred),
+        'r2': r2_score(y_test, y_pred)
+    }
+
+
+def _backend_module(model_name: str) -> Any:
+    """Import the library behind a model, deferred so worker processes import only what they train"""
+    from services.model_backends import get_model_backend
+    return get_model_backend(model_name).import_module()
+
+
+def train_random_forest(data: TrainingData, cores: int) -> ModelResult:
+    """Train Random Forest model"""
+    from sklearn.ensemble import RandomForestRegressor
+
+    rf_model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=15,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=cores
+    )
+    rf_model.fit(data.X_train, data.y_train)
+
+    performance = _score(data.y_test, rf_model.predict(data.X_test))
+    performance['feature_importance'] = dict(zip(data.feature_columns, rf_model.feature_importances_))
+    return ModelResult('random_forest', model=rf_model, performance=performance)
+
+
+def train_xgboost(data: TrainingData, cores: int) -> ModelResult:
+    """Train XGBoost model"""
+    import xgboost as xgb
+
+    xgb_model = xgb.XGBRegressor(
+        n_estimators=200,
+        max_depth=8,
+        learning_rate=0.1,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        random_state=42,
+        n_jobs=cores
+    )
+    xgb_model.fit(data.X_train, data.y_train)
+
+    performance = _score(data.y_test, xgb_model.predict(data.X_test))
+    performance['feature_importance'] = dict(zip(data.feature_columns, xgb_model.feature_importances_))
+    return ModelResult('xgboost', model=xgb_model, performance=performance)
+
+
+def train_neural_network(data: TrainingData, cores: int) -> ModelResult:
+    """Train Neural Network model"""
+    from sklearn.preprocessing import StandardScaler
+
+    keras = _backend_module('neural_network')
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(cores)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        # TensorFlow was already initialised in this process
+        pass
+
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(data.X_train)
+    X_test_scaled = scaler.transform(data.X_test)
+
+    # Build neural network
+    Dense, Dropout = keras.layers.Dense, keras.layers.Dropout
+    model = keras.models.Sequential([
+        Dense(128, activation='relu', input_shape=(X_train_scaled.shape[1],)),
+        Dropout(0.3),
+        Dense(64, activation='relu'),
+        Dropout(0.3),
+        Dense(32, activation='relu'),
+        Dropout(0.2),
+        Dense(1, activation='linear')
+    ])
+
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss='mse',
+        metrics=['mae']
+    )
+
+    history = model.fit(
+        X_train_scaled, data.y_train,
+        epochs=100,
+        batch_size=32,
+        validation_split=0.2,
+        verbose=0
+    )
+
+    performance = _score(data.y_test, model.predict(X_test_scaled, verbose=0).flatten())
+    performance['training_history'] = history.history
+    return ModelResult('neural_network', model=model, scaler=scaler, performance=performance)
+
+
+TRAINERS: Dict[str, Callable[[TrainingData, int], ModelResult]] = {
+    'random_forest': train_random_forest,
+    'xgboost': train_xgboost,
+    'neural_network': train_neural_network,
+}
+
+
+# Incremental updates add this much capacity per run
+INCREMENTAL_XGB_ROUNDS = int(os.environ.get("CO2_INCREMENTAL_XGB_ROUNDS", 20))
+INCREMENTAL_RF_TREES = int(os.environ.get("CO2_INCREMENTAL_RF_TREES", 10))
+INCREMENTAL_NN_EPOCHS = int(os.environ.get("CO2_INCREMENTAL_NN_EPOCHS", 5))
+
+
+def update_random_forest(model, scaler, data: TrainingData) -> ModelResult:
+    """Warm-start extra trees fitted on the new rows"""
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + INCREMENTAL_RF_TREES)
+    model.fit(data.X_train, data.y_train)
+    model.set_params(warm_start=False)
+
+    performance = _score(data.y_test, model.predict(data.X_test))
+    performance['feature_importance'] = dict(zip(data.feature_columns, model.feature_importances_))
+    return ModelResult('random_forest', model=model, performance=performance)
+
+
+def update_xgboost(model, scaler, data: TrainingData) -> ModelResult:
+    """Continue boosting from the current booster on the new rows"""
+    import xgboost as xgb
+
+    params = model.get_params()
+    params['n_estimators'] = INCREMENTAL_XGB_ROUNDS
+    updated = xgb.XGBRegressor(**params)
+    updated.fit(data.X_train, data.y_train, xgb_model=model.get_booster())
+
+    performance = _score(data.y_test, updated.predict(data.X_test))
+    performance['feature_importance'] = dict(zip(data.feature_columns, updated.feature_importances_))
+    return ModelResult('xgboost', model=updated, performance=performance)
+
+
+def update_neural_network(model, scaler, data: TrainingData) -> ModelResult:
+    """Run a few more epochs on the new rows, keeping the original input scaling"""
+    keras = _backend_module('neural_network')
+    if model.optimizer is None:
+        # Saved networks are loaded without their optimizer state
+        model.compile(optimizer=keras.optimizers.Adam(learning_rate=0.001), loss='mse', metrics=['mae'])
+
+    history = model.fit(
+        scaler.transform(data.X_train), data.y_train,
+        epochs=INCREMENTAL_NN_EPOCHS,
+        batch_size=32,
+        verbose=0
+    )
+
+    performance = _score(data.y_test, model.predict(scaler.transform(data.X_test), verbose=0).flatten())
+    performance['training_history'] = history.history
+    return ModelResult('neural_network', model=model, scaler=scaler, performance=performance)
+
+
+UPDATERS: Dict[str, Callable[[Any, Any, TrainingData], ModelResult]] = {
+    'random_forest': update_random_forest,
+    'xgboost': update_xgboost,
+    'neural_network': update_neural_network,
+}
+
+
+def update_trained_models(models: Dict[str, Any], scalers: Dict[str, Any], data: TrainingData) -> Dict[str, Any]:
+    """Update already trained models in place of a full retrain (blocking)
+
+    Runs in-process, one model after another: the work is proportional to the
+    new rows, so shipping the models to worker processes would cost more.
+    """
+    start = time.perf_counter()
+    results = {}
+    for name, model in models.items():
+        model_start = time.perf_counter()
+        try:
+            result = UPDATERS[name](model, scalers.get(name), data)
+            logger.info(f"{name} updated in {time.perf_counter() - model_start:.1f}s - "
+                        f"MAE: {result.performance['mae']:.2f}, R2: {result.performance['r2']:.3f}")
+        except Exception as e:
+            result = ModelResult(name, error=str(e))
+            logger.error(f"{name} update failed: {str(e)}")
+        result.seconds = time.perf_counter() - model_start
+        results[name] = result
+
+    return {
+        "results": results,
+        "report": {
+            "mode": "incremental",
+            "wall_seconds": time.perf_counter() - start,
+            "train_rows": len(data.X_train),
+            "test_rows": len(data.X_test),
+            "models": {
+                result.name: {
+                    "seconds": result.seconds,
+                    "status": "failed" if result.error else "updated",
+                    "error": result.error
+                }
+                for result in results.values()
+            }
+        }
+    }
+
+
+def _run_trainer(name: str, data_dir: Optional[str], data: Optional[TrainingData], cores: int) -> ModelResult:
+    """Train one model and time it; module-level so process pools can pickle it"""
+    start = time.perf_counter()
+    try:
+        if data is None:
+            data = _load_shared_data(data_dir)
+        result = TRAINERS[name](data, cores)
+    except Exception as e:
+        result = ModelResult(name, error=str(e))
+    result.seconds = time.perf_counter() - start
+    result.cores = cores
+    return result
+
+
+def _save_shared_data(data: TrainingData) -> str:
+    """Write the split to .npy files that worker processes memory-map read-only"""
+    data_dir = tempfile.mkdtemp(prefix="co2-training-")
+    for name in ('X_train', 'X_test', 'y_train', 'y_test'):
+        np.save(os.path.join(data_dir, f"{name}.npy"), getattr(data, name))
+    with open(os.path.join(data_dir, "features.txt"), 'w') as f:
+        f.write("\n".join(data.feature_columns))
+    return data_dir
+
+
+def _load_shared_data(data_dir: str) -> TrainingData:
+    arrays = {
+        name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+        for name in ('X_train', 'X_test', 'y_train', 'y_test')
+    }
+    with open(os.path.join(data_dir, "features.txt")) as f:
+        feature_columns = f.read().split("\n")
+    return TrainingData(feature_columns=feature_columns, **arrays)
+
+
+class TrainingOrchestrator:
+    """Trains the candidate models on one shared split, in parallel where possible"""
+
+    def __init__(self, model_names: Optional[List[str]] = None, parallel: bool = PARALLEL_TRAINING):
+        self.model_names = model_names or list(TRAINERS)
+        self.parallel = parallel
+
+    def train(self, data: TrainingData) -> Dict[str, Any]:
+        """Train every candidate model (blocking); returns results and a timing report"""
+        start = time.perf_counter()
+        budgets = core_budgets(self.model_names)
+
+        results = None
+        mode = "sequential"
+        if self.parallel and len(self.model_names) > 1:
+            try:
+                results = self._train_in_processes(data, budgets)
+                mode = "parallel"
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(f"Process pool unavailable, training sequentially: {str(e)}")
+
+        if results is None:
+            # One model at a time, so each can use every core
+            cpu_count = os.cpu_count() or 1
+            budgets = {name: cpu_count for name in self.model_names}
+            results = [_run_trainer(name, None, data, budgets[name]) for name in self.model_names]
+
+        wall_seconds = time.perf_counter() - start
+        for result in results:
+            if result.error:
+                logger.error(f"{result.name} training failed: {result.error}")
+            else:
+                logger.info(f"{result.name} trained in {result.seconds:.1f}s on {result.cores} cores - "
+                            f"MAE: {result.performance['mae']:.2f}, R2: {result.performance['r2']:.3f}")
+        logger.info(f"Training finished in {wall_seconds:.1f}s ({mode})")
+
+        return {
+            "results": {result.name: result for result in results},
+            "report": {
+                "mode": mode,
+                "wall_seconds": wall_seconds,
+                "train_rows": len(data.X_train),
+                "test_rows": len(data.X_test),
+                "models": {
+                    result.name: {
+                        "seconds": result.seconds,
+                        "cores": result.cores,
+                        "status": "failed" if result.error else "trained",
+                        "error": result.error
+                    }
+                    for result in results
+                }
+            }
+        }
+
+    def _train_in_processes(self, data: TrainingData, budgets: Dict[str, int]) -> List[ModelResult]:
+        # Spawned workers do not inherit the parent's OpenMP or TensorFlow thread state
+        context = multiprocessing.get_context("spawn")
+        data_dir = _save_shared_data(data)
+        try:
+            with ProcessPoolExecutor(max_workers=len(self.model_names), mp_context=context) as pool:
+                futures = [
+                    pool.submit(_run_trainer, name, data_dir, None, budgets[name])
+                    for name in self.model_names
+                ]
+                return [future.result() for future in futures]
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,150 @@
+"""
+Property test: the columnar derived-field calculation matches the original
+per-submission formulas exactly, for random and boundary submissions
+"""
+
+import random
+
+import pandas as pd
+
+from models.user import UserSubmission
+from services.history_service import HistoryService, DERIVED_FIELD_INPUTS
+
+DERIVED_FIELDS = ['lpg_kg', 'flights_hours', 'meat_meals', 'dining_out', 'shopping_spend', 'waste_kg']
+
+DIETS = ['vegetarian', 'vegan', 'pescatarian', 'omnivore', 'keto', '']
+AIR_TRAVEL = ['never', 'rarely', 'frequently', 'very frequently', 'sometimes']
+SOCIAL_ACTIVITY = ['never', 'rarely', 'often', 'very often', 'weekly']
+COOKING_METHODS = ['Stove', 'Oven', 'Microwave', 'Grill', 'Airfryer']
+RECYCLING = ['Paper', 'Plastic', 'Glass', 'Metal']
+
+# Values at and either side of the thresholds in the formulas
+GROCERY_BILLS = [0.0, 99.99, 100.0, 100.01, 150.5, 199.99, 200.0, 200.01, 299.99, 300.0, 300.01, 1234.56]
+TV_PC_HOURS = [0.0, 7.99, 8.0, 8.01, 24.0]
+INTERNET_HOURS = [0.0, 9.99, 10.0, 10.01, 24.0]
+
+
+def reference_fields(submission: UserSubmission) -> dict:
+    """The scalar formulas as they were before the columnar calculation"""
+    lpg_kg = 10.0
+    if 'Stove' in submission.cooking_methods:
+        lpg_kg += 5.0
+    if 'Oven' in submission.cooking_methods:
+        lpg_kg += 3.0
+    if 'Grill' in submission.cooking_methods:
+        lpg_kg += 2.0
+    if submission.diet == 'vegetarian':
+        lpg_kg *= 0.8
+    elif submission.diet == 'vegan':
+        lpg_kg *= 0.6
+    elif submission.diet == 'omnivore':
+        lpg_kg *= 1.2
+
+    flights_hours = {'never': 0.0, 'rarely': 2.0, 'frequently': 8.0, 'very frequently': 16.0}.get(submission.air_travel, 0.0)
+
+    if submission.diet in ('vegan', 'vegetarian'):
+        meat_meals = 0
+    elif submission.diet == 'pescatarian':
+        meat_meals = int(submission.grocery_bill * 0.1)
+    else:
+        meat_meals = int(submission.grocery_bill * 0.2)
+
+    dining_out = 5
+    if submission.social_activity == 'very often':
+        dining_out += 10
+    elif submission.social_activity == 'often':
+        dining_out += 5
+    elif submission.social_activity == 'rarely':
+        dining_out -= 2
+    if submission.grocery_bill < 100:
+        dining_out += 5
+    elif submission.grocery_bill > 300:
+        dining_out -= 3
+    dining_out = max(0, dining_out)
+
+    shopping_spend = submission.new_clothes * 50
+    if submission.tv_pc_hours > 8:
+        shopping_spend += 100
+    if submission.internet_hours > 10:
+        shopping_spend += 50
+
+    waste_kg = submission.waste_bag_count * 2.5
+    if submission.grocery_bill > 200:
+        waste_kg *= 1.2
+    if len(submission.recycling) > 2:
+        waste_kg *= 0.8
+
+    return {
+        'lpg_kg': lpg_kg,
+        'flights_hours': flights_hours,
+        'meat_meals': meat_meals,
+        'dining_out': dining_out,
+        'shopping_spend': shopping_spend,
+        'waste_kg': waste_kg
+    }
+
+
+def random_submission(rng: random.Random) -> UserSubmission:
+    return UserSubmission(
+        body_type='normal', sex='female', diet=rng.choice(DIETS), shower_frequency='daily',
+        heating_energy='electricity', transport=0.0, vehicle_distance=0.0,
+        air_travel=rng.choice(AIR_TRAVEL), social_activity=rng.choice(SOCIAL_ACTIVITY),
+        grocery_bill=rng.choice(GROCERY_BILLS) if rng.random() < 0.5 else round(rng.uniform(0, 2000), 2),
+        new_clothes=rng.randint(0, 60),
+        tv_pc_hours=rng.choice(TV_PC_HOURS) if rng.random() < 0.5 else round(rng.uniform(0, 24), 1),
+        internet_hours=rng.choice(INTERNET_HOURS) if rng.random() < 0.5 else round(rng.uniform(0, 24), 1),
+        energy_efficiency='Yes', recycling=rng.sample(RECYCLING, rng.randint(0, len(RECYCLING))),
+        waste_bag_size=1.0, waste_bag_count=rng.randint(0, 10),
+        cooking_methods=rng.sample(COOKING_METHODS, rng.randint(0, len(COOKING_METHODS))),
+        city='Mumbai', area='Andheri'
+    )
+
+
+def random_submissions(seed: int, count: int):
+    rng = random.Random(seed)
+    return [random_submission(rng) for _ in range(count)]
+
+
+def assert_same(actual, expected):
+    # Exact equality, and the same Python type (int stays int, float stays float)
+    assert actual == expected and type(actual) is type(expected), (actual, expected)
+
+
+def test_columnar_matches_scalar_formulas():
+    service = HistoryService()
+    for seed in range(20):
+        submissions = random_submissions(seed, 250)
+        derived = service._calculate_derived_fields(service._derived_field_columns(submissions))
+        for i, submission in enumerate(submissions):
+            expected = reference_fields(submission)
+            for field in DERIVED_FIELDS:
+                assert_same(derived[field][i].item(), expected[field])
+
+
+def test_columnar_accepts_dataframe():
+    service = HistoryService()
+    submissions = random_submissions(1234, 500)
+    frame = pd.DataFrame([submission.dict() for submission in submissions])[DERIVED_FIELD_INPUTS]
+    from_frame = service._calculate_derived_fields(frame)
+    from_columns = service._calculate_derived_fields(service._derived_field_columns(submissions))
+    for field in DERIVED_FIELDS:
+        assert from_frame[field].tolist() == from_columns[field].tolist()
+
+
+def test_scalar_wrappers_match_scalar_formulas():
+    service = HistoryService()
+    for submission in random_submissions(99, 200):
+        expected = reference_fields(submission)
+        for field in DERIVED_FIELDS:
+            assert_same(getattr(service, f'_calculate_{field}')(submission), expected[field])
+
+
+def test_submission_row_does_not_modify_submission():
+    service = HistoryService()
+    for submission in random_submissions(7, 50):
+        before = submission.dict()
+        row = service._build_submission_row(submission, 123.4)
+        assert submission.dict() == before
+        expected = reference_fields(submission)
+        for field in DERIVED_FIELDS:
+            assert_same(row['submission_data'][field], expected[field])
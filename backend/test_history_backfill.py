@@ -0,0 +1,69 @@
+"""
+Backfilling missing predictions: a stored submission with a label the
+served model never saw loses only its own prediction
+"""
+
+import asyncio
+import os
+import tempfile
+
+import models.database as database
+from models.database import UserSubmissionDB
+from services.history_service import HistoryService
+from services.ml_service import MLService
+
+SUBMISSION = {
+    "body_type": "normal", "sex": "male", "diet": "vegetarian", "shower_frequency": "daily",
+    "heating_energy": "natural gas", "transport": 1.0, "vehicle_distance": 1000.0,
+    "air_travel": "rarely", "social_activity": "often", "grocery_bill": 200.0, "new_clothes": 3,
+    "tv_pc_hours": 4.0, "internet_hours": 6.0, "energy_efficiency": "Yes",
+    "recycling": ["Paper", "Plastic"], "waste_bag_size": 10.0, "waste_bag_count": 2,
+    "cooking_methods": ["Stove", "Microwave"], "city": "Mumbai", "area": "Worli"
+}
+
+
+def store_without_prediction(submissions):
+    db = next(database.get_db())
+    try:
+        rows = [UserSubmissionDB(submission_data=data, city=data["city"], area=data["area"], diet=data["diet"])
+                for data in submissions]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+def stored_predictions():
+    db = next(database.get_db())
+    try:
+        return {row.id: row.predicted_co2 for row in db.query(UserSubmissionDB).all()}
+    finally:
+        db.close()
+
+
+def test_unseen_label_does_not_block_backfill():
+    path = os.path.join(tempfile.mkdtemp(prefix="co2-test-"), "test.db")
+    database.configure_database(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=database.engine)
+
+    ml_service = MLService()
+    asyncio.run(ml_service.initialize_models())
+    assert ml_service.models_loaded
+
+    unseen = dict(SUBMISSION, diet="fruitarian")
+    ids = store_without_prediction([SUBMISSION, unseen, dict(SUBMISSION, grocery_bill=350.0)])
+    unseen_id = ids[1]
+
+    service = HistoryService(ml_service=ml_service)
+    history = asyncio.run(service.get_recent_users("Mumbai", "Worli", limit=10))
+
+    returned = {entry["id"]: entry["predicted_co2"] for entry in history}
+    assert set(returned) == set(ids)
+    assert returned[unseen_id] is None
+    assert all(isinstance(returned[i], float) for i in ids if i != unseen_id)
+
+    # The scored rows are saved; the unseen one is left for a later model
+    saved = stored_predictions()
+    assert saved[unseen_id] is None
+    assert all(saved[i] == returned[i] for i in ids if i != unseen_id)
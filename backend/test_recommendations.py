@@ -0,0 +1,181 @@
+"""
+Property test: the rule evaluator recommends exactly what the original
+if-chain did, in the same order, for random and boundary submissions
+"""
+
+import asyncio
+import random
+
+import pandas as pd
+
+from models.user import UserSubmission
+from services.recommendation_rules import RuleEvaluator
+from services.recommendation_service import RecommendationService, TOP_RECOMMENDATIONS
+
+REFERENCE_FIELDS = ["title", "description", "potential_savings", "difficulty", "priority", "category"]
+
+# The recommendation database as it was before the rules moved to data
+REFERENCE_AREAS = {
+    "transport": [
+        ("Use Public Transportation", "Switch to buses, trains, or metro for daily commute. Reduces individual carbon footprint significantly.", 150.0, "Medium", 5, "Transport"),
+        ("Carpool or Bike to Work", "Share rides with colleagues or use bicycle for short distances. Great for health and environment.", 80.0, "Easy", 4, "Transport"),
+        ("Reduce Air Travel", "Choose train or bus for domestic travel. Consider video conferencing for business meetings.", 200.0, "Hard", 3, "Transport")
+    ],
+    "energy": [
+        ("Switch to LED Bulbs", "Replace incandescent bulbs with LED lights. Uses 75% less energy and lasts longer.", 25.0, "Easy", 5, "Energy"),
+        ("Unplug Electronics", "Unplug chargers and electronics when not in use. Reduces phantom energy consumption.", 15.0, "Easy", 4, "Energy"),
+        ("Use Energy-Efficient Appliances", "Replace old appliances with Energy Star rated ones. Significant long-term savings.", 60.0, "Hard", 3, "Energy")
+    ],
+    "diet": [
+        ("Reduce Meat Consumption", "Have meat-free days or reduce portion sizes. Meat production has high carbon footprint.", 100.0, "Medium", 4, "Diet"),
+        ("Buy Local and Seasonal Food", "Choose locally grown, seasonal produce. Reduces transportation emissions.", 30.0, "Easy", 3, "Diet"),
+        ("Reduce Food Waste", "Plan meals, store food properly, and use leftovers. Reduces methane emissions from landfills.", 40.0, "Medium", 4, "Diet")
+    ],
+    "waste": [
+        ("Improve Recycling", "Recycle paper, plastic, glass, and metal properly. Reduces landfill waste and emissions.", 20.0, "Easy", 4, "Waste"),
+        ("Compost Organic Waste", "Start composting kitchen scraps and garden waste. Creates nutrient-rich soil.", 35.0, "Medium", 3, "Waste"),
+        ("Reduce Single-Use Plastics", "Use reusable bags, bottles, and containers. Reduces plastic waste significantly.", 25.0, "Easy", 4, "Waste")
+    ],
+    "lifestyle": [
+        ("Reduce Screen Time", "Limit TV and computer usage. Saves energy and improves health.", 30.0, "Hard", 2, "Lifestyle"),
+        ("Buy Fewer Clothes", "Adopt minimal wardrobe approach. Fashion industry has high environmental impact.", 50.0, "Medium", 3, "Lifestyle"),
+        ("Optimize Heating/Cooling", "Use programmable thermostats and proper insulation. Reduces energy consumption.", 45.0, "Medium", 3, "Lifestyle")
+    ]
+}
+
+DIETS = ['vegetarian', 'vegan', 'pescatarian', 'omnivore', 'keto']
+AIR_TRAVEL = ['never', 'rarely', 'frequently', 'very frequently', 'sometimes']
+RECYCLING = ['Paper', 'Plastic', 'Glass', 'Metal']
+
+# Values at and either side of the thresholds in the rules
+VEHICLE_DISTANCES = [0.0, 999.9, 1000.0, 1000.5, 1999.99, 2000.0, 2000.01]
+GROCERY_BILLS = [0.0, 199.99, 200.0, 200.5, 299.99, 300.0, 300.01]
+TV_PC_HOURS = [0.0, 6.0, 6.5, 8.0, 8.1, 10.0, 10.5]
+INTERNET_HOURS = [0.0, 10.0, 10.1]
+
+
+def reference_row(row: tuple) -> dict:
+    return dict(zip(REFERENCE_FIELDS, row))
+
+
+def reference_recommendations(submission: UserSubmission) -> list:
+    """All recommendations, sorted, as the original if-chain made them"""
+    recommendations = []
+
+    areas = []
+    if submission.vehicle_distance > 1000 or submission.air_travel in ['frequently', 'very frequently']:
+        areas.append('transport')
+    if submission.tv_pc_hours > 8 or submission.internet_hours > 10:
+        areas.append('energy')
+    if submission.diet in ['omnivore'] and submission.grocery_bill > 200:
+        areas.append('diet')
+    if submission.waste_bag_count > 3 or len(submission.recycling) < 2:
+        areas.append('waste')
+    if submission.new_clothes > 5 or submission.tv_pc_hours > 6:
+        areas.append('lifestyle')
+    for area in areas:
+        recommendations.extend(reference_row(row) for row in REFERENCE_AREAS[area])
+
+    if submission.vehicle_distance > 2000:
+        recommendations.append(reference_row((
+            "Consider Electric Vehicle",
+            f"Your monthly distance of {submission.vehicle_distance}km is high. An electric vehicle could reduce emissions by 70%.",
+            120.0, "Hard", 4, "Transport")))
+    if submission.air_travel == 'very frequently':
+        recommendations.append(reference_row((
+            "Video Conferencing for Business",
+            "Replace some business trips with video calls. Each avoided flight saves significant CO2.",
+            300.0, "Medium", 5, "Transport")))
+    if submission.tv_pc_hours > 10:
+        recommendations.append(reference_row((
+            "Digital Detox Days",
+            f"Reduce your {submission.tv_pc_hours} hours daily screen time. Try outdoor activities instead.",
+            40.0, "Hard", 3, "Lifestyle")))
+    if submission.grocery_bill > 300:
+        recommendations.append(reference_row((
+            "Meal Planning",
+            "Plan meals weekly to reduce food waste and grocery spending. Buy only what you need.",
+            60.0, "Medium", 3, "Diet")))
+    if len(submission.recycling) < 2:
+        recommendations.append(reference_row((
+            "Expand Recycling Program",
+            f"Currently recycling {len(submission.recycling)} materials. Add more categories for better impact.",
+            30.0, "Easy", 4, "Waste")))
+
+    # Stable sort: ties keep the order above
+    recommendations.sort(key=lambda x: (x['priority'], x['potential_savings']), reverse=True)
+    return recommendations
+
+
+def random_submission(rng: random.Random) -> UserSubmission:
+    return UserSubmission(
+        body_type='normal', sex='male', diet=rng.choice(DIETS), shower_frequency='daily',
+        heating_energy='coal', transport=0.0,
+        vehicle_distance=rng.choice(VEHICLE_DISTANCES) if rng.random() < 0.5 else round(rng.uniform(0, 5000), 2),
+        air_travel=rng.choice(AIR_TRAVEL), social_activity='often',
+        grocery_bill=rng.choice(GROCERY_BILLS) if rng.random() < 0.5 else round(rng.uniform(0, 600), 2),
+        new_clothes=rng.randint(0, 10),
+        tv_pc_hours=rng.choice(TV_PC_HOURS) if rng.random() < 0.5 else round(rng.uniform(0, 24), 1),
+        internet_hours=rng.choice(INTERNET_HOURS) if rng.random() < 0.5 else round(rng.uniform(0, 24), 1),
+        energy_efficiency='Yes', recycling=rng.sample(RECYCLING, rng.randint(0, len(RECYCLING))),
+        waste_bag_size=1.0, waste_bag_count=rng.randint(0, 6), cooking_methods=['Stove'],
+        city='Mumbai', area='Andheri'
+    )
+
+
+def random_submissions(seed: int, count: int):
+    rng = random.Random(seed)
+    return [random_submission(rng) for _ in range(count)]
+
+
+def assert_same(actual: list, expected: list):
+    # Same recommendations, same order, same key order and value types
+    assert actual == expected, (actual, expected)
+    for got, want in zip(actual, expected):
+        assert list(got) == list(want)
+        assert [type(value) for value in got.values()] == [type(value) for value in want.values()]
+
+
+def test_recommend_one_matches_if_chain():
+    rules = RuleEvaluator()
+    for seed in range(10):
+        for submission in random_submissions(seed, 300):
+            expected = reference_recommendations(submission)
+            for k in (0, 1, 3, TOP_RECOMMENDATIONS, len(rules.ids)):
+                assert_same(rules.recommend_one(submission, k), expected[:k])
+
+
+def test_recommend_batch_matches_if_chain():
+    rules = RuleEvaluator()
+    for seed in range(5):
+        submissions = random_submissions(100 + seed, 500)
+        expected = [reference_recommendations(submission) for submission in submissions]
+        for data in (rules.columns(submissions), pd.DataFrame(rules.columns(submissions))):
+            for k in (1, 3, TOP_RECOMMENDATIONS, len(rules.ids)):
+                for actual, want in zip(rules.recommend(data, k), expected):
+                    assert_same(actual, want[:k])
+
+
+def test_service_matches_if_chain():
+    service = RecommendationService()
+    submissions = random_submissions(2024, 200)
+
+    async def run():
+        single = [await service.get_recommendations(submission, {}) for submission in submissions]
+        batch = await service.get_recommendations_batch(submissions)
+        return single, batch
+
+    single, batch = asyncio.run(run())
+    for submission, one, many in zip(submissions, single, batch):
+        expected = reference_recommendations(submission)[:TOP_RECOMMENDATIONS]
+        assert_same(one, expected)
+        assert_same(many, expected)
+
+
+def test_recommendations_are_copies():
+    rules = RuleEvaluator()
+    submission = random_submissions(5, 1)[0]
+    first = rules.recommend_one(submission, len(rules.ids))
+    for recommendation in first:
+        recommendation['title'] = 'changed'
+    assert_same(rules.recommend_one(submission, len(rules.ids)), reference_recommendations(submission))
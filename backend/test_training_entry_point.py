@@ -0,0 +1,62 @@
+"""
+Parallel training with `python main.py` as the entry point: spawned
+training workers re-import main.py as __mp_main__, and must train without
+building the app's services
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter whose __main__ is main.py, as under `python main.py`
+DRIVER = """
+import json, multiprocessing, os, sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.modules['__main__'].__file__ = os.path.abspath('main.py')
+
+import numpy as np
+from services.training_orchestrator import TrainingOrchestrator, split_training_data
+from test_training_entry_point import worker_state
+
+rng = np.random.default_rng(0)
+X = rng.random((400, 5))
+y = X @ np.array([3.0, 1.0, 0.5, 0.0, 2.0]) + rng.normal(0, 0.1, 400)
+outcome = TrainingOrchestrator(['random_forest', 'xgboost'], parallel=True).train(split_training_data(X, y, list('abcde')))
+
+with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+    state = pool.submit(worker_state).result()
+
+print(json.dumps({'report': outcome['report'], 'worker': state}, default=str))
+"""
+
+
+def worker_state() -> dict:
+    """What a spawned worker built when it re-imported the entry script"""
+    entry = sys.modules.get('__mp_main__')
+    return {
+        'entry_file': os.path.basename(getattr(entry, '__file__', '') or ''),
+        'services': [name for name in ('executor', 'dataset_service', 'ml_service', 'history_service', 'retrain_worker')
+                     if hasattr(entry, name)],
+        'threads': threading.active_count()
+    }
+
+
+def test_parallel_training_with_main_as_entry_point():
+    completed = subprocess.run([sys.executable, '-c', DRIVER], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, timeout=600)
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    outcome = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    report = outcome['report']
+    assert report['mode'] == 'parallel'
+    assert all(model['status'] == 'trained' for model in report['models'].values()), report
+
+    worker = outcome['worker']
+    assert worker['entry_file'] == 'main.py'
+    assert worker['services'] == []
+    assert worker['threads'] == 1
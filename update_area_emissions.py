@@ -1,6 +1,12 @@
+import os
+import sys
+import argparse
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from services.dataset_cache import read_dataset, write_dataset, stream_dataset
+
 CSV_PATH = 'project/src/data/Carbon_Emission_With_Seasons.csv'
 
 # Baseline realistic ranges per city and area type (kg CO2/month)
@@ -25,57 +31,99 @@ BASELINES = {
 
 AREA_TYPES = ['Residential','Corporate','Industrial','Vehicular','Construction','Airport']
 
-rng = np.random.default_rng(42)
+# Applied types are boosted, the rest damped, by a factor drawn from these ranges
+BOOST_RANGE = (1.05, 1.15)
+DAMP_RANGE = (0.8, 0.95)
 
-def sample_value(city: str, area_type: str) -> float:
-    low, high = BASELINES[city][area_type]
-    if low == high:
-        return float(low)
-    # sample realistically around the center with slight variability
-    val = rng.uniform(low, high)
-    return float(round(val, 2))
+SEED = 42
 
-def main():
-    df = pd.read_csv(CSV_PATH)
+# Rows sampled at a time, bounding the temporary arrays (about 400 bytes per row)
+BLOCK_ROWS = 1_000_000
+
+CITIES = list(BASELINES)
+LOWS = np.array([[BASELINES[city][t][0] for t in AREA_TYPES] for city in CITIES], dtype=np.float64)
+HIGHS = np.array([[BASELINES[city][t][1] for t in AREA_TYPES] for city in CITIES], dtype=np.float64)
+
+def city_indices(df: pd.DataFrame) -> np.ndarray:
+    """Row index into CITIES; cities without baselines use Mumbai's"""
+    if 'city' not in df.columns:
+        return np.full(len(df), CITIES.index('Mumbai'))
+    codes = pd.Categorical(df['city'], categories=CITIES).codes
+    return np.where(codes < 0, CITIES.index('Mumbai'), codes)
+
+def applied_types(df: pd.DataFrame) -> np.ndarray:
+    """(rows, area types) mask of the area types listed in each row's area_type_raw"""
+    applied = np.zeros((len(df), len(AREA_TYPES)), dtype=bool)
+    if 'area_type_raw' not in df.columns:
+        return applied
+
+    # Parse each distinct value once; missing values (code -1) list no types
+    raw = df['area_type_raw'].astype('category')
+    table = np.zeros((len(raw.cat.categories) + 1, len(AREA_TYPES)), dtype=bool)
+    for code, label in enumerate(raw.cat.categories):
+        types_from_raw = [t.strip() for t in str(label).split(',') if t.strip()]
+        table[code] = [area_type in types_from_raw for area_type in AREA_TYPES]
+    return table[raw.cat.codes.to_numpy()]
+
+def sample_area_values(df: pd.DataFrame, rng: np.random.Generator) -> np.ndarray:
+    """(rows, area types) emissions: a baseline from the city's range, then boosted or damped
 
+    Random numbers are drawn in the same order as row-by-row sampling (row,
+    then area type, then baseline before factor), so results for a seed do
+    not depend on how the rows are split into blocks or chunks.
+    """
+    cities = city_indices(df)
+    lows, highs = LOWS[cities], HIGHS[cities]
+    applied = applied_types(df)
+    zero_airport = (np.array(CITIES)[cities] == 'Navi Mumbai')[:, None] & (np.array(AREA_TYPES) == 'Airport')
+
+    # A baseline is drawn unless its range is a single value; a factor unless the value is forced to 0
+    draws = np.stack([lows != highs, applied | ~zero_airport], axis=-1)
+    positions = np.cumsum(draws.ravel()).reshape(draws.shape) - 1
+    uniforms = rng.random(int(draws.sum()))[np.maximum(positions, 0)]
+
+    base = np.where(draws[..., 0], np.round(lows + (highs - lows) * uniforms[..., 0], 2), lows)
+    boost = BOOST_RANGE[0] + (BOOST_RANGE[1] - BOOST_RANGE[0]) * uniforms[..., 1]
+    damp = DAMP_RANGE[0] + (DAMP_RANGE[1] - DAMP_RANGE[0]) * uniforms[..., 1]
+    return np.where(applied, np.round(base * boost, 2), np.where(zero_airport, 0.0, np.round(base * damp, 2)))
+
+def update_area_emissions(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Set realistic non-zero emissions for every area type of every row, in place
+
+    Types listed in area_type_raw are boosted by up to 15%, the rest damped
+    to 80-95% (Navi Mumbai airports stay 0).
+    """
     # Ensure columns exist
     for col in AREA_TYPES:
         if col not in df.columns:
             df[col] = 0.0
 
-    # Update each row: if an area type was previously 0, set a small baseline; otherwise keep within realistic range
-    updated_rows = 0
-    for idx, row in df.iterrows():
-        city = row.get('city', 'Mumbai')
-        city = 'Mumbai' if city not in BASELINES else city
-
-        # Determine which area types apply from area_type_raw (if present)
-        types_from_raw = []
-        if pd.notna(row.get('area_type_raw')):
-            types_from_raw = [t.strip() for t in str(row['area_type_raw']).split(',') if t.strip()]
-
-        # Assign values for all area types to avoid zeros, but weight applied types a bit higher
-        for area_type in AREA_TYPES:
-            base = sample_value(city, area_type)
-            # Boost applied types by up to +15% to reflect prominence in that area
-            if area_type in types_from_raw:
-                boost = rng.uniform(1.05, 1.15)
-                value = round(base * boost, 2)
-            else:
-                # Non-applied types get a softer baseline (80-95%) except when airport in Navi Mumbai (keep 0)
-                if city == 'Navi Mumbai' and area_type == 'Airport':
-                    value = 0.0
-                else:
-                    damp = rng.uniform(0.8, 0.95)
-                    value = round(base * damp, 2)
-            df.at[idx, area_type] = value
-        updated_rows += 1
+    values = np.empty((len(df), len(AREA_TYPES)), dtype=np.float64)
+    for start in range(0, len(df), BLOCK_ROWS):
+        values[start:start + BLOCK_ROWS] = sample_area_values(df.iloc[start:start + BLOCK_ROWS], rng)
+    for i, area_type in enumerate(AREA_TYPES):
+        df[area_type] = values[:, i]
 
     # Optional: compute a simple area_total_emission as sum of types to keep field consistent
     df['area_total_emission'] = df[AREA_TYPES].sum(axis=1).round(2)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign realistic per-area-type emissions to the dataset")
+    parser.add_argument("--csv", default=CSV_PATH, help="Dataset CSV, updated in place")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="Stream the CSV in chunks of this many rows, for files larger than memory (0: load it whole)")
+    args = parser.parse_args()
 
-    df.to_csv(CSV_PATH, index=False)
-    print(f"Updated {updated_rows} rows with realistic non-zero baselines. Saved to {CSV_PATH}")
+    rng = np.random.default_rng(args.seed)
+    if args.chunksize > 0:
+        updated_rows = stream_dataset(args.csv, lambda chunk: update_area_emissions(chunk, rng), args.chunksize)
+    else:
+        df = update_area_emissions(read_dataset(args.csv), rng)
+        write_dataset(df, args.csv)
+        updated_rows = len(df)
+    print(f"Updated {updated_rows} rows with realistic non-zero baselines. Saved to {args.csv}")
 
 if __name__ == '__main__':
     main()